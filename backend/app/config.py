@@ -31,6 +31,59 @@ class Settings(BaseSettings):
     config_dir: Path = Field(default=Path("/config"))
     output_dir: Path = Field(default=Path("/app/output"))
     
+    # Index SQLite des fichiers pour /files/search
+    file_index_enabled: bool = True
+    file_index_refresh_interval: int = 60
+    
+    # Surveillance des fichiers (inotify ou polling) pour les caches de listing
+    file_watcher_enabled: bool = False
+    file_watcher_backend: str = "auto"
+    file_watcher_poll_interval: int = 30
+    
+    # Threads dédiés aux opérations disque des routes /files
+    fs_max_workers: int = 4
+    
+    # Threads pour les os.link lors du hardlink d'un dossier
+    hardlink_workers: int = 8
+    
+    # Tâches de fond simultanées (hardlinks, copies)
+    job_max_workers: int = 2
+    
+    # Hachage des pièces à la création des torrents (0 = un thread par cœur)
+    torrent_hash_workers: int = 0
+    torrent_hash_buffer_size: int = 16 * 1024 * 1024
+    # Réutilise les pièces déjà calculées pour un contenu inchangé
+    torrent_hash_cache_enabled: bool = True
+    # Taille de pièce automatique: compact, balanced, fine ou torf
+    torrent_piece_size_policy: str = "balanced"
+    # Vérification locale avant seeding: pièces tirées en mode "sample"
+    torrent_verify_sample_pieces: int = 64
+    # Seule une vérification complète permet d'ajouter sans recheck qBittorrent;
+    # True accepte aussi un échantillon conforme (pièces non tirées non vérifiées)
+    torrent_verify_trust_sample: bool = False
+    
+    # Clients qBittorrent réutilisés: délais HTTP (s), intervalle de la sonde
+    # de santé (s, 0 = désactivée)
+    qbittorrent_connect_timeout: float = 5
+    qbittorrent_timeout: float = 30
+    qbittorrent_health_interval: int = 30
+    # Coupe-circuit des routes: échecs consécutifs avant ouverture, durée (s)
+    qbittorrent_breaker_failures: int = 5
+    qbittorrent_breaker_reset: float = 30
+    # Suivi des torrents ajoutés pour seeding: intervalle de sync/maindata (s),
+    # durée pendant laquelle un torrent terminé (seeding, erreur, retiré) reste suivi (s)
+    qbittorrent_sync_interval: float = 2
+    qbittorrent_sync_retention: float = 300
+    
+    # Cache des réponses TMDB (mémoire + tmdb_cache.db): durées de fraîcheur
+    # des recherches et des fiches (s), fenêtre où une réponse périmée est
+    # encore servie pendant son rafraîchissement (s), entrées en mémoire
+    tmdb_cache_enabled: bool = True
+    tmdb_cache_search_ttl: int = 3600
+    tmdb_cache_details_ttl: int = 7 * 24 * 3600
+    tmdb_cache_stale_ttl: int = 30 * 24 * 3600
+    tmdb_cache_memory_entries: int = 512
+    
     @property
     def base_path(self) -> Path:
         return Path(__file__).parent.parent
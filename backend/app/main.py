@@ -1,7 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
+from .config import settings
+from .services.file_index_service import file_index_service
+from .services.file_watcher_service import file_watcher_service
+from .services.job_service import job_service
+from .services.qbittorrent_async import qbittorrent_async
+from .services.qbittorrent_service import qbittorrent_service
+from .services.seeding_tracker import seeding_tracker
+from .services.tmdb_cache import tmdb_cache
+from .utils.fs_executor import fs_executor
+
 from .routers import (
     files_router,
     torrent_router,
@@ -9,13 +20,36 @@ from .routers import (
     presentation_router,
     tags_router,
     settings_router,
-    tmdb_router
+    tmdb_router,
+    jobs_router
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Construire/rafraîchir l'index des fichiers sans bloquer le démarrage
+    if settings.file_index_enabled:
+        file_index_service.refresh_in_background()
+    if settings.file_watcher_enabled:
+        file_watcher_service.start_in_background()
+    qbittorrent_service.start_health_probe()
+    seeding_tracker.start(qbittorrent_service.credentials)
+    yield
+    await seeding_tracker.stop()
+    await qbittorrent_async.aclose()
+    # Derniers last_used du cache TMDB (LRU sur disque), puis connexion SQLite
+    tmdb_cache.flush_touched()
+    tmdb_cache.close()
+    file_watcher_service.stop()
+    job_service.shutdown()
+    fs_executor.shutdown()
+
+
 app = FastAPI(
     title="La Cale Upload Preparation Tool",
     description="API pour préparer les uploads sur le tracker La Cale",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS origins configurable via env var, fallback to dev defaults
@@ -39,6 +73,7 @@ app.include_router(presentation_router)
 app.include_router(tags_router)
 app.include_router(settings_router)
 app.include_router(tmdb_router)
+app.include_router(jobs_router)
 
 
 @app.get("/")
@@ -1,3 +1,6 @@
-from .torrent import TorrentCreate, TorrentResponse
+from .torrent import (
+    TorrentBatchCreate, TorrentCreate, TorrentPrepare, TorrentResponse, TorrentVerification, TorrentVerify
+)
 from .media import MediaInfo, NFOData
 from .settings import SettingsModel, QBittorrentSettings, TrackerSettings
+from .hardlink import HardlinkFileResult, HardlinkReport
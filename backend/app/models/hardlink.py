@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class HardlinkFileResult(BaseModel):
+    source: str
+    destination: str
+    size: int = 0
+    # linked, existing (même inode), skipped (fichier différent), copied, error
+    status: str
+    # hardlink, reflink, copy_file_range, sendfile ou copy (fichiers liés ou copiés)
+    strategy: Optional[str] = None
+    error: Optional[str] = None
+
+
+class HardlinkReport(BaseModel):
+    linked: int = 0
+    existing: int = 0
+    skipped: int = 0
+    copied: int = 0
+    errors: int = 0
+    # Fichiers déjà traités d'après le journal d'une exécution interrompue
+    resumed: int = 0
+    directories_created: int = 0
+    bytes_total: int = 0
+    duration: float = 0.0
+    files_per_second: float = 0.0
+    bytes_per_second: float = 0.0
+    # Nombre de fichiers par stratégie de transfert
+    strategies: Dict[str, int] = {}
+    files: List[HardlinkFileResult] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import List, Literal, Optional
 
 
 class TorrentCreate(BaseModel):
@@ -10,6 +10,45 @@ class TorrentCreate(BaseModel):
     tracker_url: Optional[str] = None
 
 
+class TorrentPrepare(TorrentCreate):
+    """Hardlink de source_path vers destination_path, MediaInfo et torrent de la destination"""
+    destination_path: str
+
+
+class TorrentBatchCreate(BaseModel):
+    items: List[TorrentCreate]
+
+
+class TorrentVerify(BaseModel):
+    torrent_path: str
+    content_path: str
+    mode: Literal["sample", "full"] = "sample"
+
+
+class TorrentVerification(BaseModel):
+    """Résultat de la vérification locale d'un contenu contre son .torrent"""
+    info_hash: str
+    content_path: str
+    mode: str
+    ok: bool
+    pieces_total: int = 0
+    pieces_checked: int = 0
+    mismatched: List[int] = []
+    missing_files: List[str] = []
+    cached: bool = False
+    duration: float = 0.0
+
+
+class TorrentSeedItem(BaseModel):
+    torrent_path: str
+    content_path: str
+    save_path: Optional[str] = None
+
+
+class TorrentSeedBatch(BaseModel):
+    items: List[TorrentSeedItem]
+
+
 class TorrentResponse(BaseModel):
     success: bool
     torrent_path: Optional[str] = None
@@ -5,3 +5,4 @@ from .presentation import router as presentation_router
 from .tags import router as tags_router
 from .settings import router as settings_router
 from .tmdb import router as tmdb_router
+from .jobs import router as jobs_router
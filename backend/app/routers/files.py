@@ -1,16 +1,38 @@
-from fastapi import APIRouter, Query, Body, HTTPException
+from fastapi import APIRouter, Query, Body, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 from pydantic import BaseModel
+import json
 from ..services.file_service import file_service
+from ..services.file_watcher_service import file_watcher_service
+from ..services.hardlink_journal_service import HardlinkJournalBusy, hardlink_journal_service
+from ..services.job_service import job_service
+from ..services.search_session_service import search_session_service, take
+from ..utils.fs_executor import fs_executor, OperationCancelled
 
 router = APIRouter(prefix="/files", tags=["files"])
 
 
+async def run_fs(request: Request, func, *args, **kwargs):
+    """Exécute une opération disque dans le pool dédié, annulée si le client part"""
+    try:
+        return await fs_executor.run(func, *args, request=request, **kwargs)
+    except OperationCancelled:
+        raise HTTPException(status_code=499, detail="Requête annulée")
+
+
 class HardlinkRequest(BaseModel):
     source_path: str
     destination_path: str
 
 
+class SearchSessionRequest(BaseModel):
+    path: str
+    query: str
+    filter_type: Optional[str] = None
+    limit: int = 100
+
+
 @router.get("/root")
 async def get_root():
     """Get the media root directory"""
@@ -19,56 +41,104 @@ async def get_root():
 
 @router.get("/list")
 async def list_directory(
+    request: Request,
     path: str = Query(..., description="Chemin du répertoire"),
-    filter_type: Optional[str] = Query(None, description="Filtrer par type: video, audio, ebook, archive")
+    filter_type: Optional[str] = Query(None, description="Filtrer par type: video, audio, ebook, archive"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Taille de page (pagination par curseur)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par la page précédente")
 ):
-    items = file_service.list_directory(path, filter_type)
-    parent = file_service.get_parent_path(path)
+    parent = await run_fs(request, file_service.get_parent_path, path)
+    if limit is None and cursor is None:
+        items = await run_fs(request, file_service.list_directory, path, filter_type)
+        return {
+            "current_path": path,
+            "parent_path": parent,
+            "items": items
+        }
+    
+    try:
+        page = await run_fs(
+            request, file_service.list_directory_page,
+            path, filter_type, limit=limit or 500, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "current_path": path,
         "parent_path": parent,
-        "items": items
+        **page
     }
 
 
 @router.get("/info")
-async def get_file_info(path: str = Query(..., description="Chemin du fichier")):
-    info = file_service.get_file_info(path)
+async def get_file_info(request: Request, path: str = Query(..., description="Chemin du fichier")):
+    info = await run_fs(request, file_service.get_file_info, path)
     if info is None:
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
     return info
 
 
 @router.get("/directory-size")
-async def get_directory_size(path: str = Query(..., description="Chemin du répertoire")):
-    size = file_service.get_directory_size(path)
+async def get_directory_size(request: Request, path: str = Query(..., description="Chemin du répertoire")):
+    size = await run_fs(request, file_service.get_directory_size, path)
     return {"path": path, "size": size}
 
 
+@router.get("/directory-size/stream")
+async def stream_directory_size(request: Request, path: str = Query(..., description="Chemin du répertoire")):
+    """Taille d'un dossier en NDJSON: résultats partiels puis total (done=true)
+    
+    Le parcours avance dans fs_executor et s'arrête si le client se déconnecte.
+    """
+    iterator = file_service.iter_directory_size(path)
+    
+    async def generate():
+        try:
+            while True:
+                progress = await fs_executor.run(next, iterator, None, request=request)
+                if progress is None:
+                    return
+                yield json.dumps(progress) + "\n"
+        except OperationCancelled:
+            return
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/folder-summary")
+async def get_folder_summary(request: Request, path: str = Query(..., description="Chemin du répertoire")):
+    """Premier fichier vidéo, nombre de vidéos, taille et épisodes d'un dossier en un seul appel"""
+    summary = await run_fs(request, file_service.get_folder_summary, path)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Dossier non trouvé")
+    return summary
+
+
 @router.get("/first-video")
-async def get_first_video(path: str = Query(..., description="Chemin du répertoire")):
+async def get_first_video(request: Request, path: str = Query(..., description="Chemin du répertoire")):
     """Trouve le premier fichier vidéo dans un dossier"""
-    video = file_service.get_first_video_file(path)
+    video = await run_fs(request, file_service.get_first_video_file, path)
     if video is None:
         raise HTTPException(status_code=404, detail="Aucun fichier vidéo trouvé")
     return video
 
 
 @router.get("/video-count")
-async def get_video_count(path: str = Query(..., description="Chemin du répertoire")):
+async def get_video_count(request: Request, path: str = Query(..., description="Chemin du répertoire")):
     """Compte le nombre de fichiers vidéo dans un dossier"""
-    count = file_service.count_video_files(path)
+    count = await run_fs(request, file_service.count_video_files, path)
     return {"path": path, "count": count}
 
 
 @router.get("/search")
 async def search_files(
+    request: Request,
     path: str = Query(..., description="Chemin de base pour la recherche"),
     query: str = Query(..., description="Terme de recherche"),
     filter_type: Optional[str] = Query(None, description="Filtrer par type: video, audio, ebook, archive")
 ):
     """Recherche des fichiers par nom dans un répertoire"""
-    results = file_service.search_files(path, query, filter_type)
+    results = await run_fs(request, file_service.search_files, path, query, filter_type)
     return {
         "query": query,
         "path": path,
@@ -76,6 +146,78 @@ async def search_files(
     }
 
 
+@router.get("/search/stream")
+async def stream_search(
+    request: Request,
+    path: str = Query(..., description="Chemin de base pour la recherche"),
+    query: str = Query(..., description="Terme de recherche"),
+    filter_type: Optional[str] = Query(None, description="Filtrer par type: video, audio, ebook, archive"),
+    max_results: int = Query(1000, ge=1, le=10000, description="Nombre maximum de résultats")
+):
+    """Recherche en Server-Sent Events: un événement `result` par correspondance, puis `done`
+    
+    Fermer la connexion (nouvelle requête côté client) arrête le parcours disque.
+    """
+    iterator = file_service.iter_search_files(path, query, filter_type)
+    
+    async def events():
+        sent = 0
+        try:
+            while sent < max_results:
+                items, exhausted = await fs_executor.run(
+                    take, iterator, min(50, max_results - sent), 0.2, request=request
+                )
+                for item in items:
+                    yield f"event: result\ndata: {json.dumps(item, ensure_ascii=False)}\n\n"
+                sent += len(items)
+                if exhausted:
+                    break
+            yield f"event: done\ndata: {json.dumps({'count': sent})}\n\n"
+        except OperationCancelled:
+            return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/search/session")
+async def create_search_session(request: Request, data: SearchSessionRequest):
+    """Démarre une recherche paginée et renvoie la première page"""
+    iterator = file_service.iter_search_files(data.path, data.query, data.filter_type)
+    session = search_session_service.create(iterator, data.path, data.query)
+    results = await run_fs(request, session.next_page, max(1, min(data.limit, 1000)))
+    return {"session_id": session.id, "results": results, "done": session.done}
+
+
+@router.get("/search/session/{session_id}")
+async def next_search_page(
+    request: Request,
+    session_id: str,
+    limit: int = Query(100, ge=1, le=1000, description="Taille de la page")
+):
+    """Page suivante d'une recherche, sans relancer le parcours"""
+    session = search_session_service.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session de recherche expirée ou inconnue")
+    results = await run_fs(request, session.next_page, limit)
+    return {"session_id": session.id, "results": results, "done": session.done}
+
+
+@router.delete("/search/session/{session_id}")
+async def close_search_session(session_id: str):
+    """Abandonne une recherche (par exemple quand la requête change)"""
+    return {"success": search_session_service.close(session_id)}
+
+
+@router.get("/watcher-status")
+async def get_watcher_status():
+    """État de la surveillance des fichiers et taille des caches"""
+    return file_watcher_service.status()
+
+
 @router.post("/create-hardlink")
 async def create_hardlink(data: HardlinkRequest):
     """Crée un hardlink entre la source et la destination
@@ -85,8 +227,53 @@ async def create_hardlink(data: HardlinkRequest):
     
     Note: Les hardlinks ne fonctionnent que sur le même système de fichiers
     """
-    success, message = file_service.create_hardlink(
-        data.source_path,
-        data.destination_path
-    )
-    return {"success": success, "message": message}
+    # Les copies (hardlink impossible) passent par le pool des jobs: elles
+    # n'occupent pas fs_executor, qui sert le listage et la recherche.
+    # Pas d'annulation à la déconnexion: on ne laisse pas une arborescence à moitié créée
+    try:
+        job = await fs_executor.run(file_service.start_hardlink_job, data.source_path, data.destination_path)
+    except HardlinkJournalBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await job_service.wait(job)
+    if job.status == job.COMPLETED:
+        return job.result
+    return {"success": False, "message": job.message or job.error, "report": None}
+
+
+@router.post("/create-hardlink/job")
+async def start_hardlink_job(data: HardlinkRequest):
+    """Lance la création du hardlink en tâche de fond
+    
+    Retourne immédiatement le job; suivre la progression via /jobs/{id}.
+    """
+    try:
+        # Réserve (et relit) le journal du dossier: accès disque
+        job = await fs_executor.run(file_service.start_hardlink_job, data.source_path, data.destination_path)
+    except HardlinkJournalBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/hardlink-journals")
+async def list_hardlink_journals():
+    """Opérations de hardlink interrompues
+    
+    Relancer la même opération (même source et destination) la reprend;
+    sinon elle peut être annulée via /hardlink-journals/{id}/rollback.
+    """
+    return await fs_executor.run(hardlink_journal_service.list_pending)
+
+
+@router.post("/hardlink-journals/{journal_id}/rollback")
+async def rollback_hardlink_journal(journal_id: str):
+    """Supprime les fichiers et dossiers créés par une opération interrompue
+    
+    Refusé (409) tant que l'opération est en cours.
+    """
+    try:
+        result = await fs_executor.run(hardlink_journal_service.rollback, journal_id)
+    except HardlinkJournalBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Journal non trouvé")
+    return {"success": True, **result}
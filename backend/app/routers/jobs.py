@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+from ..services.job_service import job_service
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+EVENTS_INTERVAL = 0.5
+
+
+@router.get("")
+async def list_jobs(kind: Optional[str] = Query(None, description="Filtrer par type: hardlink...")):
+    """Liste les tâches de fond, les plus récentes d'abord"""
+    return [job.to_dict() for job in job_service.list_jobs(kind)]
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Progression d'une tâche: fichiers/octets traités, débit, ETA"""
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_job(request: Request, job_id: str):
+    """Progression d'une tâche en Server-Sent Events
+    
+    Événements `progress` (état du job) toutes les EVENTS_INTERVAL secondes,
+    puis un `done` final avec le résultat. Le job continue si le client se
+    déconnecte.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    
+    async def events():
+        while not job.finished:
+            if await request.is_disconnected():
+                return
+            yield f"event: progress\ndata: {json.dumps(job.to_dict())}\n\n"
+            await asyncio.sleep(EVENTS_INTERVAL)
+        yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Demande l'annulation d'une tâche en cours"""
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    return {"success": job.cancel(), "job": job.to_dict()}
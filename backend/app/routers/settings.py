@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from ..config import user_settings
 from ..models.settings import SettingsModel, QBittorrentSettings, TrackerSettings, PathSettings
+from ..services.qbittorrent_service import qbittorrent_service
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
@@ -14,12 +15,14 @@ async def get_settings():
 @router.post("/")
 async def save_settings(data: SettingsModel):
     user_settings.save(data.model_dump())
+    qbittorrent_service.start_health_probe()
     return {"success": True, "message": "Paramètres sauvegardés"}
 
 
 @router.patch("/qbittorrent")
 async def update_qbittorrent_settings(data: QBittorrentSettings):
     user_settings.update("qbittorrent", data.model_dump())
+    qbittorrent_service.start_health_probe()
     return {"success": True}
 
 
@@ -16,6 +16,19 @@ async def get_tmdb_status():
     }
 
 
+@router.get("/cache")
+def get_tmdb_cache_stats():
+    """Statistiques du cache TMDB (hits mémoire/disque, périmés, rafraîchissements)"""
+    return tmdb_service.cache_stats()
+
+
+@router.delete("/cache")
+def clear_tmdb_cache():
+    """Vide le cache TMDB (mémoire et disque)"""
+    tmdb_service.clear_cache()
+    return {"success": True}
+
+
 @router.get("/search")
 async def search(
     query: str = Query(..., description="Terme de recherche"),
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Body, HTTPException
-from fastapi.responses import FileResponse
+import json
+from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from ..services.qbittorrent_async import (
+    QBittorrentAuthError, QBittorrentError, QBittorrentUnavailable, qbittorrent_async
+)
 from ..services.qbittorrent_service import qbittorrent_service
-from ..models.torrent import TorrentCreate, TorrentResponse
+from ..services.prepare_pipeline_service import prepare_pipeline_service
+from ..services.torrent_batch_service import torrent_batch_service
+from ..services.seeding_tracker import seeding_tracker
+from ..services.torrent_verify_service import torrent_verifier
+from ..models.torrent import (
+    TorrentBatchCreate, TorrentCreate, TorrentPrepare, TorrentResponse, TorrentSeedBatch, TorrentVerify
+)
 
 router = APIRouter(prefix="/torrent", tags=["torrent"])
 
+SEEDING_HEARTBEAT = 15
+
 
 class ConnectionTest(BaseModel):
     host: str
@@ -18,15 +30,24 @@ class ConnectionTest(BaseModel):
 
 @router.post("/test-connection")
 async def test_connection(data: ConnectionTest):
-    success, message = qbittorrent_service.test_connection(
-        host=data.host,
-        port=data.port,
-        username=data.username,
-        password=data.password
+    success, message = await qbittorrent_async.test_connection(
+        (data.host, data.port, data.username, data.password)
     )
     return {"success": success, "message": message}
 
 
+@router.get("/health")
+async def qbittorrent_health():
+    """Dernier état de la WebUI qBittorrent relevé par la sonde de fond
+    
+    Sans relevé (sonde désactivée), la WebUI est interrogée maintenant.
+    """
+    health = qbittorrent_async.health
+    if not health:
+        health = await qbittorrent_async.probe(qbittorrent_service.credentials())
+    return health
+
+
 @router.post("/create", response_model=TorrentResponse)
 async def create_torrent(data: TorrentCreate):
     success, result = await qbittorrent_service.create_torrent(
@@ -53,6 +74,99 @@ async def create_torrent(data: TorrentCreate):
         )
 
 
+@router.post("/create/job")
+async def start_torrent_job(data: TorrentCreate):
+    """Lance la création du torrent en tâche de fond
+    
+    Progression (pièces hachées, débit, ETA) via /jobs/{id} ou le flux
+    SSE /jobs/{id}/events; annulation via DELETE /jobs/{id}.
+    """
+    job = qbittorrent_service.start_torrent_job(
+        source_path=data.source_path,
+        name=data.name,
+        piece_size=data.piece_size,
+        private=data.private,
+        tracker_url=data.tracker_url
+    )
+    return job.to_dict()
+
+
+@router.post("/create/batch")
+async def start_torrent_batch_job(data: TorrentBatchCreate):
+    """Crée plusieurs torrents dans une seule tâche de fond
+    
+    Un lecteur par disque physique, hachage sur un pool partagé; le
+    résultat de chaque source apparaît dans details.items dès qu'elle
+    est terminée.
+    """
+    if not data.items:
+        raise HTTPException(status_code=400, detail="Aucune source fournie")
+    job = torrent_batch_service.start_batch_job(data.items)
+    return job.to_dict()
+
+
+@router.post("/prepare/job")
+async def start_prepare_job(data: TorrentPrepare):
+    """Hardlink, MediaInfo et torrent en une seule tâche de fond
+    
+    Les fichiers copiés faute de hardlink sont hachés pendant la copie;
+    MediaInfo tourne pendant le hachage. Le résultat regroupe le rapport
+    de hardlink, le torrent créé (sur la destination) et le MediaInfo de
+    la vidéo principale.
+    """
+    job = prepare_pipeline_service.start_prepare_job(
+        source_path=data.source_path,
+        destination_path=data.destination_path,
+        name=data.name,
+        piece_size=data.piece_size,
+        private=data.private,
+        tracker_url=data.tracker_url
+    )
+    return job.to_dict()
+
+
+@router.post("/verify/job")
+async def start_verify_job(data: TorrentVerify):
+    """Vérifie localement le contenu contre le .torrent (échantillon ou complet)
+    
+    Un contenu conforme est mémorisé: add-for-seeding l'ajoute ensuite
+    sans recheck qBittorrent tant que ses fichiers ne changent pas.
+    """
+    if not Path(data.torrent_path).is_file():
+        raise HTTPException(status_code=404, detail="Fichier .torrent non trouvé")
+    job = torrent_verifier.start_verify_job(data.torrent_path, data.content_path, data.mode)
+    return job.to_dict()
+
+
+def _qbittorrent_http_error(e: QBittorrentError) -> HTTPException:
+    if isinstance(e, QBittorrentUnavailable):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, QBittorrentAuthError):
+        return HTTPException(status_code=401, detail="qBittorrent: identifiants incorrects")
+    return HTTPException(status_code=502, detail=str(e))
+
+
+@router.get("/info")
+async def torrents_info(hashes: Optional[str] = None, category: Optional[str] = None):
+    """Torrents connus de qBittorrent (hashes séparés par des |)"""
+    try:
+        return await qbittorrent_async.client(qbittorrent_service.credentials()).info(
+            hashes.split("|") if hashes else None, category=category
+        )
+    except QBittorrentError as e:
+        raise _qbittorrent_http_error(e)
+
+
+@router.post("/recheck")
+async def recheck_torrents(hashes: List[str] = Body(..., embed=True)):
+    """Relance la vérification des torrents dans qBittorrent"""
+    try:
+        await qbittorrent_async.client(qbittorrent_service.credentials()).recheck(hashes)
+    except QBittorrentError as e:
+        raise _qbittorrent_http_error(e)
+    return {"success": True}
+
+
 @router.get("/download/{filename}")
 async def download_torrent(filename: str):
     from ..config import settings
@@ -79,8 +193,69 @@ async def add_for_seeding(
     torrent_path: str = Body(...),
     content_path: str = Body(...)
 ):
-    success, message = qbittorrent_service.add_torrent_for_seeding(
+    success, message = await qbittorrent_service.add_torrent_for_seeding_async(
         torrent_path=torrent_path,
         content_path=content_path
     )
     return {"success": success, "message": message}
+
+
+@router.post("/add-for-seeding/batch")
+async def add_batch_for_seeding(data: TorrentSeedBatch):
+    """Ajoute plusieurs torrents pour seeding (un torrents/add par save_path)"""
+    if not data.items:
+        raise HTTPException(status_code=400, detail="Aucun torrent à ajouter")
+    items = await qbittorrent_service.add_torrents_for_seeding_async(
+        [item.model_dump() for item in data.items]
+    )
+    return {"success": all(item["success"] for item in items), "items": items}
+
+
+@router.get("/seeding")
+async def seeding_state(refresh: bool = False):
+    """État des torrents ajoutés pour seeding (miroir de sync/maindata)"""
+    if refresh and seeding_tracker.tracked:
+        try:
+            await seeding_tracker.sync(qbittorrent_async.client(qbittorrent_service.credentials()))
+        except QBittorrentError as e:
+            raise _qbittorrent_http_error(e)
+    return seeding_tracker.snapshot()
+
+
+@router.get("/seeding/events")
+async def stream_seeding_state(request: Request):
+    """État des torrents suivis en Server-Sent Events
+    
+    Un événement `state` à la connexion puis à chaque changement (fin du
+    recheck, passage en seeding, erreur...); un commentaire toutes les
+    SEEDING_HEARTBEAT secondes garde la connexion ouverte.
+    """
+    async def events():
+        version = None
+        while not await request.is_disconnected():
+            if version is None or await seeding_tracker.wait_for_change(version, SEEDING_HEARTBEAT):
+                snapshot = seeding_tracker.snapshot()
+                version = snapshot["version"]
+                yield f"event: state\ndata: {json.dumps(snapshot)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/seeding/track")
+async def track_seeding(hashes: List[str] = Body(..., embed=True)):
+    """Suit des torrents déjà présents dans qBittorrent"""
+    seeding_tracker.track(hashes)
+    return seeding_tracker.snapshot()
+
+
+@router.delete("/seeding/{torrent_hash}")
+async def untrack_seeding(torrent_hash: str):
+    if not seeding_tracker.untrack(torrent_hash):
+        raise HTTPException(status_code=404, detail="Torrent non suivi")
+    return {"success": True}
@@ -0,0 +1,178 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+from app.utils.fs_executor import check_cancelled
+from app.utils.media import VIDEO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryNode:
+    """Contenu mémorisé d'un dossier: fichiers directs et sous-dossiers
+
+    extensions: extension -> [nombre, taille]; videos: (nom, taille) des
+    fichiers vidéo directs; newest_mtime_ns: mtime du fichier direct le plus
+    récent.
+    """
+
+    __slots__ = ("key", "files_size", "file_count", "subdirs", "extensions", "videos",
+                 "newest_mtime_ns")
+
+    def __init__(self, key: Tuple[int, int, int], files_size: int, file_count: int,
+                 subdirs: List[str], extensions: Dict[str, List[int]],
+                 videos: List[Tuple[str, int]], newest_mtime_ns: int):
+        self.key = key
+        self.files_size = files_size
+        self.file_count = file_count
+        self.subdirs = subdirs
+        self.extensions = extensions
+        self.videos = videos
+        self.newest_mtime_ns = newest_mtime_ns
+
+
+class DirectorySizeService:
+    """Calcul des tailles de dossiers avec mémoïsation par (device, inode, mtime)
+
+    Le mtime d'un dossier change à chaque ajout, suppression ou renommage d'une
+    entrée directe: un dossier dont la clé est inchangée n'est pas relu, on ne
+    paie qu'un stat() par dossier. Seules les branches modifiées sont
+    rescannées.
+
+    Un fichier qui grossit sur place (téléchargement en cours) ne change pas
+    le mtime de son dossier: un dossier dont un fichier direct a été modifié
+    depuis moins de RECENT_WINDOW secondes est donc relu à chaque calcul.
+    Seul un fichier réécrit après être resté inactif plus longtemps que cette
+    fenêtre échappe à la détection.
+    """
+
+    MAX_NODES = 200_000
+    RECENT_WINDOW = 600  # secondes pendant lesquelles un dossier modifié n'est pas mémorisé
+    PROGRESS_INTERVAL = 0.5  # secondes entre deux résultats partiels
+
+    def __init__(self):
+        self._nodes: Dict[str, DirectoryNode] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(st: os.stat_result) -> Tuple[int, int, int]:
+        return (st.st_dev, st.st_ino, st.st_mtime_ns)
+
+    def _scan(self, directory: str, key: Tuple[int, int, int]) -> DirectoryNode:
+        files_size = 0
+        file_count = 0
+        subdirs = []
+        extensions: Dict[str, List[int]] = {}
+        videos = []
+        newest_mtime_ns = 0
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                size = st.st_size
+                newest_mtime_ns = max(newest_mtime_ns, st.st_mtime_ns)
+                files_size += size
+                file_count += 1
+                extension = os.path.splitext(entry.name)[1].lower()
+                if extension == ".":
+                    extension = ""
+                stats = extensions.setdefault(extension, [0, 0])
+                stats[0] += 1
+                stats[1] += size
+                if extension in VIDEO_EXTENSIONS:
+                    videos.append((entry.name, size))
+        return DirectoryNode(key, files_size, file_count, subdirs, extensions, videos, newest_mtime_ns)
+
+    def _is_fresh(self, node: DirectoryNode, key: Tuple[int, int, int]) -> bool:
+        if node.key != key:
+            return False
+        return time.time_ns() - node.newest_mtime_ns >= self.RECENT_WINDOW * 1_000_000_000
+
+    def _get_node(self, directory: str) -> Optional[DirectoryNode]:
+        try:
+            key = self._key(os.stat(directory))
+        except OSError:
+            return None
+        node = self._nodes.get(directory)
+        if node is not None and self._is_fresh(node, key):
+            return node
+        try:
+            node = self._scan(directory, key)
+        except OSError as e:
+            logger.debug("Taille: dossier illisible %s: %s", directory, e)
+            return None
+        with self._lock:
+            if len(self._nodes) >= self.MAX_NODES:
+                self._nodes.clear()
+            self._nodes[directory] = node
+        return node
+
+    def iter_nodes(self, directory_path: str) -> Iterator[Tuple[str, DirectoryNode]]:
+        """Parcourt l'arborescence en un seul passage, via le cache quand c'est possible
+
+        Yields:
+            Tuples (chemin du dossier, DirectoryNode)
+        """
+        stack = [str(directory_path)]
+        while stack:
+            check_cancelled()
+            directory = stack.pop()
+            node = self._get_node(directory)
+            if node is None:
+                continue
+            yield directory, node
+            stack.extend(node.subdirs)
+
+    def iter_directory_size(self, directory_path: str) -> Iterator[dict]:
+        """Calcule la taille d'un dossier en produisant des résultats partiels
+
+        Le total d'un sous-arbre n'est pas mémorisé tel quel: le mtime d'un
+        dossier ne reflète pas les changements plus profonds. On additionne
+        donc les tailles directes mémorisées de chaque dossier, en ne relisant
+        que ceux dont la clé a changé.
+
+        Yields:
+            dict avec size, files, directories et done (True pour le dernier)
+        """
+        root = str(directory_path)
+        size = files = directories = 0
+        last_report = time.monotonic()
+        for _, node in self.iter_nodes(root):
+            directories += 1
+            size += node.files_size
+            files += node.file_count
+
+            now = time.monotonic()
+            if now - last_report >= self.PROGRESS_INTERVAL:
+                last_report = now
+                yield {"path": root, "size": size, "files": files,
+                       "directories": directories, "done": False}
+
+        yield {"path": root, "size": size, "files": files,
+               "directories": directories, "done": True}
+
+    def get_size(self, directory_path: str) -> int:
+        result = {"size": 0}
+        for result in self.iter_directory_size(directory_path):
+            pass
+        return result["size"]
+
+    def invalidate(self, directory_path: Optional[str] = None):
+        """Oublie un dossier mémorisé (ou tous si directory_path est None)"""
+        with self._lock:
+            if directory_path is None:
+                self._nodes.clear()
+            else:
+                self._nodes.pop(str(directory_path), None)
+
+
+directory_size_service = DirectorySizeService()
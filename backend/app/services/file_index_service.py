@@ -0,0 +1,372 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+from app.utils.fs_executor import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class FileIndexService:
+    """Index persistant (SQLite) des fichiers sous media_root
+
+    Le rafraîchissement est incrémental: seuls les dossiers dont le mtime a
+    changé depuis le dernier passage sont relus. Un dossier dont le mtime est
+    inchangé n'a ni ajout, ni suppression, ni renommage d'entrée directe; seul
+    un fichier réécrit sur place (même nom) peut échapper à la détection.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        parent TEXT NOT NULL,
+        name TEXT NOT NULL,
+        name_lower TEXT NOT NULL,
+        is_dir INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        extension TEXT NOT NULL,
+        mtime REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_entries_parent ON entries(parent);
+    CREATE TABLE IF NOT EXISTS directories (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL
+    );
+    """
+
+    FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+        name_lower, content='entries', content_rowid='id', tokenize='trigram'
+    );
+    CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts(rowid, name_lower) VALUES (new.id, new.name_lower);
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+        INSERT INTO entries_fts(entries_fts, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+        INSERT INTO entries_fts(entries_fts, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+        INSERT INTO entries_fts(rowid, name_lower) VALUES (new.id, new.name_lower);
+    END;
+    """
+
+    # Le tokenizer trigram ne sait pas chercher moins de 3 caractères
+    FTS_MIN_QUERY = 3
+
+    def __init__(self, root: Optional[Path] = None, db_path: Optional[Path] = None,
+                 refresh_interval: Optional[float] = None):
+        self._root = root
+        self._db_path = db_path
+        self._refresh_interval = refresh_interval
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._fts = False
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._walk_lock = threading.Lock()
+        self._last_refresh: Optional[float] = None
+
+    @property
+    def root(self) -> Path:
+        return self._root if self._root is not None else settings.media_root
+
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = settings.data_path / "file_index.db"
+        return self._db_path
+
+    @property
+    def refresh_interval(self) -> float:
+        if self._refresh_interval is None:
+            return float(settings.file_index_refresh_interval)
+        return self._refresh_interval
+
+    def _connect(self) -> sqlite3.Connection:
+        """Une connexion par thread (WAL: les lectures ne bloquent pas le rafraîchissement)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.executescript(self.SCHEMA)
+            try:
+                conn.executescript(self.FTS_SCHEMA)
+                self._fts = True
+            except sqlite3.OperationalError as e:
+                # SQLite < 3.34 : pas de tokenizer trigram, repli sur instr()
+                logger.info("Index FTS trigram indisponible (%s), recherche par sous-chaîne", e)
+                self._fts = False
+            conn.commit()
+            self._schema_ready = True
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Rafraîchissement
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _subtree_bounds(path: str):
+        """Bornes [path/, path0) couvrant tous les descendants de path ('0' suit '/')"""
+        prefix = path.rstrip(os.sep) + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def _scan_directory(self, directory: str) -> Tuple[List[tuple], List[str]]:
+        """(lignes de entries, sous-dossiers à parcourir)
+
+        Un lien symbolique vers un dossier est indexé comme dossier mais pas
+        parcouru (comme rglob): une boucle (lien vers un parent) ne peut pas
+        faire exploser le parcours.
+        """
+        rows, subdirs = [], []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=True)
+                    st = entry.stat(follow_symlinks=True)
+                    if is_dir and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                except OSError:
+                    continue
+                name = entry.name
+                extension = "" if is_dir else os.path.splitext(name)[1].lower()
+                if extension == ".":
+                    extension = ""
+                rows.append((
+                    entry.path, directory, name, name.lower(), int(is_dir),
+                    0 if is_dir else st.st_size, extension, st.st_mtime
+                ))
+        return rows, subdirs
+
+    def _replace_directory(self, conn: sqlite3.Connection, directory: str,
+                           rows: List[tuple], mtime_ns: int):
+        new_paths = {row[0] for row in rows}
+        existing = conn.execute(
+            "SELECT path, is_dir FROM entries WHERE parent = ?", (directory,)
+        ).fetchall()
+        for path, is_dir in existing:
+            if path in new_paths:
+                continue
+            conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+            if is_dir:
+                self._delete_subtree(conn, path)
+        conn.executemany(
+            """INSERT INTO entries (path, parent, name, name_lower, is_dir, size, extension, mtime)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(path) DO UPDATE SET
+                   is_dir = excluded.is_dir, size = excluded.size,
+                   extension = excluded.extension, mtime = excluded.mtime
+               WHERE entries.size != excluded.size OR entries.mtime != excluded.mtime
+                   OR entries.is_dir != excluded.is_dir""",
+            rows
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO directories (path, mtime_ns) VALUES (?, ?)",
+            (directory, mtime_ns)
+        )
+
+    def _delete_subtree(self, conn: sqlite3.Connection, path: str):
+        low, high = self._subtree_bounds(path)
+        conn.execute("DELETE FROM entries WHERE path >= ? AND path < ?", (low, high))
+        conn.execute("DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)",
+                     (path, low, high))
+
+    def refresh(self, base_path: Optional[str] = None) -> Dict[str, int]:
+        """Met à jour l'index pour base_path (media_root par défaut)
+
+        Un seul parcours à la fois (rafraîchissement de fond, watcher): les
+        suivants attendent au lieu d'écrire en même temps dans la base.
+
+        Returns:
+            Statistiques: dossiers parcourus et dossiers relus
+        """
+        with self._walk_lock:
+            return self._refresh(base_path)
+
+    def _refresh(self, base_path: Optional[str]) -> Dict[str, int]:
+        base = str(Path(base_path)) if base_path else str(self.root)
+        conn = self._connect()
+        low, high = self._subtree_bounds(base)
+        known: Dict[str, int] = dict(conn.execute(
+            "SELECT path, mtime_ns FROM directories WHERE path = ? OR (path >= ? AND path < ?)",
+            (base, low, high)
+        ).fetchall())
+
+        visited = rescanned = 0
+        stack = [base]
+        while stack:
+            check_cancelled()
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                # Dossier disparu entre deux passages: le parent sera relu
+                continue
+            visited += 1
+
+            if known.get(directory) != mtime_ns:
+                try:
+                    rows, subdirs = self._scan_directory(directory)
+                except OSError as e:
+                    logger.debug("Index: dossier illisible %s: %s", directory, e)
+                    continue
+                self._replace_directory(conn, directory, rows, mtime_ns)
+                rescanned += 1
+                if rescanned % 200 == 0:
+                    conn.commit()
+            else:
+                subdirs = [path for path, in conn.execute(
+                    "SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (directory,)
+                ) if not os.path.islink(path)]
+            stack.extend(subdirs)
+
+        conn.commit()
+        if base == str(self.root):
+            self._last_refresh = time.monotonic()
+        return {"visited": visited, "rescanned": rescanned}
+
+    def is_built(self) -> bool:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT 1 FROM directories WHERE path = ?", (str(self.root),)
+        ).fetchone()
+        return row is not None
+
+    def is_stale(self) -> bool:
+        if self._last_refresh is None:
+            return True
+        return time.monotonic() - self._last_refresh > self.refresh_interval
+
+    def refresh_in_background(self) -> bool:
+        """Lance un rafraîchissement complet dans un thread s'il n'y en a pas déjà un"""
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh, name="file-index-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+            return True
+
+    def wait_for_refresh(self):
+        """Attend la fin du rafraîchissement de fond en cours (s'il y en a un)"""
+        thread = self._refresh_thread
+        while thread is not None and thread.is_alive():
+            check_cancelled()
+            thread.join(0.1)
+
+    def _background_refresh(self):
+        try:
+            started = time.monotonic()
+            stats = self.refresh()
+            logger.info(
+                "Index fichiers rafraîchi: %d dossiers, %d relus en %.2fs",
+                stats["visited"], stats["rescanned"], time.monotonic() - started
+            )
+        except Exception as e:
+            logger.error("Erreur rafraîchissement index: %s", e)
+        finally:
+            self.close()
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def covers(self, path: str) -> bool:
+        """Vérifie que path est sous la racine indexée"""
+        root = str(self.root)
+        path = str(Path(path))
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def search(self, base_path: str, query: str,
+               extensions: Optional[Iterable[str]] = None,
+               max_results: int = 100, offset: int = 0) -> List[dict]:
+        """Recherche les entrées de base_path dont le nom contient query
+
+        Les entrées cachées (nom commençant par '.') sont exclues. Si
+        extensions est fourni, les fichiers sont filtrés par extension (les
+        dossiers sont toujours retournés). Tri: dossiers d'abord, puis par nom.
+        """
+        if self.is_stale():
+            self.refresh_in_background()
+            if not self.is_built():
+                # Première construction: attendre celle de fond plutôt qu'en lancer une seconde
+                self.wait_for_refresh()
+
+        conn = self._connect()
+        query_lower = query.lower()
+        low, high = self._subtree_bounds(str(Path(base_path)))
+
+        clauses = ["e.path >= ?", "e.path < ?", "e.name NOT LIKE '.%'", "instr(e.name_lower, ?) > 0"]
+        params: list = [low, high, query_lower]
+        source = "entries e"
+        if self._fts and len(query_lower) >= self.FTS_MIN_QUERY:
+            source = "entries_fts f JOIN entries e ON e.id = f.rowid"
+            clauses.insert(0, "entries_fts MATCH ?")
+            params.insert(0, '"' + query_lower.replace('"', '""') + '"')
+
+        extensions = list(extensions or [])
+        if extensions:
+            placeholders = ", ".join("?" for _ in extensions)
+            clauses.append(f"(e.is_dir = 1 OR e.extension IN ({placeholders}))")
+            params.extend(extensions)
+
+        sql = (
+            f"SELECT e.path, e.name, e.is_dir, e.size, e.extension FROM {source} "
+            f"WHERE {' AND '.join(clauses)} "
+            "ORDER BY e.is_dir DESC, e.name_lower LIMIT ? OFFSET ?"
+        )
+        params.extend([max_results, offset])
+
+        return [
+            {
+                "path": path,
+                "name": name,
+                "is_dir": bool(is_dir),
+                "size": size,
+                "extension": extension
+            }
+            for path, name, is_dir, size, extension in conn.execute(sql, params)
+        ]
+
+    def iter_search(self, base_path: str, query: str,
+                    extensions: Optional[Iterable[str]] = None,
+                    batch_size: int = 200) -> Iterator[dict]:
+        """Comme search, mais par lots successifs (une requête SQL par lot)
+
+        Chaque lot ouvre sa propre requête: l'itérateur peut être repris
+        depuis un autre thread (pagination des sessions de recherche).
+        """
+        extensions = list(extensions or [])
+        offset = 0
+        while True:
+            check_cancelled()
+            batch = self.search(base_path, query, extensions=extensions,
+                                max_results=batch_size, offset=offset)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+
+
+file_index_service = FileIndexService()
@@ -1,10 +1,27 @@
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+import base64
+import bisect
+import itertools
+import json
 import logging
 import os
-import shutil
 
 from app.config import settings
+from app.models.hardlink import HardlinkReport
+from app.services.directory_size_service import directory_size_service
+from app.services.file_index_service import file_index_service
+from app.services.file_watcher_service import file_watcher_service
+from app.services.hardlink_journal_service import (
+    HardlinkJournal, HardlinkJournalBusy, hardlink_journal_service
+)
+from app.services.hardlink_service import (
+    CopySinkFactory, ProgressCallback, counting_copy_sink, hardlink_engine
+)
+from app.services.job_service import Job, job_service
+from app.services.naming_service import naming_service
+from app.utils.fs_executor import check_cancelled
+from app.utils.media import MEDIA_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +37,7 @@ class FileItem:
 
 class FileService:
     
-    MEDIA_EXTENSIONS = {
-        'video': ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.ts', '.m2ts'],
-        'audio': ['.mp3', '.flac', '.wav', '.aac', '.ogg', '.m4a', '.wma', '.opus'],
-        'ebook': ['.pdf', '.epub', '.mobi', '.azw', '.cbr', '.cbz', '.djvu'],
-        'archive': ['.zip', '.rar', '.7z', '.tar', '.gz', '.iso']
-    }
+    MEDIA_EXTENSIONS = MEDIA_EXTENSIONS
     
     def __init__(self):
         self.media_root = settings.media_root
@@ -48,56 +60,125 @@ class FileService:
     
     def list_directory(self, directory_path: str, 
                        filter_type: Optional[str] = None) -> List[dict]:
+        path = Path(directory_path)
+        
+        # Security: ensure path is within media_root
+        if not self._is_path_allowed(path):
+            return []
+        
+        if file_watcher_service.is_running:
+            return file_watcher_service.cache.get_or_compute_listing(
+                str(path), filter_type, lambda: self._list_directory(path, filter_type)
+            )
+        return self._list_directory(path, filter_type)
+    
+    def list_directory_page(self, directory_path: str, filter_type: Optional[str] = None,
+                            limit: int = 500, cursor: Optional[str] = None) -> dict:
+        """Liste un dossier par pages, dans le même ordre que list_directory
+        
+        Le curseur encode la clé de tri du dernier élément renvoyé: il reste
+        valide si des entrées sont ajoutées ou supprimées entre deux pages.
+        Sans cache, seuls les fichiers de la page sont stat().
+        
+        Raises:
+            ValueError: si le curseur est invalide
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+        path = Path(directory_path)
+        if not self._is_path_allowed(path):
+            return {"items": [], "next_cursor": None, "total": 0}
+        
+        if file_watcher_service.is_running:
+            items = self.list_directory(directory_path, filter_type)
+            keys = [self._sort_key(item["name"], item["is_dir"]) for item in items]
+            start = bisect.bisect_right(keys, after) if after else 0
+            page = items[start:start + limit]
+            total = len(items)
+        else:
+            entries = self._scan_directory(path, filter_type)
+            start = bisect.bisect_right([key for key, _, _ in entries], after) if after else 0
+            page = [self._entry_to_item(entry, is_dir) for _, entry, is_dir in entries[start:start + limit]]
+            total = len(entries)
+        
+        next_cursor = None
+        if page and start + len(page) < total:
+            last = page[-1]
+            next_cursor = self._encode_cursor(self._sort_key(last["name"], last["is_dir"]))
+        return {"items": page, "next_cursor": next_cursor, "total": total}
+    
+    @staticmethod
+    def _sort_key(name: str, is_dir: bool) -> tuple:
+        # Dossiers d'abord, puis par nom insensible à la casse (nom exact pour départager)
+        return (not is_dir, name.lower(), name)
+    
+    @staticmethod
+    def _encode_cursor(key: tuple) -> str:
+        raw = json.dumps(list(key), ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
         try:
-            path = Path(directory_path)
-            
-            # Security: ensure path is within media_root
-            if not self._is_path_allowed(path):
-                return []
-            
-            if not path.exists() or not path.is_dir():
-                return []
-            
-            items = []
-            
-            for item in sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                try:
-                    if item.name.startswith('.'):
+            not_dir, name_lower, name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return (bool(not_dir), str(name_lower), str(name))
+        except (ValueError, TypeError, UnicodeError) as e:
+            raise ValueError(f"Curseur invalide: {cursor}") from e
+    
+    @staticmethod
+    def _extension(name: str) -> str:
+        # Même résultat que Path.suffix (un point final n'est pas une extension)
+        extension = os.path.splitext(name)[1]
+        return "" if extension == "." else extension.lower()
+    
+    def _scan_directory(self, path: Path, filter_type: Optional[str] = None) -> List[tuple]:
+        """Lit un dossier en un seul passage os.scandir
+        
+        Le type des entrées provient du DirEntry (pas de stat supplémentaire
+        sur la plupart des systèmes de fichiers).
+        
+        Returns:
+            Liste triée de tuples (clé de tri, DirEntry, is_dir)
+        """
+        allowed_extensions = self.MEDIA_EXTENSIONS.get(filter_type, []) if filter_type else []
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith('.'):
                         continue
-                    
-                    is_dir = item.is_dir()
-                    extension = item.suffix.lower() if not is_dir else ""
-                    
-                    if filter_type and not is_dir:
-                        allowed_extensions = self.MEDIA_EXTENSIONS.get(filter_type, [])
-                        if allowed_extensions and extension not in allowed_extensions:
-                            continue
-                    
-                    size = 0
-                    if not is_dir:
-                        try:
-                            size = item.stat().st_size
-                        except Exception:
-                            pass
-                    
-                    items.append({
-                        "path": str(item),
-                        "name": item.name,
-                        "is_dir": is_dir,
-                        "size": size,
-                        "extension": extension
-                    })
-                except PermissionError:
-                    continue
-                except Exception:
-                    continue
-            
-            return items
-        except PermissionError:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if allowed_extensions and not is_dir and self._extension(name) not in allowed_extensions:
+                        continue
+                    entries.append((self._sort_key(name, is_dir), entry, is_dir))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
             return []
         except Exception as e:
             logger.error("Erreur listage: %s", e)
             return []
+        entries.sort(key=lambda e: e[0])
+        return entries
+    
+    def _entry_to_item(self, entry: os.DirEntry, is_dir: bool) -> dict:
+        size = 0
+        if not is_dir:
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                pass
+        return {
+            "path": entry.path,
+            "name": entry.name,
+            "is_dir": is_dir,
+            "size": size,
+            "extension": "" if is_dir else self._extension(entry.name)
+        }
+    
+    def _list_directory(self, path: Path, filter_type: Optional[str] = None) -> List[dict]:
+        return [self._entry_to_item(entry, is_dir) for _, entry, is_dir in self._scan_directory(path, filter_type)]
     
     def get_parent_path(self, current_path: str) -> Optional[str]:
         path = Path(current_path)
@@ -130,20 +211,99 @@ class FileService:
             return None
     
     def get_directory_size(self, directory_path: str) -> int:
-        total_size = 0
+        path = Path(directory_path)
+        if not self._is_path_allowed(path):
+            return 0
+        if file_watcher_service.is_running:
+            return file_watcher_service.cache.get_or_compute_aggregate(
+                str(path), "size", lambda: self._compute_directory_size(path)
+            )
+        return self._compute_directory_size(path)
+    
+    def _compute_directory_size(self, path: Path) -> int:
         try:
-            path = Path(directory_path)
-            if not self._is_path_allowed(path):
-                return 0
-            for item in path.rglob('*'):
-                if item.is_file():
-                    total_size += item.stat().st_size
+            return directory_size_service.get_size(str(path))
         except Exception:
-            pass
-        return total_size
+            return 0
+    
+    def iter_directory_size(self, directory_path: str) -> Iterator[dict]:
+        """Taille d'un dossier avec résultats partiels (gros arbres)"""
+        path = Path(directory_path)
+        if not self._is_path_allowed(path):
+            yield {"path": directory_path, "size": 0, "files": 0, "directories": 0, "done": True}
+            return
+        yield from directory_size_service.iter_directory_size(str(path))
+    
+    def get_folder_summary(self, directory_path: str) -> Optional[dict]:
+        """Analyse complète d'un dossier en un seul parcours
+        
+        Regroupe premier fichier vidéo, nombre de vidéos, taille totale,
+        répartition par extension et liste des épisodes. Les dossiers inchangés
+        sont lus depuis le cache du service de tailles (un stat par dossier);
+        avec la surveillance active, le résultat lui-même est mis en cache.
+        """
+        path = Path(directory_path)
+        if not self._is_path_allowed(path):
+            return None
+        if not path.is_dir():
+            return None
+        if file_watcher_service.is_running:
+            return file_watcher_service.cache.get_or_compute_aggregate(
+                str(path), "summary", lambda: self._compute_folder_summary(path)
+            )
+        return self._compute_folder_summary(path)
+    
+    def _compute_folder_summary(self, path: Path) -> dict:
+        total_size = 0
+        file_count = 0
+        extensions = {}
+        videos = []
+        for directory, node in directory_size_service.iter_nodes(str(path)):
+            total_size += node.files_size
+            file_count += node.file_count
+            for extension, (count, size) in node.extensions.items():
+                stats = extensions.setdefault(extension, {"count": 0, "size": 0})
+                stats["count"] += count
+                stats["size"] += size
+            for name, size in node.videos:
+                videos.append((name, size, os.path.join(directory, name)))
+        
+        # Trier par nom pour avoir le premier épisode (même ordre que get_first_video_file)
+        videos.sort(key=lambda v: v[0].lower())
+        episodes = []
+        for name, size, video_path in videos:
+            episode_info = naming_service.detect_episode_info(name)
+            episodes.append({
+                "path": video_path,
+                "name": name,
+                "is_dir": False,
+                "size": size,
+                "extension": self._extension(name),
+                "season": episode_info["season"],
+                "episode": episode_info["episode"]
+            })
+        
+        first_video = None
+        if episodes:
+            first_video = {k: episodes[0][k] for k in ("path", "name", "is_dir", "size", "extension")}
+        
+        return {
+            "path": str(path),
+            "first_video": first_video,
+            "video_count": len(videos),
+            "total_size": total_size,
+            "file_count": file_count,
+            "extensions": extensions,
+            "episodes": episodes
+        }
     
     def get_first_video_file(self, directory_path: str) -> Optional[dict]:
-        """Trouve le premier fichier vidéo dans un dossier (récursif)"""
+        """Trouve le premier fichier vidéo dans un dossier (récursif)
+        
+        Minimum glissant par nom pendant le parcours: aucune liste de vidéos
+        n'est construite ni triée, et les dossiers inchangés sont lus depuis
+        le cache du service de tailles.
+        """
         try:
             path = Path(directory_path)
             if not self._is_path_allowed(path):
@@ -151,27 +311,23 @@ class FileService:
             if not path.exists() or not path.is_dir():
                 return None
             
-            video_extensions = self.MEDIA_EXTENSIONS['video']
-            
-            # Chercher les fichiers vidéo, triés par nom
-            video_files = []
-            for item in path.rglob('*'):
-                if item.is_file() and item.suffix.lower() in video_extensions:
-                    video_files.append(item)
+            best = None
+            for directory, node in directory_size_service.iter_nodes(str(path)):
+                for name, size in node.videos:
+                    key = name.lower()
+                    if best is None or key < best[0]:
+                        best = (key, name, size, directory)
             
-            if not video_files:
+            if best is None:
                 return None
             
-            # Trier par nom pour avoir le premier épisode
-            video_files.sort(key=lambda x: x.name.lower())
-            first_video = video_files[0]
-            
+            _, name, size, directory = best
             return {
-                "path": str(first_video),
-                "name": first_video.name,
+                "path": os.path.join(directory, name),
+                "name": name,
                 "is_dir": False,
-                "size": first_video.stat().st_size,
-                "extension": first_video.suffix.lower()
+                "size": size,
+                "extension": self._extension(name)
             }
         except Exception as e:
             logger.error("Erreur recherche vidéo: %s", e)
@@ -179,10 +335,17 @@ class FileService:
     
     def count_video_files(self, directory_path: str) -> int:
         """Compte le nombre de fichiers vidéo dans un dossier"""
+        path = Path(directory_path)
+        if not self._is_path_allowed(path):
+            return 0
+        if file_watcher_service.is_running:
+            return file_watcher_service.cache.get_or_compute_aggregate(
+                str(path), "video_count", lambda: self._count_video_files(path)
+            )
+        return self._count_video_files(path)
+    
+    def _count_video_files(self, path: Path) -> int:
         try:
-            path = Path(directory_path)
-            if not self._is_path_allowed(path):
-                return 0
             if not path.exists() or not path.is_dir():
                 return 0
             
@@ -190,6 +353,7 @@ class FileService:
             count = 0
             
             for item in path.rglob('*'):
+                check_cancelled()
                 if item.is_file() and item.suffix.lower() in video_extensions:
                     count += 1
             
@@ -214,49 +378,28 @@ class FileService:
             if not path.exists() or not path.is_dir():
                 return []
             
-            query_lower = query.lower()
-            results = []
-            
-            for item in path.rglob('*'):
-                if len(results) >= max_results:
-                    break
-                
+            if settings.file_index_enabled and file_index_service.covers(str(path)):
                 try:
-                    if item.name.startswith('.'):
-                        continue
-                    
-                    # Vérifier si le nom contient la requête
-                    if query_lower not in item.name.lower():
-                        continue
-                    
-                    is_dir = item.is_dir()
-                    extension = item.suffix.lower() if not is_dir else ""
-                    
-                    # Filtrer par type si spécifié
-                    if filter_type and not is_dir:
-                        allowed_extensions = self.MEDIA_EXTENSIONS.get(filter_type, [])
-                        if allowed_extensions and extension not in allowed_extensions:
-                            continue
-                    
-                    size = 0
-                    if not is_dir:
-                        try:
-                            size = item.stat().st_size
-                        except Exception:
-                            pass
-                    
-                    results.append({
-                        "path": str(item),
-                        "name": item.name,
-                        "is_dir": is_dir,
-                        "size": size,
-                        "extension": extension
-                    })
-                except PermissionError:
-                    continue
-                except Exception:
-                    continue
+                    return file_index_service.search(
+                        str(path), query,
+                        extensions=self.MEDIA_EXTENSIONS.get(filter_type, []) if filter_type else None,
+                        max_results=max_results
+                    )
+                except Exception as e:
+                    logger.warning("Index fichiers indisponible, parcours disque: %s", e)
             
+            return self._walk_search(path, query, filter_type, max_results)
+        except Exception as e:
+            logger.error("Erreur recherche: %s", e)
+            return []
+    
+    def _walk_search(self, path: Path, query: str,
+                     filter_type: Optional[str], max_results: int) -> List[dict]:
+        """Recherche par parcours disque complet (repli sans index)"""
+        try:
+            results = list(itertools.islice(
+                self._iter_walk_search(path, query, filter_type), max_results
+            ))
             # Trier: dossiers d'abord, puis par nom
             results.sort(key=lambda x: (not x["is_dir"], x["name"].lower()))
             return results
@@ -264,6 +407,66 @@ class FileService:
             logger.error("Erreur recherche: %s", e)
             return []
     
+    def _iter_walk_search(self, path: Path, query: str,
+                          filter_type: Optional[str]) -> Iterator[dict]:
+        """Parcours os.scandir produisant les correspondances au fil de l'eau"""
+        query_lower = query.lower()
+        allowed_extensions = self.MEDIA_EXTENSIONS.get(filter_type, []) if filter_type else []
+        stack = [str(path)]
+        while stack:
+            check_cancelled()
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    if is_dir and not entry.is_symlink():
+                        stack.append(entry.path)
+                except OSError:
+                    continue
+                
+                name = entry.name
+                if name.startswith('.') or query_lower not in name.lower():
+                    continue
+                
+                extension = "" if is_dir else self._extension(name)
+                if allowed_extensions and not is_dir and extension not in allowed_extensions:
+                    continue
+                
+                yield self._entry_to_item(entry, is_dir)
+    
+    def iter_search_files(self, base_path: str, query: str,
+                          filter_type: Optional[str] = None) -> Iterator[dict]:
+        """Variante de search_files produisant les résultats dès qu'ils sont trouvés
+        
+        Avec l'index, les résultats sont triés (dossiers d'abord, puis nom);
+        en parcours disque, ils arrivent dans l'ordre de découverte.
+        """
+        path = Path(base_path)
+        if not self._is_path_allowed(path) or not path.is_dir():
+            return
+        
+        if settings.file_index_enabled and file_index_service.covers(str(path)):
+            yielded = 0
+            try:
+                for item in file_index_service.iter_search(
+                    str(path), query,
+                    extensions=self.MEDIA_EXTENSIONS.get(filter_type, []) if filter_type else None
+                ):
+                    yielded += 1
+                    yield item
+                return
+            except Exception as e:
+                logger.warning("Index fichiers indisponible, parcours disque: %s", e)
+                if yielded:
+                    return
+        
+        yield from self._iter_walk_search(path, query, filter_type)
+    
     def create_hardlink(self, source_path: str, destination_path: str) -> Tuple[bool, str]:
         """Crée un hardlink entre la source et la destination
         
@@ -274,17 +477,38 @@ class FileService:
         Returns:
             Tuple (success, message)
         """
+        success, message, _ = self.create_hardlink_detailed(source_path, destination_path)
+        return success, message
+    
+    def create_hardlink_detailed(self, source_path: str, destination_path: str,
+                                 progress: Optional[ProgressCallback] = None,
+                                 copy_sink: Optional[CopySinkFactory] = None,
+                                 journal: Optional[HardlinkJournal] = None
+                                 ) -> Tuple[bool, str, Optional[HardlinkReport]]:
+        """Comme create_hardlink, avec le rapport détaillé pour un dossier
+        
+        Args:
+            progress: Appelé avec (fichiers traités, total, octets traités, total)
+            copy_sink: Sinks des fichiers copiés faute de hardlink
+            journal: Journal déjà réservé pour ce dossier (ouvert ici sinon)
+            
+        Returns:
+            Tuple (success, message, rapport par fichier ou None pour un fichier seul)
+            
+        Raises:
+            HardlinkJournalBusy: la même opération de dossier est déjà en cours
+        """
         try:
             source = Path(source_path)
             destination = Path(destination_path)
             
             # Vérifier que la source existe
             if not source.exists():
-                return False, f"La source n'existe pas: {source_path}"
+                return False, f"La source n'existe pas: {source_path}", None
             
             # Vérifier que la source est autorisée (dans media_root)
             if not self._is_path_allowed(source):
-                return False, "Accès refusé: la source n'est pas dans le répertoire média"
+                return False, "Accès refusé: la source n'est pas dans le répertoire média", None
             
             # Vérifier que la destination est dans un répertoire autorisé (hardlink_path ou media_root)
             from app.config import user_settings
@@ -293,18 +517,18 @@ class FileService:
                 try:
                     destination.resolve().relative_to(Path(hardlink_path).resolve())
                 except ValueError:
-                    return False, "Accès refusé: la destination n'est pas dans le répertoire de hardlinks configuré"
+                    return False, "Accès refusé: la destination n'est pas dans le répertoire de hardlinks configuré", None
             else:
                 # Si aucun hardlink_path configuré, autoriser uniquement dans media_root
                 if not self._is_path_allowed(destination):
-                    return False, "Accès refusé: la destination n'est pas dans le répertoire média. Configurez un dossier de hardlinks dans les paramètres."
+                    return False, "Accès refusé: la destination n'est pas dans le répertoire média. Configurez un dossier de hardlinks dans les paramètres.", None
             
             # Créer le dossier parent de destination s'il n'existe pas
             destination_parent = destination.parent
             try:
                 destination_parent.mkdir(parents=True, exist_ok=True)
             except Exception as e:
-                return False, f"Impossible de créer le dossier destination: {str(e)}"
+                return False, f"Impossible de créer le dossier destination: {str(e)}", None
             
             # Vérifier si la destination existe déjà
             if destination.exists():
@@ -313,7 +537,7 @@ class FileService:
                     try:
                         if destination.stat().st_ino == source.stat().st_ino:
                             # Même inode = même fichier (déjà hardlinké)
-                            return True, f"Hardlink déjà existant: {destination_path}"
+                            return True, f"Hardlink déjà existant: {destination_path}", None
                     except Exception:
                         pass
                 # Pour les dossiers, on vérifie si le dossier existe et on traite les fichiers
@@ -321,78 +545,84 @@ class FileService:
                     # Continuer pour traiter les fichiers manquants dans le dossier
                     pass
                 else:
-                    return False, f"La destination existe déjà: {destination_path}"
+                    return False, f"La destination existe déjà: {destination_path}", None
             
             # Créer le hardlink
             if source.is_file():
-                # Hardlink pour un fichier
-                try:
-                    os.link(source, destination)
-                    return True, f"Hardlink créé: {destination_path}"
-                except OSError as e:
-                    if e.errno == 18:  # EXDEV - Cross-device link
-                        return False, "Impossible de créer le hardlink: la source et la destination doivent être sur le même système de fichiers"
-                    elif e.errno == 1:  # EPERM - Operation not permitted
-                        return False, f"Impossible de créer le hardlink: {str(e)}"
-                    else:
-                        return False, f"Erreur lors de la création du hardlink: {str(e)}"
+                # Hardlink pour un fichier, copie si impossible (autre système de fichiers...)
+                if progress is not None:
+                    size = source.stat().st_size
+                    progress(0, 1, 0, size)
+                    copy_sink = counting_copy_sink(lambda done: progress(0, 1, done, size), copy_sink)
+                result = hardlink_engine.link_file(str(source), str(destination), copy_sink)
+                if progress is not None:
+                    progress(1, 1, size, size)
+                if result.status == "linked":
+                    return True, f"Hardlink créé: {destination_path}", None
+                if result.status == "copied":
+                    return True, f"Hardlink impossible ({result.error}), fichier copié ({result.strategy}): {destination_path}", None
+                if result.status == "existing":
+                    return True, f"Hardlink déjà existant: {destination_path}", None
+                if result.status == "skipped":
+                    return False, f"La destination existe déjà: {destination_path}", None
+                return False, f"Erreur lors de la création du hardlink: {result.error}", None
             elif source.is_dir():
-                # Pour les dossiers, on crée un dossier et on hardlink chaque fichier
+                # Pour les dossiers: plan de l'arborescence puis liens en parallèle.
+                # Le journal permet de reprendre (ou d'annuler) une opération interrompue.
+                if journal is None:
+                    journal = hardlink_journal_service.open(str(source), str(destination))
                 try:
-                    destination.mkdir(parents=True, exist_ok=True)
-                    linked_count = 0
-                    skipped_count = 0
-                    error_count = 0
-                    
-                    for item in source.rglob('*'):
-                        if item.is_file():
-                            rel_path = item.relative_to(source)
-                            dest_file = destination / rel_path
-                            dest_file.parent.mkdir(parents=True, exist_ok=True)
-                            
-                            # Vérifier si le fichier existe déjà
-                            if dest_file.exists():
-                                try:
-                                    if dest_file.stat().st_ino == item.stat().st_ino:
-                                        # Même inode = déjà hardlinké
-                                        skipped_count += 1
-                                        continue
-                                    else:
-                                        # Fichier différent, on skip avec un warning
-                                        skipped_count += 1
-                                        continue
-                                except Exception:
-                                    skipped_count += 1
-                                    continue
-                            
-                            try:
-                                    os.link(item, dest_file)
-                                    linked_count += 1
-                            except OSError:
-                                # Si le hardlink échoue, on copie
-                                try:
-                                    shutil.copy2(item, dest_file)
-                                    error_count += 1
-                                except Exception:
-                                    error_count += 1
-                    
-                    messages = []
-                    if linked_count > 0:
-                        messages.append(f"{linked_count} hardlinks créés")
-                    if skipped_count > 0:
-                        messages.append(f"{skipped_count} fichiers déjà existants ignorés")
-                    if error_count > 0:
-                        messages.append(f"{error_count} copies (erreur de hardlink)")
-                    
-                    return True, f"Dossier traité: {', '.join(messages)}"
-                        
+                    report = hardlink_engine.link_tree(
+                        str(source), str(destination), progress, journal, copy_sink
+                    )
+                    journal.discard()
+                    return True, hardlink_engine.summarize(report), report
                 except Exception as e:
-                    return False, f"Erreur lors de la création des hardlinks: {str(e)}"
+                    return False, f"Erreur lors de la création des hardlinks: {str(e)}", None
+                finally:
+                    journal.close()
             
-            return False, "Type de source non supporté"
+            return False, "Type de source non supporté", None
             
+        except HardlinkJournalBusy:
+            raise
         except Exception as e:
-            return False, f"Erreur inattendue: {str(e)}"
+            return False, f"Erreur inattendue: {str(e)}", None
+
+    def start_hardlink_job(self, source_path: str, destination_path: str) -> Job:
+        """Lance create_hardlink en tâche de fond (survit à la déconnexion du client)
+        
+        Le résultat du job reprend la réponse de /files/create-hardlink.
+        Pour un dossier, le journal est réservé avant la création du job: deux
+        demandes simultanées ne peuvent pas lancer deux jobs concurrents.
+        
+        Raises:
+            HardlinkJournalBusy: la même opération de dossier est déjà en cours
+        """
+        journal = None
+        if Path(source_path).is_dir():
+            journal = hardlink_journal_service.open(source_path, destination_path)
+        
+        def run(job: Job) -> dict:
+            success, message, report = self.create_hardlink_detailed(
+                source_path, destination_path, progress=job.update, journal=journal
+            )
+            job.message = message
+            if not success:
+                raise RuntimeError(message)
+            return {
+                "success": success,
+                "message": message,
+                "report": report.model_dump() if report is not None else None
+            }
+        
+        try:
+            return job_service.submit("hardlink", run, description=f"{source_path} -> {destination_path}",
+                                      on_finished=journal.close if journal is not None else None)
+        except BaseException:
+            if journal is not None:
+                journal.close()
+            raise
 
 
 file_service = FileService()
@@ -0,0 +1,462 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _is_within(path: str, parent: str) -> bool:
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def _ancestors(path: str) -> Iterable[str]:
+    """path puis tous ses parents jusqu'à la racine du système de fichiers"""
+    current = Path(path)
+    yield str(current)
+    for parent in current.parents:
+        yield str(parent)
+
+
+class DirectoryCache:
+    """Cache mémoire des listings et agrégats par dossier
+
+    Les listings dépendent uniquement des entrées directes d'un dossier; les
+    agrégats (taille, nombre de vidéos...) dépendent de tout le sous-arbre et
+    sont donc invalidés pour le dossier modifié et tous ses ancêtres.
+
+    Un compteur de génération évite de stocker un résultat calculé pendant
+    qu'une invalidation avait lieu.
+
+    Un sous-arbre qui n'a pas pu être surveillé (max_user_watches atteint)
+    n'est jamais mis en cache: aucun événement ne l'invaliderait. Ses
+    listings, et les agrégats de ses ancêtres, sont recalculés à chaque
+    appel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listings: Dict[Tuple[str, Any], Any] = {}
+        self._aggregates: Dict[Tuple[str, str], Any] = {}
+        self._unwatched: Set[str] = set()
+        self._generation = 0
+
+    def get_or_compute_listing(self, path: str, key: Any, compute: Callable[[], Any]) -> Any:
+        return self._get_or_compute(self._listings, (path, key), compute, self._listing_cacheable)
+
+    def get_or_compute_aggregate(self, path: str, kind: str, compute: Callable[[], Any]) -> Any:
+        return self._get_or_compute(self._aggregates, (path, kind), compute, self._aggregate_cacheable)
+
+    def _listing_cacheable(self, path: str) -> bool:
+        return not any(_is_within(path, unwatched) for unwatched in self._unwatched)
+
+    def _aggregate_cacheable(self, path: str) -> bool:
+        return not any(_is_within(path, unwatched) or _is_within(unwatched, path)
+                       for unwatched in self._unwatched)
+
+    def _get_or_compute(self, store: dict, key: tuple, compute: Callable[[], Any],
+                        cacheable: Callable[[str], bool]) -> Any:
+        with self._lock:
+            if key in store:
+                return store[key]
+            if not cacheable(key[0]):
+                return compute()
+            generation = self._generation
+        value = compute()
+        with self._lock:
+            if generation == self._generation:
+                store[key] = value
+        return value
+
+    def mark_unwatched(self, directory: str):
+        """Sous-arbre sans surveillance: plus de cache pour lui ni ses ancêtres"""
+        directory = str(Path(directory))
+        with self._lock:
+            self._unwatched.add(directory)
+        self.invalidate(directory, subtree=True)
+
+    def invalidate(self, directory: str, subtree: bool = False):
+        """Invalide le listing de directory et les agrégats de ses ancêtres
+
+        Avec subtree=True (dossier supprimé/renommé), toutes les entrées sous
+        directory sont aussi supprimées.
+        """
+        directory = str(Path(directory))
+        ancestors = set(_ancestors(directory))
+        with self._lock:
+            self._generation += 1
+            for key in list(self._listings):
+                path = key[0]
+                if path == directory or (subtree and _is_within(path, directory)):
+                    del self._listings[key]
+            for key in list(self._aggregates):
+                path = key[0]
+                if path in ancestors or (subtree and _is_within(path, directory)):
+                    del self._aggregates[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._listings.clear()
+            self._aggregates.clear()
+
+    def reset(self):
+        """Vide le cache et oublie les sous-arbres non surveillés (nouvelle surveillance)"""
+        with self._lock:
+            self._unwatched.clear()
+        self.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"listings": len(self._listings), "aggregates": len(self._aggregates),
+                    "unwatched": len(self._unwatched)}
+
+
+class InotifyBackend:
+    """Surveillance récursive via inotify (Linux uniquement, sans dépendance)"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    name = "inotify"
+
+    def __init__(self, on_change: Callable[[str, bool], None], on_overflow: Callable[[], None],
+                 on_unwatched: Optional[Callable[[str], None]] = None):
+        self._on_change = on_change
+        self._on_overflow = on_overflow
+        self._on_unwatched = on_unwatched
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches: Dict[int, str] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            return hasattr(ctypes.CDLL(libc_name), "inotify_init1")
+        except OSError:
+            return False
+
+    def _add_watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch({directory}): {os.strerror(errno)}")
+        self._watches[wd] = directory
+
+    def add_tree(self, root: str):
+        """Ajoute une surveillance sur root et tous ses sous-dossiers
+
+        Lève OSError (ENOSPC) si fs.inotify.max_user_watches est atteint.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                self._add_watch(directory)
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except FileNotFoundError:
+                continue
+            except PermissionError:
+                continue
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 1.0)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes):
+        offset = 0
+        header_size = self.EVENT_HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + header_size:offset + header_size + length]
+            offset += header_size + length
+            name = os.fsdecode(raw_name.rstrip(b"\0")) if length else ""
+
+            if mask & self.IN_Q_OVERFLOW:
+                self._on_overflow()
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                self._on_change(directory, True)
+                continue
+
+            is_dir = bool(mask & self.IN_ISDIR)
+            self._on_change(directory, False)
+            if is_dir and name:
+                child = os.path.join(directory, name)
+                self._on_change(child, True)
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    try:
+                        self.add_tree(child)
+                    except OSError as e:
+                        logger.warning("Surveillance impossible de %s (plus de cache pour ce dossier): %s",
+                                       child, e)
+                        if self._on_unwatched is not None:
+                            self._on_unwatched(child)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+
+class PollingBackend:
+    """Repli portable: compare périodiquement le mtime de chaque dossier"""
+
+    name = "polling"
+
+    def __init__(self, on_change: Callable[[str, bool], None], interval: float):
+        self._on_change = on_change
+        self._interval = interval
+        self._roots: List[str] = []
+        self._mtimes: Dict[str, int] = {}
+        self._children: Dict[str, List[str]] = {}
+
+    def add_tree(self, root: str):
+        self._roots.append(root)
+        self._poll_tree(root, notify=False)
+
+    def _list_subdirs(self, directory: str) -> List[str]:
+        subdirs = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+        return subdirs
+
+    def _forget(self, directory: str):
+        for child in self._children.pop(directory, []):
+            self._forget(child)
+        self._mtimes.pop(directory, None)
+
+    def _poll_tree(self, root: str, notify: bool = True):
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                if directory in self._mtimes:
+                    self._forget(directory)
+                    if notify:
+                        self._on_change(directory, True)
+                continue
+
+            if self._mtimes.get(directory) != mtime_ns:
+                try:
+                    subdirs = self._list_subdirs(directory)
+                except OSError:
+                    continue
+                for removed in set(self._children.get(directory, [])) - set(subdirs):
+                    self._forget(removed)
+                    if notify:
+                        self._on_change(removed, True)
+                if notify and directory in self._mtimes:
+                    self._on_change(directory, False)
+                self._mtimes[directory] = mtime_ns
+                self._children[directory] = subdirs
+            stack.extend(self._children.get(directory, []))
+
+    def run(self, stop: threading.Event):
+        while not stop.wait(self._interval):
+            for root in self._roots:
+                self._poll_tree(root)
+
+    def close(self):
+        self._mtimes.clear()
+        self._children.clear()
+
+
+class FileWatcherService:
+    """Surveille media_root et le dossier de hardlinks pour invalider les caches
+
+    Les événements sont regroupés (debounce) puis appliqués au DirectoryCache
+    et, si activé, à l'index SQLite des fichiers.
+    """
+
+    DEBOUNCE_SECONDS = 1.0
+
+    def __init__(self):
+        self.cache = DirectoryCache()
+        self._backend = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[str, bool] = {}
+        self._overflow = False
+        self._roots: List[str] = []
+
+    @property
+    def is_running(self) -> bool:
+        return self._backend is not None and not self._stop.is_set()
+
+    @property
+    def backend_name(self) -> Optional[str]:
+        return self._backend.name if self._backend is not None else None
+
+    def _get_roots(self) -> List[str]:
+        from app.config import user_settings
+        candidates = [str(settings.media_root)]
+        hardlink_path = user_settings.get().get("paths", {}).get("hardlink_path", "")
+        if hardlink_path:
+            candidates.append(str(Path(hardlink_path)))
+        roots: List[str] = []
+        for candidate in sorted(c for c in candidates if os.path.isdir(c)):
+            if not any(_is_within(candidate, root) for root in roots):
+                roots.append(candidate)
+        return roots
+
+    def _on_change(self, directory: str, subtree: bool):
+        with self._pending_lock:
+            self._pending[directory] = self._pending.get(directory, False) or subtree
+
+    def _on_overflow(self):
+        with self._pending_lock:
+            self._overflow = True
+
+    def _create_backend(self, backend: str):
+        if backend in ("auto", "inotify") and InotifyBackend.is_supported():
+            inotify = InotifyBackend(self._on_change, self._on_overflow, self.cache.mark_unwatched)
+            try:
+                for root in self._roots:
+                    inotify.add_tree(root)
+                return inotify
+            except OSError as e:
+                inotify.close()
+                logger.warning("inotify indisponible (%s), repli sur le polling", e)
+        elif backend == "inotify":
+            logger.warning("inotify non supporté sur cette plateforme, repli sur le polling")
+        polling = PollingBackend(self._on_change, float(settings.file_watcher_poll_interval))
+        for root in self._roots:
+            polling.add_tree(root)
+        return polling
+
+    def start(self, backend: Optional[str] = None, roots: Optional[List[str]] = None) -> bool:
+        if self.is_running:
+            return False
+        self._roots = roots if roots is not None else self._get_roots()
+        if not self._roots:
+            logger.warning("Surveillance des fichiers: aucun dossier à surveiller")
+            return False
+        self._stop.clear()
+        self.cache.reset()
+        self._backend = self._create_backend(backend or settings.file_watcher_backend)
+        self._threads = [
+            threading.Thread(target=self._backend.run, args=(self._stop,),
+                             name="file-watcher", daemon=True),
+            threading.Thread(target=self._flush_loop, name="file-watcher-flush", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Surveillance des fichiers (%s): %s", self._backend.name, ", ".join(self._roots))
+        return True
+
+    def start_in_background(self):
+        """Démarre la surveillance sans bloquer (l'ajout des watches peut être long)"""
+        threading.Thread(target=self.start, name="file-watcher-start", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        self.cache.reset()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.DEBOUNCE_SECONDS):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Erreur application des changements fichiers: %s", e)
+
+    def flush(self):
+        """Applique les changements accumulés aux caches et à l'index"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            overflow, self._overflow = self._overflow, False
+
+        from app.services.directory_size_service import directory_size_service
+        from app.services.file_index_service import file_index_service
+
+        if overflow:
+            logger.warning("File d'événements inotify saturée, invalidation complète")
+            self.cache.clear()
+            directory_size_service.invalidate()
+            if settings.file_index_enabled:
+                file_index_service.refresh()
+            return
+        if not pending:
+            return
+
+        for directory, subtree in pending.items():
+            self.cache.invalidate(directory, subtree=subtree)
+            # Un fichier réécrit sur place ne change pas le mtime du dossier
+            directory_size_service.invalidate(directory)
+
+        if settings.file_index_enabled:
+            dirty: Set[str] = set()
+            for directory in sorted(pending):
+                # Rafraîchir le parent pour prendre en compte ajout/suppression du dossier lui-même
+                target = str(Path(directory).parent) if pending[directory] else directory
+                if not any(_is_within(target, d) for d in dirty) and file_index_service.covers(target):
+                    dirty = {d for d in dirty if not _is_within(d, target)}
+                    dirty.add(target)
+            for directory in dirty:
+                file_index_service.refresh(directory)
+
+    def status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "backend": self.backend_name,
+            "roots": self._roots,
+            **self.cache.stats()
+        }
+
+
+file_watcher_service = FileWatcherService()
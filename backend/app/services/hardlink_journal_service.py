@@ -0,0 +1,327 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HardlinkJournalBusy(Exception):
+    """L'opération de ce journal est déjà en cours (ou en cours d'annulation)"""
+
+
+class HardlinkJournal:
+    """Journal d'une opération de hardlink/copie de dossier (JSON lines, ajout seul)
+
+    Chaque ligne est écrite et vidée vers le système avant de passer à la
+    suite. begin, copy et rollback sont aussi synchronisés sur disque
+    (fsync) aussitôt; les autres lignes le sont par groupes (SYNC_EVERY
+    lignes ou SYNC_INTERVAL secondes) et à la fermeture. Perdre un done non
+    synchronisé est sans risque: à la reprise, le fichier déjà lié est
+    retrouvé (même inode) et compté existing. Après un arrêt brutal, une
+    ligne tronquée ou incomplète arrête la relecture.
+
+    Lignes: begin (source, destination, volume prévu), mkdir (dossier créé
+    par l'opération), copy (copie commencée), done (fichier traité et son
+    statut), rollback puis removed (annulation en cours).
+    """
+
+    # Statuts pour lesquels la destination a été créée par cette opération
+    CREATED_STATUSES = {"linked", "copied"}
+    SYNC_EVERY = 256
+    SYNC_INTERVAL = 0.5
+
+    def __init__(self, path: Path, source: str, destination: str,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.path = path
+        self.source = source
+        self.destination = destination
+        self.created_at = time.time()
+        self.planned_files = 0
+        self.planned_bytes = 0
+        self.directories: List[str] = []
+        self.done: Dict[str, str] = {}
+        self.copying: Set[str] = set()
+        self.removed: Set[str] = set()
+        self.rolling_back = False
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        # Libère la réservation du journal dans le service (une fois, à close())
+        self.on_close = on_close
+
+    @property
+    def id(self) -> str:
+        return self.path.stem
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.done)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["HardlinkJournal"]:
+        journal = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        op = entry.get("op")
+                        if op == "begin":
+                            journal = cls(path, entry["source"], entry["destination"])
+                            journal.created_at = entry.get("time", journal.created_at)
+                            journal.planned_files = entry.get("files", 0)
+                            journal.planned_bytes = entry.get("bytes", 0)
+                        elif journal is None:
+                            break
+                        elif op == "mkdir":
+                            journal.directories.append(entry["path"])
+                        elif op == "copy":
+                            journal.copying.add(entry["path"])
+                        elif op == "done":
+                            journal.done[entry["path"]] = entry["status"]
+                        elif op == "rollback":
+                            journal.rolling_back = True
+                        elif op == "removed":
+                            journal.removed.add(entry["path"])
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        break  # Ligne tronquée ou incomplète (arrêt brutal)
+        except OSError as e:
+            logger.warning("Journal illisible %s: %s", path, e)
+            return None
+        return journal
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def _write(self, entry: dict, sync: bool = False):
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self.SYNC_EVERY \
+                    or time.monotonic() - self._synced_at >= self.SYNC_INTERVAL:
+                self._sync()
+
+    def begin(self, planned_files: int, planned_bytes: int):
+        """Enregistre le plan; sans effet si le journal reprend une opération"""
+        if self.path.exists():
+            return
+        self.planned_files = planned_files
+        self.planned_bytes = planned_bytes
+        self._write({"op": "begin", "source": self.source, "destination": self.destination,
+                     "files": planned_files, "bytes": planned_bytes, "time": self.created_at},
+                    sync=True)
+
+    def record_directory(self, directory: str):
+        self.directories.append(directory)
+        self._write({"op": "mkdir", "path": directory})
+
+    def record_copy(self, destination: str):
+        """Copie commencée: si elle n'aboutit pas, le fichier partiel est à nous"""
+        with self._lock:
+            self.copying.add(destination)
+        # Synchronisé avant la copie: un fichier partiel non journalisé passerait pour existant
+        self._write({"op": "copy", "path": destination}, sync=True)
+
+    def partial_copies(self) -> Set[str]:
+        return {path for path in self.copying if path not in self.done}
+
+    def record_file(self, destination: str, status: str):
+        self.done[destination] = status
+        self._write({"op": "done", "path": destination, "status": status})
+
+    def is_done(self, destination: str) -> bool:
+        """Fichier déjà traité lors d'une exécution précédente (sauf erreur)"""
+        return self.done.get(destination, "error") != "error"
+
+    def rollback(self) -> dict:
+        """Supprime ce que l'opération a créé: fichiers liés/copiés puis dossiers vides
+
+        Le rollback est lui-même journalisé: interrompu, il reprend là où il
+        s'était arrêté. Les fichiers qui existaient avant l'opération
+        (existing, skipped) ne sont jamais touchés.
+        """
+        if not self.rolling_back:
+            self.rolling_back = True
+            self._write({"op": "rollback", "time": time.time()}, sync=True)
+
+        created = [d for d, status in self.done.items() if status in self.CREATED_STATUSES]
+        files_removed = 0
+        for destination in created + sorted(self.partial_copies()):
+            if destination in self.removed:
+                continue
+            try:
+                os.unlink(destination)
+                files_removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Rollback: impossible de supprimer %s: %s", destination, e)
+                continue
+            self.removed.add(destination)
+            self._write({"op": "removed", "path": destination})
+
+        directories_removed = 0
+        for directory in sorted(self.directories, key=lambda d: d.count(os.sep), reverse=True):
+            try:
+                os.rmdir(directory)
+                directories_removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Dossier non vide: contient des fichiers qui ne sont pas à nous
+                continue
+
+        self.discard()
+        return {"files_removed": files_removed, "directories_removed": directories_removed}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                if self._unsynced:
+                    self._sync()
+                self._file.close()
+                self._file = None
+            on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            on_close()
+
+    def discard(self):
+        """Opération terminée (ou annulée): le journal n'a plus lieu d'être"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "destination": self.destination,
+            "created_at": self.created_at,
+            "planned_files": self.planned_files,
+            "planned_bytes": self.planned_bytes,
+            "files_done": sum(1 for status in self.done.values() if status != "error"),
+            "rolling_back": self.rolling_back,
+        }
+
+
+class HardlinkJournalService:
+    """Journaux des opérations de hardlink interrompues, sous data_path/hardlink_journals
+
+    L'identifiant dépend du couple (source, destination): relancer la même
+    opération reprend son journal. Un journal ouvert (opération ou rollback
+    en cours) est réservé dans ce processus: le rouvrir ou l'annuler lève
+    HardlinkJournalBusy jusqu'à sa fermeture.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self._directory = directory
+        self._active: Set[str] = set()
+        self._active_lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            self._directory = settings.data_path / "hardlink_journals"
+        return self._directory
+
+    @staticmethod
+    def journal_id(source: str, destination: str) -> str:
+        key = f"{Path(source)}\0{Path(destination)}".encode("utf-8", "surrogateescape")
+        return hashlib.sha1(key).hexdigest()
+
+    def _acquire(self, journal_id: str):
+        with self._active_lock:
+            if journal_id in self._active:
+                raise HardlinkJournalBusy("Une opération sur ces dossiers est déjà en cours")
+            self._active.add(journal_id)
+
+    def _release(self, journal_id: str):
+        with self._active_lock:
+            self._active.discard(journal_id)
+
+    def is_active(self, source: str, destination: str) -> bool:
+        with self._active_lock:
+            return self.journal_id(source, destination) in self._active
+
+    def open(self, source: str, destination: str) -> HardlinkJournal:
+        """Reprend le journal existant de cette opération ou en prépare un nouveau
+
+        Le journal reste réservé jusqu'à close() (ou discard()).
+
+        Raises:
+            HardlinkJournalBusy: opération déjà en cours dans ce processus
+        """
+        journal_id = self.journal_id(source, destination)
+        self._acquire(journal_id)
+        try:
+            path = self.directory / f"{journal_id}.jsonl"
+            if path.exists():
+                journal = HardlinkJournal.load(path)
+                if journal is not None and journal.rolling_back:
+                    # Rollback interrompu: on le termine avant de recommencer
+                    journal.rollback()
+                elif journal is not None:
+                    logger.info("Reprise de l'opération %s -> %s (%d fichiers déjà traités)",
+                                source, destination, len(journal.done))
+                    journal.on_close = lambda: self._release(journal_id)
+                    return journal
+                else:
+                    path.unlink()
+        except BaseException:
+            self._release(journal_id)
+            raise
+        return HardlinkJournal(path, str(Path(source)), str(Path(destination)),
+                               on_close=lambda: self._release(journal_id))
+
+    def get(self, journal_id: str) -> Optional[HardlinkJournal]:
+        if not all(c in "0123456789abcdef" for c in journal_id):
+            return None
+        path = self.directory / f"{journal_id}.jsonl"
+        if not path.exists():
+            return None
+        return HardlinkJournal.load(path)
+
+    def list_pending(self) -> List[dict]:
+        """Opérations interrompues, à reprendre ou à annuler"""
+        if not self.directory.exists():
+            return []
+        journals = []
+        for path in sorted(self.directory.glob("*.jsonl")):
+            journal = HardlinkJournal.load(path)
+            if journal is not None:
+                journals.append(journal.to_dict())
+        return journals
+
+    def rollback(self, journal_id: str) -> Optional[dict]:
+        """Annule une opération interrompue
+
+        Raises:
+            HardlinkJournalBusy: l'opération est encore en cours
+        """
+        journal = self.get(journal_id)
+        if journal is None:
+            return None
+        self._acquire(journal_id)
+        try:
+            return journal.rollback()
+        finally:
+            self._release(journal_id)
+
+
+hardlink_journal_service = HardlinkJournalService()
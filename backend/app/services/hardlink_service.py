@@ -0,0 +1,308 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional
+import contextvars
+import logging
+import os
+import time
+
+from app.config import settings
+from app.models.hardlink import HardlinkFileResult, HardlinkReport
+from app.services.hardlink_journal_service import HardlinkJournal
+from app.utils.file_transfer import CopySink, transfer_file
+from app.utils.fs_executor import OperationCancelled, check_cancelled
+
+logger = logging.getLogger(__name__)
+
+# progress(fichiers traités, fichiers au total, octets traités, octets au total)
+ProgressCallback = Callable[[int, int, int, int], None]
+
+# copy_sink(source): sink des octets copiés pour ce fichier, ou None
+CopySinkFactory = Callable[[str], Optional[CopySink]]
+
+
+def counting_copy_sink(on_bytes: Callable[[int], None],
+                       copy_sink: Optional[CopySinkFactory] = None) -> CopySinkFactory:
+    """Sinks qui comptent les octets copiés (progression d'une copie)
+
+    on_bytes reçoit le nombre d'octets copiés depuis le début du fichier;
+    les octets sont aussi passés au sink de copy_sink, s'il y en a un.
+    """
+    def factory(source: str) -> CopySink:
+        sink = copy_sink(source) if copy_sink is not None else None
+        copied = 0
+
+        def count(chunk: bytes):
+            nonlocal copied
+            if sink is not None:
+                sink(chunk)
+            copied += len(chunk)
+            on_bytes(copied)
+
+        return count
+
+    return factory
+
+
+class PlannedLink:
+    """Fichier à lier: chemins source/destination et identité de la source"""
+
+    __slots__ = ("source", "destination", "size", "st_dev", "st_ino")
+
+    def __init__(self, source: str, destination: str, size: int, st_dev: int, st_ino: int):
+        self.source = source
+        self.destination = destination
+        self.size = size
+        self.st_dev = st_dev
+        self.st_ino = st_ino
+
+
+class HardlinkPlan:
+    """Arborescence à créer, calculée en un seul parcours de la source
+
+    directories est trié (parents avant enfants) et dédoublonné: chaque
+    dossier n'est créé qu'une fois, avant de lancer les liens en parallèle.
+    """
+
+    def __init__(self, source: str, destination: str):
+        self.source = source
+        self.destination = destination
+        self.directories: List[str] = []
+        self.links: List[PlannedLink] = []
+
+    @property
+    def bytes_total(self) -> int:
+        return sum(link.size for link in self.links)
+
+
+class HardlinkEngine:
+    """Création de hardlinks pour un dossier: planification puis liens en parallèle
+
+    Sur un système de fichiers réseau, chaque os.link est un aller-retour
+    serveur: les exécuter dans un pool de threads masque cette latence.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self._workers = workers
+
+    @property
+    def workers(self) -> int:
+        return self._workers or settings.hardlink_workers
+
+    def plan(self, source_path: str, destination_path: str) -> HardlinkPlan:
+        source = str(Path(source_path))
+        destination = str(Path(destination_path))
+        plan = HardlinkPlan(source, destination)
+        directories = {destination}
+
+        stack = [(source, destination)]
+        while stack:
+            check_cancelled()
+            src_dir, dst_dir = stack.pop()
+            try:
+                with os.scandir(src_dir) as it:
+                    entries = list(it)
+            except OSError as e:
+                logger.warning("Hardlink: dossier illisible %s: %s", src_dir, e)
+                continue
+            for entry in entries:
+                target = os.path.join(dst_dir, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, target))
+                    elif entry.is_file():
+                        st = entry.stat()
+                        plan.links.append(PlannedLink(entry.path, target, st.st_size, st.st_dev, st.st_ino))
+                        directories.add(dst_dir)
+                except OSError:
+                    continue
+
+        plan.directories = sorted(directories, key=lambda d: (d.count(os.sep), d))
+        plan.links.sort(key=lambda link: link.destination)
+        return plan
+
+    def _make_directories(self, plan: HardlinkPlan, journal: Optional[HardlinkJournal] = None) -> int:
+        created = 0
+        for directory in plan.directories:
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                continue
+            except FileNotFoundError:
+                # Parent hors plan (destination profonde): création récursive
+                os.makedirs(directory, exist_ok=True)
+            created += 1
+            if journal is not None:
+                journal.record_directory(directory)
+        return created
+
+    def _link_one(self, link: PlannedLink, journal: Optional[HardlinkJournal] = None,
+                  copy_sink: Optional[CopySinkFactory] = None) -> HardlinkFileResult:
+        check_cancelled()
+        result = HardlinkFileResult(
+            source=link.source, destination=link.destination, size=link.size, status="linked"
+        )
+        try:
+            os.link(link.source, link.destination)
+            result.strategy = "hardlink"
+            return result
+        except FileExistsError:
+            try:
+                st = os.stat(link.destination)
+                same = (st.st_dev, st.st_ino) == (link.st_dev, link.st_ino)
+            except OSError:
+                same = False
+            # Même inode = déjà hardlinké; fichier différent: on n'écrase pas
+            result.status = "existing" if same else "skipped"
+            return result
+        except OSError as e:
+            link_error = e
+
+        # Si le hardlink échoue (autre disque...), on copie: reflink, puis copie noyau
+        try:
+            if journal is not None:
+                journal.record_copy(link.destination)
+            sink = copy_sink(link.source) if copy_sink is not None else None
+            result.strategy = transfer_file(link.source, link.destination, sink)
+            result.status = "copied"
+            result.error = str(link_error)
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e)
+        return result
+
+    def link_file(self, source_path: str, destination_path: str,
+                  copy_sink: Optional[CopySinkFactory] = None) -> HardlinkFileResult:
+        """Lie un fichier seul, avec le même repli sur une copie qu'un fichier de dossier"""
+        st = os.stat(source_path)
+        link = PlannedLink(str(Path(source_path)), str(Path(destination_path)),
+                           st.st_size, st.st_dev, st.st_ino)
+        return self._link_one(link, copy_sink=copy_sink)
+
+    def execute(self, plan: HardlinkPlan, progress: Optional[ProgressCallback] = None,
+                journal: Optional[HardlinkJournal] = None,
+                copy_sink: Optional[CopySinkFactory] = None) -> HardlinkReport:
+        """Crée l'arborescence puis les liens en parallèle
+
+        progress est appelé depuis le thread appelant, après chaque fichier.
+        En cas d'annulation (check_cancelled), les liens non démarrés sont
+        abandonnés et OperationCancelled est propagée.
+
+        Avec un journal, chaque fichier traité y est consigné. Lors d'une
+        reprise, les fichiers déjà journalisés ne sont ni liés ni comparés
+        (pas de stat), et les copies interrompues sont recommencées.
+
+        copy_sink(source) fournit, pour un fichier qui doit être copié, un
+        sink recevant les octets copiés (voir transfer_file).
+        """
+        started = time.monotonic()
+        report = HardlinkReport()
+        files_total = len(plan.links)
+        bytes_total = plan.bytes_total
+        if progress is not None:
+            progress(0, files_total, 0, bytes_total)
+        if journal is not None:
+            journal.begin(files_total, bytes_total)
+        report.directories_created = self._make_directories(plan, journal)
+
+        results = {}
+        pending = []
+        bytes_done = 0
+        for index, link in enumerate(plan.links):
+            if journal is not None and journal.is_done(link.destination):
+                status = "skipped" if journal.done[link.destination] == "skipped" else "existing"
+                results[index] = HardlinkFileResult(
+                    source=link.source, destination=link.destination, size=link.size, status=status
+                )
+                bytes_done += link.size
+                report.resumed += 1
+            else:
+                pending.append(index)
+
+        if journal is not None:
+            for destination in journal.partial_copies():
+                try:
+                    os.unlink(destination)
+                except OSError:
+                    pass
+        if progress is not None and results:
+            progress(len(results), files_total, bytes_done, bytes_total)
+
+        if pending:
+            workers = max(1, min(self.workers, len(pending)))
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hardlink")
+            try:
+                # Un contexte par tâche: les workers voient le signal d'annulation de l'appelant
+                futures = {
+                    pool.submit(contextvars.copy_context().run, self._link_one,
+                                plan.links[index], journal, copy_sink): index
+                    for index in pending
+                }
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[futures[future]] = result
+                    bytes_done += result.size
+                    if journal is not None:
+                        journal.record_file(result.destination, result.status)
+                    if progress is not None:
+                        progress(len(results), files_total, bytes_done, bytes_total)
+                    check_cancelled()
+            except OperationCancelled:
+                pool.shutdown(wait=True, cancel_futures=True)
+                if journal is not None:
+                    # Liens terminés pendant l'annulation: le rollback doit les connaître
+                    for future, index in futures.items():
+                        if index in results or future.cancelled() or future.exception() is not None:
+                            continue
+                        result = future.result()
+                        journal.record_file(result.destination, result.status)
+                raise
+            finally:
+                pool.shutdown(wait=True)
+        report.files = [results[index] for index in range(files_total)]
+
+        for result in report.files:
+            if result.status == "linked":
+                report.linked += 1
+            elif result.status == "existing":
+                report.existing += 1
+            elif result.status == "skipped":
+                report.skipped += 1
+            elif result.status == "copied":
+                report.copied += 1
+            else:
+                report.errors += 1
+            if result.status in ("linked", "copied"):
+                report.bytes_total += result.size
+                report.strategies[result.strategy] = report.strategies.get(result.strategy, 0) + 1
+
+        report.duration = time.monotonic() - started
+        if report.duration > 0:
+            report.files_per_second = len(report.files) / report.duration
+            report.bytes_per_second = report.bytes_total / report.duration
+        return report
+
+    def link_tree(self, source_path: str, destination_path: str,
+                  progress: Optional[ProgressCallback] = None,
+                  journal: Optional[HardlinkJournal] = None,
+                  copy_sink: Optional[CopySinkFactory] = None) -> HardlinkReport:
+        return self.execute(self.plan(source_path, destination_path), progress, journal, copy_sink)
+
+    @staticmethod
+    def summarize(report: HardlinkReport) -> str:
+        messages = []
+        if report.linked > 0:
+            messages.append(f"{report.linked} hardlinks créés")
+        if report.existing + report.skipped > 0:
+            messages.append(f"{report.existing + report.skipped} fichiers déjà existants ignorés")
+        reflinked = report.strategies.get("reflink", 0)
+        if reflinked > 0:
+            messages.append(f"{reflinked} clones reflink (autre système de fichiers)")
+        if report.copied - reflinked > 0:
+            messages.append(f"{report.copied - reflinked} copies (erreur de hardlink)")
+        if report.errors > 0:
+            messages.append(f"{report.errors} erreurs")
+        return f"Dossier traité: {', '.join(messages)}"
+
+
+hardlink_engine = HardlinkEngine()
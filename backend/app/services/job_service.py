@@ -0,0 +1,217 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from app.config import settings
+from app.utils.fs_executor import OperationCancelled, run_cancellable
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Opération longue exécutée en arrière-plan (hardlink, copie...)
+
+    La progression est mise à jour par la fonction du job via update();
+    le débit et l'ETA sont calculés à la lecture.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, kind: str, description: str = ""):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.status = self.PENDING
+        self.files_done = 0
+        self.files_total = 0
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.message = ""
+        # Compteurs propres au type de job (pièces hachées pour un torrent...)
+        self.details: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        # Exécution dans le pool, renseignée par JobService.submit
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED, self.CANCELLED)
+
+    def update(self, files_done: int, files_total: int, bytes_done: int, bytes_total: int):
+        with self._lock:
+            self.files_done = files_done
+            self.files_total = files_total
+            self.bytes_done = bytes_done
+            self.bytes_total = bytes_total
+
+    def set_details(self, **details):
+        with self._lock:
+            self.details.update(details)
+
+    def cancel(self) -> bool:
+        if self.finished:
+            return False
+        self.cancel_event.set()
+        return True
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            files_done, files_total = self.files_done, self.files_total
+            bytes_done, bytes_total = self.bytes_done, self.bytes_total
+            details = dict(self.details)
+
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        rate = bytes_done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == self.RUNNING and rate > 0 and bytes_total >= bytes_done:
+            eta = (bytes_total - bytes_done) / rate
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "files_done": files_done,
+            "files_total": files_total,
+            "bytes_done": bytes_done,
+            "bytes_total": bytes_total,
+            "progress": bytes_done / bytes_total if bytes_total else (1.0 if self.status == self.COMPLETED else 0.0),
+            "bytes_per_second": rate,
+            "eta": eta,
+            "elapsed": elapsed,
+            "details": details,
+            "message": self.message,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class JobService:
+    """Exécution des jobs dans un pool dédié, indépendant des requêtes HTTP
+
+    Un job survit à la déconnexion du client; il n'est interrompu que par
+    cancel(). Les jobs terminés sont conservés (MAX_FINISHED_JOBS) pour que
+    le client puisse relire le résultat.
+    """
+
+    MAX_FINISHED_JOBS = 50
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers or settings.job_max_workers,
+                    thread_name_prefix="job"
+                )
+            return self._executor
+
+    def submit(self, kind: str, func: Callable[[Job], Any], description: str = "",
+               on_finished: Optional[Callable[[], None]] = None) -> Job:
+        """Lance func(job) en arrière-plan
+
+        func met à jour la progression via job.update(), peut renseigner
+        job.message, et appelle check_cancelled() dans ses boucles. Sa valeur
+        de retour devient job.result.
+
+        on_finished est appelé une fois le job terminé, même s'il a été annulé
+        avant de démarrer (libération d'une ressource réservée par l'appelant).
+        """
+        job = Job(kind, description)
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job.id] = job
+        job.future = self.executor.submit(self._run, job, func, on_finished)
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        """Attend la fin du job sans bloquer la boucle d'événements
+
+        L'annulation de l'attente (client déconnecté) n'annule pas le job.
+        """
+        await asyncio.shield(asyncio.wrap_future(job.future))
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any],
+             on_finished: Optional[Callable[[], None]] = None):
+        try:
+            self._execute(job, func)
+        finally:
+            if on_finished is not None:
+                on_finished()
+
+    def _execute(self, job: Job, func: Callable[[Job], Any]):
+        if job.cancel_event.is_set():
+            job.status = Job.CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = run_cancellable(job.cancel_event, func, job)
+            job.status = Job.COMPLETED
+        except OperationCancelled:
+            job.status = Job.CANCELLED
+            job.message = job.message or "Opération annulée"
+        except Exception as e:
+            logger.exception("Job %s (%s) en échec", job.id, job.kind)
+            job.status = Job.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, kind: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if kind:
+            jobs = [job for job in jobs if job.kind == kind]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job is not None and job.cancel()
+
+    def _purge_finished(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at or 0
+        )
+        for job in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS + 1)]:
+            self._jobs.pop(job.id, None)
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+job_service = JobService()
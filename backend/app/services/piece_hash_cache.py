@@ -0,0 +1,135 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PieceHashCache:
+    """Cache des empreintes de pièces, indexé par le contenu et le découpage
+
+    La clé couvre, pour chaque fichier dans l'ordre du torrent: son chemin
+    relatif, (device, inode), taille et mtime, plus la taille de pièce.
+    Recréer un torrent en ne changeant que le nom, l'announce ou le flag
+    privé retombe sur la même clé et ne relit pas le contenu; toute
+    modification d'un fichier (mtime, taille) ou du découpage la change.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pieces (
+        key TEXT PRIMARY KEY,
+        piece_size INTEGER NOT NULL,
+        total_size INTEGER NOT NULL,
+        pieces BLOB NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_pieces_last_used ON pieces(last_used);
+    """
+
+    MAX_ENTRIES = 1000
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = settings.data_path / "piece_hashes.db"
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(self.SCHEMA)
+                    conn.commit()
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def make_key(root: str, files: List[Tuple[str, int]], piece_size: int) -> Optional[str]:
+        """Clé du contenu (None si un fichier est illisible ou a changé de taille)"""
+        digest = hashlib.sha1(f"piece_size={piece_size}\n".encode())
+        for path, size in files:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            if st.st_size != size:
+                return None
+            relative = os.path.relpath(path, root) if os.path.isdir(root) else os.path.basename(path)
+            line = f"{relative}\0{st.st_dev}\0{st.st_ino}\0{st.st_size}\0{st.st_mtime_ns}\n"
+            digest.update(line.encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT pieces FROM pieces WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE pieces SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache des pièces indisponible: %s", e)
+            return None
+        self.hits += 1
+        return bytes(row[0])
+
+    def put(self, key: str, piece_size: int, total_size: int, pieces: bytes):
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pieces (key, piece_size, total_size, pieces, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, piece_size, total_size, pieces, time.time())
+            )
+            conn.execute(
+                "DELETE FROM pieces WHERE key IN (SELECT key FROM pieces "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.MAX_ENTRIES,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache des pièces: écriture impossible: %s", e)
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM pieces")
+        conn.commit()
+
+    def stats(self) -> dict:
+        try:
+            count, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(pieces)), 0) FROM pieces"
+            ).fetchone()
+        except sqlite3.Error:
+            count, size = 0, 0
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+piece_hash_cache = PieceHashCache()
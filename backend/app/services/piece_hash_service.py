@@ -0,0 +1,300 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import bisect
+import contextvars
+import hashlib
+import logging
+import os
+import threading
+
+import torf
+
+from app.config import settings
+from app.services.piece_hash_cache import PieceHashCache, piece_hash_cache
+from app.utils.fs_executor import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+# progress(pièces hachées, pièces au total, octets hachés, octets au total)
+PieceProgress = Callable[[int, int, int, int], None]
+
+
+class PieceCapture:
+    """Sink de copie: hache les pièces entièrement contenues dans un fichier
+
+    offset est la position du fichier dans le flux concaténé du torrent.
+    Les pièces à cheval sur deux fichiers ne sont pas calculées ici (elles
+    seront lues ensuite, depuis la copie encore en cache); seules les
+    empreintes d'un fichier reçu en entier sont exploitables (complete).
+    """
+
+    def __init__(self, offset: int, size: int, piece_size: int, total: int):
+        self.offset = offset
+        self.size = size
+        self.piece_size = piece_size
+        self.total = total
+        self.position = offset
+        self.pieces: Dict[int, bytes] = {}
+        aligned = -(-offset // piece_size) * piece_size
+        self._skip = min(aligned, offset + size) - offset
+        self._index = aligned // piece_size
+        self._hash = None
+
+    @property
+    def complete(self) -> bool:
+        return self.position == self.offset + self.size
+
+    def __call__(self, data: bytes):
+        view = memoryview(data)
+        if self.position + len(view) > self.offset + self.size:
+            # Fichier agrandi pendant la copie: empreintes inutilisables
+            self.position = self.offset + self.size + 1
+            self.pieces.clear()
+            return
+        if self._skip:
+            skipped = min(self._skip, len(view))
+            view = view[skipped:]
+            self._skip -= skipped
+            self.position += skipped
+        while len(view):
+            if self._hash is None:
+                self._hash = hashlib.sha1()
+            end = min((self._index + 1) * self.piece_size, self.total)
+            length = min(end - self.position, len(view))
+            self._hash.update(view[:length])
+            view = view[length:]
+            self.position += length
+            if self.position == end:
+                self.pieces[self._index] = self._hash.digest()
+                self._hash = None
+                self._index += 1
+
+
+class PieceHasher:
+    """Calcul parallèle des empreintes SHA-1 des pièces d'un torrent
+
+    torf lit le contenu dans un seul thread, pièce par pièce: sur NVMe la
+    lecture devient le goulot. Ici chaque worker lit lui-même une plage
+    contiguë de pièces avec un grand tampon (readinto) puis la hache; les
+    lectures et hashlib libèrent le GIL, des threads suffisent donc et
+    évitent de copier les données entre processus.
+
+    Les tampons de lecture (un par worker) ne vivent que le temps d'un
+    appel: un pool partagé et durable ne garde pas buffer_size octets par
+    thread entre deux torrents.
+    """
+
+    def __init__(self, workers: Optional[int] = None, buffer_size: Optional[int] = None,
+                 cache: Optional[PieceHashCache] = None):
+        self._workers = workers
+        self._buffer_size = buffer_size
+        self._cache = cache
+
+    @property
+    def workers(self) -> int:
+        return self._workers or settings.torrent_hash_workers or os.cpu_count() or 1
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size or settings.torrent_hash_buffer_size
+
+    @staticmethod
+    def _buffer(buffers: threading.local, size: int) -> memoryview:
+        buffer = getattr(buffers, "buffer", None)
+        if buffer is None or len(buffer) < size:
+            buffer = bytearray(size)
+            buffers.buffer = buffer
+        return memoryview(buffer)[:size]
+
+    @staticmethod
+    def _read_range(files: List[Tuple[str, int]], offsets: List[int],
+                    start: int, view: memoryview):
+        """Remplit view avec les octets [start, start + len(view)) du flux concaténé"""
+        filled = 0
+        index = bisect.bisect_right(offsets, start) - 1
+        while filled < len(view):
+            path, size = files[index]
+            position = start + filled - offsets[index]
+            length = min(size - position, len(view) - filled)
+            if length > 0:
+                with open(path, "rb", buffering=0) as f:
+                    f.seek(position)
+                    while length > 0:
+                        read = f.readinto(view[filled:filled + length])
+                        if not read:
+                            raise torf.ReadError(0, path)
+                        filled += read
+                        length -= read
+            index += 1
+
+    def _hash_batch(self, files: List[Tuple[str, int]], offsets: List[int], total: int,
+                    piece_size: int, first_piece: int, last_piece: int, buffers: threading.local,
+                    read_lock: Optional[threading.Lock] = None) -> List[bytes]:
+        check_cancelled()
+        start = first_piece * piece_size
+        end = min(last_piece * piece_size, total)
+        view = self._buffer(buffers, end - start)
+        if read_lock is None:
+            self._read_range(files, offsets, start, view)
+        else:
+            with read_lock:
+                self._read_range(files, offsets, start, view)
+        return [
+            hashlib.sha1(view[position:position + piece_size]).digest()
+            for position in range(0, end - start, piece_size)
+        ]
+
+    @staticmethod
+    def _offsets(files: List[Tuple[str, int]]) -> List[int]:
+        offsets = [0]
+        for _, size in files:
+            offsets.append(offsets[-1] + size)
+        return offsets
+
+    def hash_selected(self, files: List[Tuple[str, int]], piece_size: int, indices: Iterable[int],
+                      progress: Optional[PieceProgress] = None,
+                      read_lock: Optional[threading.Lock] = None,
+                      executor: Optional[ThreadPoolExecutor] = None) -> Dict[int, bytes]:
+        """Hache seulement les pièces demandées (vérification par échantillon, pièces manquantes)
+
+        Les pièces contiguës sont lues par lots d'au plus buffer_size octets.
+        progress reçoit (pièces hachées, pièces demandées, octets lus,
+        octets demandés).
+
+        Args:
+            read_lock: Sérialise les lectures (un seul lecteur par disque
+                mécanique); le hachage reste parallèle
+            executor: Pool partagé (lots de torrents); sinon un pool dédié
+                de self.workers threads
+
+        Returns:
+            Empreinte SHA-1 de chaque pièce demandée, par index
+        """
+        offsets = self._offsets(files)
+        total = offsets[-1]
+        pieces = -(-total // piece_size)
+        wanted = sorted(index for index in set(indices) if 0 <= index < pieces)
+
+        def piece_bytes(first: int, last: int) -> int:
+            return min(last * piece_size, total) - first * piece_size
+
+        batch = max(1, self.buffer_size // piece_size)
+        ranges = []
+        for index in wanted:
+            if ranges and ranges[-1][1] == index and index - ranges[-1][0] < batch:
+                ranges[-1][1] = index + 1
+            else:
+                ranges.append([index, index + 1])
+        pieces_total = len(wanted)
+        bytes_total = sum(piece_bytes(first, last) for first, last in ranges)
+        done = bytes_done = 0
+        if progress is not None:
+            progress(0, pieces_total, 0, bytes_total)
+        digests: Dict[int, bytes] = {}
+        if not ranges:
+            return digests
+
+        workers = max(1, min(self.workers, len(ranges)))
+        pool = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+        # Fenêtre de lots en vol: sur un pool partagé, chaque torrent garde sa part
+        window = 2 * workers
+        # Tampons propres à cet appel, libérés avec lui
+        buffers = threading.local()
+        pending = {}
+        next_range = 0
+        try:
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < window:
+                    first, last = ranges[next_range]
+                    future = pool.submit(contextvars.copy_context().run, self._hash_batch,
+                                         files, offsets, total, piece_size, first, last, buffers, read_lock)
+                    pending[future] = next_range
+                    next_range += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    first, last = ranges[pending.pop(future)]
+                    for offset, digest in enumerate(future.result()):
+                        digests[first + offset] = digest
+                    done += last - first
+                    bytes_done += piece_bytes(first, last)
+                    if progress is not None:
+                        progress(done, pieces_total, bytes_done, bytes_total)
+                check_cancelled()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            raise
+        finally:
+            if executor is None:
+                pool.shutdown(wait=True)
+        return digests
+
+    def hash_pieces(self, files: List[Tuple[str, int]], piece_size: int,
+                    progress: Optional[PieceProgress] = None,
+                    read_lock: Optional[threading.Lock] = None,
+                    executor: Optional[ThreadPoolExecutor] = None,
+                    known_pieces: Optional[Dict[int, bytes]] = None) -> bytes:
+        """Hache le contenu concaténé des fichiers (chemin, taille), dans l'ordre du torrent
+
+        Args:
+            read_lock, executor: Voir hash_selected
+            known_pieces: Empreintes déjà calculées (index -> SHA-1), par
+                exemple pendant une copie: ces pièces ne sont pas relues
+
+        Returns:
+            Les empreintes concaténées (20 octets par pièce)
+        """
+        total = self._offsets(files)[-1]
+        pieces = -(-total // piece_size)
+        known = known_pieces or {}
+        known_bytes = sum(min((index + 1) * piece_size, total) - index * piece_size for index in known)
+
+        def known_progress(pieces_done: int, _: int, bytes_done: int, __: int):
+            progress(len(known) + pieces_done, pieces, known_bytes + bytes_done, total)
+
+        missing = (index for index in range(pieces) if index not in known)
+        digests = self.hash_selected(files, piece_size, missing,
+                                     known_progress if progress is not None else None,
+                                     read_lock, executor)
+        digests.update(known)
+        return b"".join(digests[index] for index in range(pieces))
+
+    def generate(self, torrent: torf.Torrent, progress: Optional[PieceProgress] = None,
+                 read_lock: Optional[threading.Lock] = None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 known_pieces: Optional[Dict[int, bytes]] = None) -> bool:
+        """Remplace torf.Torrent.generate: renseigne metainfo['info']['pieces']
+
+        Avec un cache, un contenu déjà haché avec la même taille de pièce
+        (même inode, taille, mtime et arborescence) n'est pas relu.
+        """
+        if torrent.path is None:
+            raise RuntimeError("generate() appelé sans chemin")
+        files = [(str(path), file.size) for path, file in zip(torrent.filepaths, torrent.files)]
+        total = sum(size for _, size in files)
+        if total < 1:
+            raise torf.PathError(torrent.path, msg="Empty or all files excluded")
+
+        cache = self._cache if self._cache is not None and settings.torrent_hash_cache_enabled else None
+        key = cache.make_key(str(torrent.path), files, torrent.piece_size) if cache else None
+        pieces = cache.get(key) if key else None
+        if pieces is not None and len(pieces) // 20 == torrent.pieces:
+            logger.info("Pièces de %s reprises du cache", torrent.path)
+            if progress is not None:
+                progress(torrent.pieces, torrent.pieces, total, total)
+        else:
+            pieces = self.hash_pieces(files, torrent.piece_size, progress, read_lock, executor,
+                                      known_pieces)
+            # Contenu modifié pendant la lecture: la clé a changé, on ne mémorise pas
+            if key and cache.make_key(str(torrent.path), files, torrent.piece_size) == key:
+                cache.put(key, torrent.piece_size, total, pieces)
+
+        if len(pieces) // 20 != torrent.pieces:
+            raise RuntimeError(f"Nombre de pièces inattendu: {len(pieces) // 20} au lieu de {torrent.pieces}")
+        torrent.metainfo["info"]["pieces"] = pieces
+        return True
+
+
+piece_hasher = PieceHasher(cache=piece_hash_cache)
+
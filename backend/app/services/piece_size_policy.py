@@ -0,0 +1,92 @@
+from typing import Dict, Optional
+import logging
+
+import torf
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KIB = 1024
+MIB = 1024 * KIB
+
+MIN_PIECE_SIZE = 16 * KIB
+MAX_PIECE_SIZE = 16 * MIB  # Limite de torf (et du sélecteur du frontend)
+
+# Octets ajoutés au .torrent par fichier (chemin, longueur, encodage bencode)
+FILE_ENTRY_OVERHEAD = 100
+
+
+class PieceSizePolicy:
+    """Choix de la taille de pièce à partir de la taille totale et du nombre de fichiers
+
+    On vise target_pieces pièces: en dessous, chaque pièce devient grosse
+    (vérification et échange lents côté tracker/clients); au-dessus, le
+    .torrent grossit de 20 octets par pièce. Le .torrent estimé (empreintes
+    plus une entrée par fichier) est borné par max_metainfo_size: avec
+    beaucoup de fichiers, le budget de pièces diminue.
+    """
+
+    def __init__(self, name: str, target_pieces: int, max_metainfo_size: int,
+                 min_piece_size: int = MIN_PIECE_SIZE, max_piece_size: int = MAX_PIECE_SIZE):
+        self.name = name
+        self.target_pieces = target_pieces
+        self.max_metainfo_size = max_metainfo_size
+        self.min_piece_size = min_piece_size
+        self.max_piece_size = max_piece_size
+
+    def max_pieces(self, file_count: int) -> int:
+        budget = (self.max_metainfo_size - file_count * FILE_ENTRY_OVERHEAD) // 20
+        # Si la liste des fichiers dépasse déjà le budget, grossir les pièces
+        # n'y change presque rien: on garde au moins un quart de la cible
+        return max(self.target_pieces // 4, min(self.target_pieces, budget))
+
+    def choose(self, total_size: int, file_count: int = 1) -> int:
+        """Plus petite puissance de 2 gardant le nombre de pièces dans le budget"""
+        if total_size <= 0:
+            return self.min_piece_size
+        max_pieces = self.max_pieces(max(1, file_count))
+        piece_size = self.min_piece_size
+        while piece_size < self.max_piece_size and -(-total_size // piece_size) > max_pieces:
+            piece_size *= 2
+        return piece_size
+
+    def estimate_metainfo_size(self, total_size: int, file_count: int = 1) -> int:
+        pieces = -(-total_size // self.choose(total_size, file_count))
+        return pieces * 20 + max(1, file_count) * FILE_ENTRY_OVERHEAD
+
+
+class TorfPieceSizePolicy(PieceSizePolicy):
+    """Algorithme par défaut de torf (ne tient pas compte du nombre de fichiers), pour comparaison"""
+
+    def __init__(self):
+        super().__init__("torf", target_pieces=2048, max_metainfo_size=0)
+
+    def choose(self, total_size: int, file_count: int = 1) -> int:
+        if total_size <= 0:
+            return self.min_piece_size
+        return torf.Torrent.calculate_piece_size(total_size)
+
+
+POLICIES: Dict[str, PieceSizePolicy] = {
+    # Peu de pièces: .torrent minimal, pièces plus grosses
+    "compact": PieceSizePolicy("compact", target_pieces=1000, max_metainfo_size=256 * KIB),
+    # Défaut: ~1500 pièces, .torrent sous 512 KiB
+    "balanced": PieceSizePolicy("balanced", target_pieces=1500, max_metainfo_size=512 * KIB),
+    # Pièces fines: reprise/vérification plus granulaire, .torrent plus gros
+    "fine": PieceSizePolicy("fine", target_pieces=4000, max_metainfo_size=2 * MIB),
+    "torf": TorfPieceSizePolicy(),
+}
+
+
+def get_policy(name: Optional[str] = None) -> PieceSizePolicy:
+    name = name or settings.torrent_piece_size_policy
+    policy = POLICIES.get(name)
+    if policy is None:
+        logger.warning("Politique de taille de pièce inconnue '%s', utilisation de 'balanced'", name)
+        policy = POLICIES["balanced"]
+    return policy
+
+
+def choose_piece_size(total_size: int, file_count: int = 1, policy: Optional[str] = None) -> int:
+    return get_policy(policy).choose(total_size, file_count)
@@ -0,0 +1,175 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import contextvars
+import logging
+import os
+import threading
+
+import torf
+
+from app.services.file_service import file_service
+from app.services.job_service import Job, job_service
+from app.services.mediainfo_service import mediainfo_service
+from app.services.piece_hash_service import PieceCapture
+from app.services.piece_size_policy import choose_piece_size
+from app.services.qbittorrent_service import qbittorrent_service
+from app.utils.file_transfer import CopySink
+from app.utils.fs_executor import check_cancelled
+from app.utils.media import VIDEO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+class TorrentLayout:
+    """Fichiers d'un torrent dans l'ordre des pièces: chemin relatif, taille, position"""
+
+    def __init__(self, root: str):
+        torrent = torf.Torrent(path=root)
+        self.is_file = os.path.isfile(root)
+        self.entries: List[Tuple[str, int]] = []
+        self.offsets: Dict[str, int] = {}
+        offset = 0
+        for path, file in zip(torrent.filepaths, torrent.files):
+            relative = os.path.basename(path) if self.is_file else os.path.relpath(path, root)
+            self.entries.append((relative, file.size))
+            self.offsets[relative] = offset
+            offset += file.size
+        self.total = offset
+
+    @property
+    def file_count(self) -> int:
+        return 1 if self.is_file else len(self.entries)
+
+
+class PreparePipelineService:
+    """Hardlink, MediaInfo et torrent d'une release en une seule lecture du contenu
+
+    Enchaîner /files/create-hardlink, /mediainfo puis /torrent/create lit
+    les données deux fois quand le hardlink se replie sur une copie (la
+    copie, puis le hachage). Ici, les fichiers copiés sont hachés au vol
+    (PieceCapture): seules les pièces à cheval sur deux fichiers sont
+    relues, depuis la copie encore en cache. Les fichiers réellement liés
+    n'ont jamais été lus: le hachage les lit une fois, pendant que
+    MediaInfo analyse la vidéo principale dans un autre thread.
+    """
+
+    @staticmethod
+    def _same_layout(source: TorrentLayout, destination: TorrentLayout) -> bool:
+        if source.is_file:
+            # Un fichier seul peut être renommé: son nom ne compte pas dans les pièces
+            return destination.is_file and destination.total == source.total
+        return destination.entries == source.entries
+
+    def _main_video(self, destination: str) -> Optional[str]:
+        if os.path.isfile(destination):
+            return destination
+        videos = []
+        for directory, _, names in os.walk(destination):
+            for name in names:
+                if Path(name).suffix.lower() in VIDEO_EXTENSIONS:
+                    path = os.path.join(directory, name)
+                    videos.append((os.path.getsize(path), path))
+        return max(videos)[1] if videos else None
+
+    def prepare(self, job: Job, source_path: str, destination_path: str, name: str = None,
+                piece_size: int = None, private: bool = True, tracker_url: str = None) -> dict:
+        if not os.path.exists(source_path):
+            raise RuntimeError(f"La source n'existe pas: {source_path}")
+        layout = TorrentLayout(source_path)
+        if not piece_size:
+            piece_size = choose_piece_size(layout.total, layout.file_count)
+
+        captures: Dict[str, PieceCapture] = {}
+        captures_lock = threading.Lock()
+
+        def relative_to_source(path: str) -> str:
+            # Fichier seul: le torrent ne contient que son nom
+            return os.path.basename(path) if layout.is_file else os.path.relpath(path, source_path)
+
+        def copy_sink(source: str) -> Optional[CopySink]:
+            relative = relative_to_source(source)
+            offset = layout.offsets.get(relative)
+            if offset is None:
+                return None
+            capture = PieceCapture(offset, os.path.getsize(source), piece_size, layout.total)
+            with captures_lock:
+                captures[relative] = capture
+            return capture
+
+        job.message = "Création des hardlinks"
+        success, message, report = file_service.create_hardlink_detailed(
+            source_path, destination_path, progress=job.update, copy_sink=copy_sink
+        )
+        if not success:
+            raise RuntimeError(message)
+        check_cancelled()
+
+        known: Dict[int, bytes] = {}
+        if layout.is_file:
+            # Pas de rapport pour un fichier seul: une capture n'existe que s'il a été copié
+            copied = set(captures)
+        else:
+            copied = {relative_to_source(result.source)
+                      for result in report.files if result.status == "copied"}
+        for relative, capture in captures.items():
+            if relative in copied and capture.complete:
+                known.update(capture.pieces)
+        if known and not self._same_layout(layout, TorrentLayout(destination_path)):
+            # Destination différente de la source (fichiers ignorés...): on relit tout
+            logger.info("Préparation: arborescence de %s différente de la source, pièces recalculées",
+                        destination_path)
+            known = {}
+        job.set_details(pieces_from_copy=len(known))
+
+        # MediaInfo pendant le hachage: il ne lit que quelques blocs de la vidéo
+        media = {}
+        video = self._main_video(destination_path)
+        analyzer = None
+        if video is not None:
+            def analyze():
+                media["info"] = mediainfo_service.analyze_file(video)
+
+            analyzer = threading.Thread(target=contextvars.copy_context().run, args=(analyze,),
+                                        name="prepare-mediainfo", daemon=True)
+            analyzer.start()
+
+        def progress(pieces_done: int, pieces_total: int, bytes_done: int, bytes_total: int):
+            job.set_details(pieces_done=pieces_done, pieces_total=pieces_total)
+            job.update(0, 1, bytes_done, bytes_total)
+
+        job.message = "Hachage des pièces"
+        try:
+            success, torrent = qbittorrent_service.create_torrent_sync(
+                destination_path, name, piece_size, private, tracker_url, progress,
+                known_pieces=known
+            )
+        finally:
+            if analyzer is not None:
+                analyzer.join()
+        if not success:
+            raise RuntimeError(torrent.get("error", "Erreur inconnue"))
+
+        info = media.get("info")
+        job.update(1, 1, job.bytes_done, job.bytes_total)
+        job.message = f"Préparation terminée: {torrent['torrent_name']}"
+        return {
+            "success": True,
+            "message": message,
+            "report": report.model_dump() if report is not None else None,
+            "torrent": torrent,
+            "mediainfo": info.model_dump() if info is not None else None,
+            "mediainfo_path": video,
+            "pieces_from_copy": len(known),
+        }
+
+    def start_prepare_job(self, source_path: str, destination_path: str, name: str = None,
+                          piece_size: int = None, private: bool = True,
+                          tracker_url: str = None) -> Job:
+        def run(job: Job) -> dict:
+            return self.prepare(job, source_path, destination_path, name, piece_size,
+                                private, tracker_url)
+
+        return job_service.submit("prepare", run, description=f"{source_path} -> {destination_path}")
+
+
+prepare_pipeline_service = PreparePipelineService()
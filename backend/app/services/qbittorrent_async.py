@@ -0,0 +1,304 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (host, port, username, password)
+Credentials = Tuple[str, int, str, str]
+
+
+class QBittorrentError(Exception):
+    """Erreur renvoyée par la WebUI qBittorrent"""
+
+
+class QBittorrentAuthError(QBittorrentError):
+    """Identifiants refusés"""
+
+
+class QBittorrentUnavailable(QBittorrentError):
+    """WebUI injoignable, trop lente ou circuit ouvert"""
+
+
+class CircuitBreaker:
+    """Coupe-circuit: après failure_threshold échecs consécutifs, les appels
+    échouent immédiatement pendant reset_timeout secondes
+
+    Passé ce délai, un seul appel d'essai est laissé passer (half_open): un
+    succès referme le circuit, un échec le rouvre pour un nouveau délai.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def failure_threshold(self) -> int:
+        return self._failure_threshold or settings.qbittorrent_breaker_failures
+
+    @property
+    def reset_timeout(self) -> float:
+        return self._reset_timeout if self._reset_timeout is not None else settings.qbittorrent_breaker_reset
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial):
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            raise QBittorrentUnavailable(f"qBittorrent indisponible (nouvel essai dans {retry_in:.0f} s)")
+        if state == "half_open":
+            self._trial = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("qBittorrent: %d échecs consécutifs, circuit ouvert", self.failures)
+            self.opened_at = time.monotonic()
+
+
+class AsyncQBittorrentClient:
+    """Client WebUI (API v2) pour un jeu d'identifiants, sur un AsyncClient partagé
+
+    Le cookie SID est gardé ici et envoyé explicitement: plusieurs comptes
+    peuvent partager le même AsyncClient (et son pool de connexions). Un
+    403 provoque une reconnexion et un nouvel essai.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, credentials: Credentials,
+                 breaker: Optional[CircuitBreaker] = None):
+        host, port, self.username, self.password = credentials
+        self.base_url = self.make_base_url(host, port)
+        self._http = http
+        self.breaker = breaker or CircuitBreaker()
+        self._sid: Optional[str] = None
+
+    @staticmethod
+    def make_base_url(host: str, port: int) -> str:
+        if "://" not in host:
+            host = f"http://{host}"
+        parts = urlsplit(host)
+        netloc = parts.netloc if parts.port is not None else f"{parts.netloc}:{port}"
+        return f"{parts.scheme}://{netloc}{parts.path.rstrip('/')}"
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self.breaker.before_call()
+        headers = {"Referer": self.base_url}
+        if self._sid is not None:
+            headers["Cookie"] = f"SID={self._sid}"
+        try:
+            response = await self._http.request(method, f"{self.base_url}/api/v2/{path}",
+                                                headers=headers, **kwargs)
+        except httpx.TimeoutException as e:
+            self.breaker.record_failure()
+            raise QBittorrentUnavailable(f"qBittorrent ne répond pas ({type(e).__name__})") from e
+        except httpx.TransportError as e:
+            self.breaker.record_failure()
+            raise QBittorrentUnavailable(f"qBittorrent injoignable: {e}") from e
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise QBittorrentUnavailable(f"qBittorrent: erreur {response.status_code}")
+        self.breaker.record_success()
+        return response
+
+    async def login(self):
+        response = await self._send("POST", "auth/login",
+                                    data={"username": self.username, "password": self.password})
+        sid = response.cookies.get("SID")
+        if response.status_code != 200 or response.text.strip() != "Ok." or sid is None:
+            self._sid = None
+            raise QBittorrentAuthError("Identifiants incorrects")
+        self._sid = sid
+        # Le SID est envoyé explicitement: le cookie partagé n'est pas gardé
+        self._http.cookies.clear()
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        if self._sid is None:
+            await self.login()
+        response = await self._send(method, path, **kwargs)
+        if response.status_code == 403:
+            logger.info("qBittorrent: session expirée, nouvelle connexion")
+            await self.login()
+            response = await self._send(method, path, **kwargs)
+        if response.status_code >= 400:
+            raise QBittorrentError(f"qBittorrent: erreur {response.status_code} sur {path}: {response.text}")
+        return response
+
+    async def version(self) -> str:
+        return (await self.request("GET", "app/version")).text.strip()
+
+    async def add(self, torrents: Sequence[Tuple[str, bytes]], save_path: Optional[str] = None,
+                  skip_checking: bool = False, rename: Optional[str] = None,
+                  **options: Any):
+        """torrents/add: plusieurs .torrent (nom, contenu) en une requête multipart"""
+        data: Dict[str, str] = {"skip_checking": "true" if skip_checking else "false"}
+        if save_path:
+            data["savepath"] = save_path
+        if rename:
+            data["rename"] = rename
+        for key, value in options.items():
+            if value is not None:
+                data[key] = ("true" if value else "false") if isinstance(value, bool) else str(value)
+        files = [("torrents", (name, content, "application/x-bittorrent")) for name, content in torrents]
+        response = await self.request("POST", "torrents/add", data=data, files=files)
+        if response.text.strip() == "Fails.":
+            raise QBittorrentError("qBittorrent a refusé le torrent")
+
+    async def info(self, hashes: Optional[Sequence[str]] = None, **filters: Any) -> List[dict]:
+        params = {key: value for key, value in filters.items() if value is not None}
+        if hashes:
+            params["hashes"] = "|".join(hashes)
+        return (await self.request("GET", "torrents/info", params=params)).json()
+
+    async def recheck(self, hashes: Sequence[str]):
+        await self.request("POST", "torrents/recheck", data={"hashes": "|".join(hashes)})
+
+    async def maindata(self, rid: int = 0) -> dict:
+        """sync/maindata: seulement ce qui a changé depuis rid (tout si 0)"""
+        return (await self.request("GET", "sync/maindata", params={"rid": rid})).json()
+
+    async def rename(self, torrent_hash: str, name: str):
+        await self.request("POST", "torrents/rename", data={"hash": torrent_hash, "name": name})
+
+
+class QBittorrentAsyncAdapter:
+    """Accès asynchrone à qBittorrent pour les routes (ne bloque pas la boucle)
+
+    Un seul httpx.AsyncClient (connexions réutilisées) et un client par jeu
+    d'identifiants, les MAX_CLIENTS derniers utilisés (/test-connection peut
+    en essayer beaucoup). Le coupe-circuit est commun à une même WebUI: tant
+    qu'elle est en panne, les routes répondent tout de suite au lieu
+    d'attendre le délai HTTP à chaque appel.
+
+    La sonde de santé passe par les mêmes clients et coupe-circuits que les
+    routes: /torrent/health reflète ce qu'elles constatent. Après un refus
+    des identifiants, elle ne les réessaie plus tant qu'ils n'ont pas
+    changé: qBittorrent bannit l'adresse après quelques échecs de connexion.
+    """
+
+    MAX_CLIENTS = 4
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._clients: "OrderedDict[Credentials, AsyncQBittorrentClient]" = OrderedDict()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._health: Dict[str, Any] = {}
+        self._probe_task: Optional[asyncio.Task] = None
+        self._rejected: Optional[Credentials] = None
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.qbittorrent_timeout, connect=settings.qbittorrent_connect_timeout),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                transport=self._transport
+            )
+            self._clients.clear()
+        return self._http
+
+    def client(self, credentials: Credentials) -> AsyncQBittorrentClient:
+        http = self._get_http()
+        client = self._clients.get(credentials)
+        if client is not None:
+            self._clients.move_to_end(credentials)
+            return client
+        base_url = AsyncQBittorrentClient.make_base_url(credentials[0], credentials[1])
+        breaker = self._breakers.setdefault(base_url, CircuitBreaker())
+        client = AsyncQBittorrentClient(http, credentials, breaker)
+        self._clients[credentials] = client
+        while len(self._clients) > self.MAX_CLIENTS:
+            evicted = self._clients.popitem(last=False)[1]
+            if all(other.base_url != evicted.base_url for other in self._clients.values()):
+                self._breakers.pop(evicted.base_url, None)
+        return client
+
+    async def test_connection(self, credentials: Credentials) -> Tuple[bool, str]:
+        client = self.client(credentials)
+        try:
+            await client.login()
+            version = await client.version()
+            return True, f"Connexion réussie - qBittorrent {version}"
+        except QBittorrentAuthError:
+            return False, "Échec: identifiants incorrects"
+        except QBittorrentError as e:
+            return False, f"Échec de connexion: {str(e)}"
+
+    async def probe(self, credentials: Credentials) -> dict:
+        """Vérifie la WebUI (app/version) et mémorise le résultat"""
+        started = time.monotonic()
+        health = {"host": credentials[0], "port": credentials[1], "checked_at": time.time()}
+        try:
+            health.update(ok=True, version=await self.client(credentials).version(), error=None)
+            self._rejected = None
+        except QBittorrentAuthError:
+            self._rejected = credentials
+            health.update(ok=False, version=None, error="identifiants incorrects")
+        except QBittorrentError as e:
+            health.update(ok=False, version=None, error=str(e))
+        health["latency"] = time.monotonic() - started
+        self._health = health
+        return health
+
+    @property
+    def health(self) -> dict:
+        return dict(self._health)
+
+    async def _probe_loop(self, credentials: Callable[[], Credentials], interval: float):
+        while True:
+            current = credentials()
+            if current != self._rejected:
+                health = await self.probe(current)
+                if not health["ok"]:
+                    logger.debug("qBittorrent injoignable: %s", health["error"])
+            await asyncio.sleep(interval)
+
+    def start_health_probe(self, credentials: Callable[[], Credentials],
+                           interval: Optional[float] = None):
+        """Sonde la WebUI toutes les interval secondes dans la boucle courante (lifespan)"""
+        interval = interval if interval is not None else settings.qbittorrent_health_interval
+        if interval <= 0 or (self._probe_task is not None and not self._probe_task.done()):
+            return
+        self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop(credentials, interval))
+
+    async def stop_health_probe(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    async def aclose(self):
+        await self.stop_health_probe()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self._clients.clear()
+
+
+qbittorrent_async = QBittorrentAsyncAdapter()
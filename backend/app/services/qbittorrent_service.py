@@ -1,66 +1,71 @@
-import qbittorrentapi
 import asyncio
-from typing import Optional, Tuple
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 import torf
 from ..config import user_settings, settings
+from .job_service import Job, job_service
+from .piece_hash_service import PieceProgress, piece_hasher
+from .piece_size_policy import choose_piece_size
+from .qbittorrent_async import Credentials, QBittorrentAuthError, QBittorrentError, qbittorrent_async
+from .seeding_tracker import seeding_tracker
+from .torrent_verify_service import torrent_verifier
+from ..utils.media import VIDEO_EXTENSIONS
 
 
 class QBittorrentService:
-    MEDIA_EXTENSIONS = {
-        '.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.ts', '.m2ts'
-    }
+    MEDIA_EXTENSIONS = VIDEO_EXTENSIONS
 
-    def __init__(self):
-        self._client = None
-    
     def _get_settings(self) -> dict:
         return user_settings.get().get("qbittorrent", {})
     
-    def connect(self, host: str = None, port: int = None, 
-                username: str = None, password: str = None) -> Tuple[bool, str]:
+    def credentials(self, host: str = None, port: int = None,
+                    username: str = None, password: str = None) -> Credentials:
+        """Identifiants fournis, complétés par les paramètres enregistrés"""
         qb_settings = self._get_settings()
         
         host = host if host is not None else qb_settings.get("host", "http://localhost")
         port = port if port is not None else qb_settings.get("port", 8080)
         username = username if username is not None else qb_settings.get("username", "admin")
         password = password if password is not None else qb_settings.get("password", "")
-        
-        try:
-            self._client = qbittorrentapi.Client(
-                host=host,
-                port=port,
-                username=username,
-                password=password
-            )
-            self._client.auth_log_in()
-            return True, f"Connecté à qBittorrent {self._client.app.version}"
-        except qbittorrentapi.LoginFailed as e:
-            return False, f"Échec de connexion: identifiants incorrects"
-        except Exception as e:
-            return False, f"Erreur de connexion: {str(e)}"
+        return host, port, username, password
     
-    def test_connection(self, host: str, port: int, 
-                       username: str, password: str) -> Tuple[bool, str]:
-        try:
-            client = qbittorrentapi.Client(
-                host=host,
-                port=port,
-                username=username,
-                password=password
-            )
-            client.auth_log_in()
-            version = client.app.version
-            client.auth_log_out()
-            return True, f"Connexion réussie - qBittorrent {version}"
-        except qbittorrentapi.LoginFailed:
-            return False, "Échec: identifiants incorrects"
-        except Exception as e:
-            return False, f"Échec de connexion: {str(e)}"
+    def is_configured(self) -> bool:
+        """Paramètres qBittorrent renseignés (autres que les valeurs par défaut)"""
+        return self._get_settings() != user_settings.DEFAULTS["qbittorrent"]
+    
+    def start_health_probe(self):
+        """Lance la sonde de santé, seulement si qBittorrent a été configuré
+        
+        Avec les identifiants par défaut, chaque sonde serait un échec de
+        connexion de plus, et qBittorrent finit par bannir l'adresse.
+        """
+        if self.is_configured():
+            qbittorrent_async.start_health_probe(self.credentials)
     
     async def create_torrent(self, source_path: str, name: str = None,
                        piece_size: int = None, private: bool = True,
                        tracker_url: str = None) -> Tuple[bool, dict]:
+        return await asyncio.to_thread(
+            self.create_torrent_sync, source_path, name, piece_size, private, tracker_url
+        )
+    
+    def create_torrent_sync(self, source_path: str, name: str = None,
+                            piece_size: int = None, private: bool = True,
+                            tracker_url: str = None,
+                            progress: Optional[PieceProgress] = None,
+                            read_lock: Optional[threading.Lock] = None,
+                            executor: Optional[ThreadPoolExecutor] = None,
+                            known_pieces: Optional[Dict[int, bytes]] = None) -> Tuple[bool, dict]:
+        """Crée le torrent dans le thread courant
+        
+        Args:
+            progress: Appelé avec (pièces hachées, total, octets hachés, total)
+            read_lock, executor: Voir PieceHasher.hash_pieces (lots de torrents)
+            known_pieces: Empreintes déjà calculées (hachage pendant la copie)
+        """
         try:
             source = Path(source_path)
             if not source.exists():
@@ -83,6 +88,8 @@ class QBittorrentService:
             
             if piece_size:
                 t.piece_size = piece_size
+            else:
+                t.piece_size = choose_piece_size(t.size, 1 if source.is_file() else len(t.files))
             
             tracker_settings = user_settings.get().get("tracker", {})
             announce_url = tracker_url or tracker_settings.get("announce_url", "")
@@ -90,7 +97,7 @@ class QBittorrentService:
             if announce_url:
                 t.trackers = [[announce_url]]
             
-            await asyncio.to_thread(t.generate)
+            piece_hasher.generate(t, progress, read_lock, executor, known_pieces)
             
             output_file = settings.output_path / f"{torrent_name}.torrent"
             t.write(output_file, overwrite=True)
@@ -105,6 +112,30 @@ class QBittorrentService:
         except Exception as e:
             return False, {"error": str(e)}
 
+    def start_torrent_job(self, source_path: str, name: str = None,
+                          piece_size: int = None, private: bool = True,
+                          tracker_url: str = None) -> Job:
+        """Lance la création du torrent en tâche de fond
+        
+        Le job expose les pièces hachées (details), le débit et l'ETA; son
+        résultat reprend la réponse de /torrent/create.
+        """
+        def run(job: Job) -> dict:
+            def progress(pieces_done: int, pieces_total: int, bytes_done: int, bytes_total: int):
+                job.set_details(pieces_done=pieces_done, pieces_total=pieces_total)
+                job.update(0, 1, bytes_done, bytes_total)
+            
+            success, result = self.create_torrent_sync(
+                source_path, name, piece_size, private, tracker_url, progress
+            )
+            if not success:
+                raise RuntimeError(result.get("error", "Erreur inconnue"))
+            job.update(1, 1, job.bytes_done, job.bytes_total)
+            job.message = f"Torrent créé: {result['torrent_name']}"
+            return {"success": True, **result}
+        
+        return job_service.submit("torrent", run, description=name or Path(source_path).name)
+    
     def _strip_media_extension(self, value: str, source_ext: str = "") -> str:
         if not value:
             return value
@@ -116,43 +147,156 @@ class QBittorrentService:
                 return value[: -len(ext)]
         return value
     
-    def add_torrent_for_seeding(self, torrent_path: str, 
-                                 content_path: str,
-                                 save_path: str = None) -> Tuple[bool, str]:
-        if not self._client:
-            success, msg = self.connect()
-            if not success:
-                return False, msg
+    def _seeding_params(self, torrent_path: str, content_path: str, save_path: str = None,
+                        path_settings: Optional[dict] = None) -> Tuple[str, str, bool]:
+        """(save_path, nom affiché, skip_checking) pour l'ajout d'un torrent
         
-        try:
-            # Utiliser content_path comme répertoire de save si save_path non fourni
-            if not save_path:
+        Le recheck n'est évité que si le contenu a été vérifié localement
+        (torrent_verifier) et n'a pas changé depuis; jamais à la demande.
+        
+        Args:
+            path_settings: Paramètres "paths" déjà lus (ajout en lot)
+        """
+        # Utiliser content_path comme répertoire de save si save_path non fourni
+        if not save_path:
+            if path_settings is None:
                 path_settings = user_settings.get().get("paths", {})
-                save_path = path_settings.get("qbittorrent_download_path", "")
-            
-            # Déterminer le save_path depuis content_path si toujours vide
-            if not save_path and content_path:
-                content = Path(content_path)
-                save_path = str(content.parent) if content.is_file() else str(content.parent)
-            
-            # Extraire le nom sans extension media pour l'affichage dans qBittorrent
-            torrent_display_name = Path(torrent_path).stem  # ex: "Release.Name" (sans .torrent)
-            torrent_display_name = self._strip_media_extension(torrent_display_name)
-            
-            with open(torrent_path, 'rb') as f:
-                add_params = {
-                    "torrent_files": f,
-                    "is_skip_checking": False,
-                    "rename": torrent_display_name
-                }
-                # Ajouter save_path seulement s'il est défini
-                if save_path:
-                    add_params["save_path"] = save_path
-                
-                self._client.torrents_add(**add_params)
-            return True, "Torrent ajouté pour seeding"
+            save_path = path_settings.get("qbittorrent_download_path", "")
+        
+        # Déterminer le save_path depuis content_path si toujours vide
+        if not save_path and content_path:
+            content = Path(content_path)
+            save_path = str(content.parent) if content.is_file() else str(content.parent)
+        
+        # Extraire le nom sans extension media pour l'affichage dans qBittorrent
+        torrent_display_name = Path(torrent_path).stem  # ex: "Release.Name" (sans .torrent)
+        torrent_display_name = self._strip_media_extension(torrent_display_name)
+        
+        skip_checking = torrent_verifier.is_trusted(torrent_path, content_path)
+        return save_path, torrent_display_name, skip_checking
+    
+    @staticmethod
+    def _info_hash(content: bytes) -> Optional[str]:
+        try:
+            return torf.Torrent.read_stream(io.BytesIO(content)).infohash
+        except torf.TorfError:
+            return None
+    
+    @staticmethod
+    def _seeding_message(skip_checking: bool) -> str:
+        if skip_checking:
+            return "Torrent ajouté pour seeding (contenu vérifié, sans recheck)"
+        return "Torrent ajouté pour seeding"
+    
+    async def add_torrent_for_seeding_async(self, torrent_path: str,
+                                            content_path: str,
+                                            save_path: str = None) -> Tuple[bool, str]:
+        """Ajoute le torrent à qBittorrent pour le seeder (voir _seeding_params)
+        
+        Rien ne bloque la boucle d'événements: la lecture du .torrent et la vérification locale passent par un
+        thread; l'envoi passe par l'adaptateur httpx (délais, coupe-circuit).
+        Le torrent ajouté est suivi par seeding_tracker.
+        """
+        def prepare():
+            params = self._seeding_params(torrent_path, content_path, save_path)
+            content = Path(torrent_path).read_bytes()
+            return params, content, self._info_hash(content)
+        
+        try:
+            (save_path, torrent_display_name, skip_checking), content, info_hash = await asyncio.to_thread(prepare)
+            await qbittorrent_async.client(self.credentials()).add(
+                [(Path(torrent_path).name, content)],
+                save_path=save_path, skip_checking=skip_checking, rename=torrent_display_name
+            )
+            if info_hash:
+                seeding_tracker.track([info_hash])
+            return True, self._seeding_message(skip_checking)
+        except QBittorrentAuthError:
+            return False, "Échec de connexion: identifiants incorrects"
         except Exception as e:
             return False, f"Erreur lors de l'ajout: {str(e)}"
 
+    async def add_torrents_for_seeding_async(self, items: Sequence[dict]) -> List[dict]:
+        """Ajoute plusieurs torrents pour seeding en quelques requêtes
+        
+        Les torrents qui partagent save_path et skip_checking partent dans une
+        seule requête torrents/add (un fichier multipart par torrent), puis un
+        seul torrents/info confirme l'état de tous. qBittorrent applique
+        rename à toute la requête: le nom affiché est corrigé ensuite, et
+        seulement pour les torrents dont le nom diffère.
+        Les torrents envoyés sont suivis par seeding_tracker.
+        
+        Args:
+            items: dicts torrent_path, content_path et, optionnel, save_path
+        
+        Returns:
+            Un résultat par item, dans l'ordre: success, info_hash, state, message
+        """
+        def prepare():
+            path_settings = user_settings.get().get("paths", {})
+            results, pending = [], []
+            for item in items:
+                result = {"torrent_path": item["torrent_path"], "success": False, "info_hash": None,
+                          "save_path": None, "skip_checking": False, "state": None, "message": ""}
+                results.append(result)
+                try:
+                    save_path, display_name, skip_checking = self._seeding_params(
+                        item["torrent_path"], item["content_path"], item.get("save_path"), path_settings
+                    )
+                    content = Path(item["torrent_path"]).read_bytes()
+                    torrent = torf.Torrent.read_stream(io.BytesIO(content))
+                except Exception as e:
+                    result["message"] = f"Erreur lors de la lecture: {str(e)}"
+                    continue
+                result.update(info_hash=torrent.infohash, save_path=save_path, skip_checking=skip_checking)
+                pending.append((result, content, display_name))
+            return results, pending
+        
+        results, pending = await asyncio.to_thread(prepare)
+        client = qbittorrent_async.client(self.credentials())
+        
+        groups: Dict[Tuple[str, bool], list] = {}
+        for entry in pending:
+            groups.setdefault((entry[0]["save_path"], entry[0]["skip_checking"]), []).append(entry)
+        
+        added = []
+        for (save_path, skip_checking), group in groups.items():
+            try:
+                await client.add(
+                    [(Path(result["torrent_path"]).name, content) for result, content, _ in group],
+                    save_path=save_path, skip_checking=skip_checking
+                )
+                added.extend(group)
+            except QBittorrentAuthError:
+                for result, _, _ in group:
+                    result["message"] = "Échec de connexion: identifiants incorrects"
+            except QBittorrentError as e:
+                for result, _, _ in group:
+                    result["message"] = f"Erreur lors de l'ajout: {str(e)}"
+        if not added:
+            return results
+        seeding_tracker.track(result["info_hash"] for result, _, _ in added)
+        
+        try:
+            known = {t["hash"]: t for t in await client.info([result["info_hash"] for result, _, _ in added])}
+        except QBittorrentError as e:
+            for result, _, _ in added:
+                result.update(success=True, message=f"Torrent envoyé, état inconnu: {str(e)}")
+            return results
+        
+        for result, _, display_name in added:
+            torrent = known.get(result["info_hash"])
+            if torrent is None:
+                result["message"] = "qBittorrent n'a pas ajouté le torrent"
+                continue
+            result.update(success=True, state=torrent.get("state"),
+                          message=self._seeding_message(result["skip_checking"]))
+            if display_name and torrent.get("name") != display_name:
+                try:
+                    await client.rename(result["info_hash"], display_name)
+                except QBittorrentError as e:
+                    result["message"] += f" (renommage impossible: {str(e)})"
+        return results
+
 
 qbittorrent_service = QBittorrentService()
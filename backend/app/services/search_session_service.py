@@ -0,0 +1,115 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+import uuid
+
+from app.utils.fs_executor import OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+
+def take(iterator: Iterator[dict], limit: int,
+         max_wait: Optional[float] = None) -> Tuple[List[dict], bool]:
+    """Prend jusqu'à limit éléments d'un itérateur
+
+    Avec max_wait, rend la main dès que ce délai est écoulé après le premier
+    élément, pour que les résultats partent sans attendre un lot complet.
+
+    Returns:
+        Tuple (éléments, itérateur épuisé)
+    """
+    items: List[dict] = []
+    deadline = None
+    for item in iterator:
+        items.append(item)
+        if len(items) >= limit:
+            return items, False
+        if max_wait is not None:
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + max_wait
+            elif now >= deadline:
+                return items, False
+    return items, True
+
+
+class SearchSession:
+    """Recherche en cours dont on peut demander la page suivante sans relancer le parcours"""
+
+    def __init__(self, session_id: str, iterator: Iterator[dict], path: str, query: str):
+        self.id = session_id
+        self.path = path
+        self.query = query
+        self.done = False
+        self.returned = 0
+        self.last_access = time.monotonic()
+        self._iterator = iterator
+        self._lock = threading.Lock()
+
+    def next_page(self, limit: int) -> List[dict]:
+        with self._lock:
+            self.last_access = time.monotonic()
+            if self.done:
+                return []
+            try:
+                items, exhausted = take(self._iterator, limit)
+            except OperationCancelled:
+                # Le générateur est interrompu, il ne peut pas reprendre
+                self.done = True
+                raise
+            self.done = exhausted
+            self.returned += len(items)
+            return items
+
+    def close(self):
+        self.done = True
+        close = getattr(self._iterator, "close", None)
+        if close is not None and self._lock.acquire(blocking=False):
+            try:
+                close()
+            finally:
+                self._lock.release()
+
+
+class SearchSessionService:
+    """Sessions de recherche paginées, expirées après SESSION_TTL secondes d'inactivité"""
+
+    SESSION_TTL = 300
+    MAX_SESSIONS = 32
+
+    def __init__(self):
+        self._sessions: Dict[str, SearchSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, iterator: Iterator[dict], path: str, query: str) -> SearchSession:
+        session = SearchSession(uuid.uuid4().hex, iterator, path, query)
+        with self._lock:
+            self._purge_expired()
+            if len(self._sessions) >= self.MAX_SESSIONS:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+                self._sessions.pop(oldest.id).close()
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[SearchSession]:
+        with self._lock:
+            self._purge_expired()
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_access > self.SESSION_TTL:
+                self._sessions.pop(session_id).close()
+
+
+search_session_service = SearchSessionService()
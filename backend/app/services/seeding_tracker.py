@@ -0,0 +1,249 @@
+from typing import Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.services.qbittorrent_async import AsyncQBittorrentClient, Credentials, QBittorrentError, qbittorrent_async
+
+logger = logging.getLogger(__name__)
+
+# Champs de torrents/info gardés dans le miroir
+FIELDS = ("name", "state", "progress", "size", "amount_left", "upspeed", "dlspeed",
+          "num_seeds", "num_leechs", "ratio", "save_path")
+
+# États qBittorrent regroupés en phases pour l'interface
+PHASES = {
+    "checking": {"checkingUP", "checkingDL", "checkingResumeData", "moving", "allocating"},
+    "seeding": {"uploading", "stalledUP", "forcedUP", "queuedUP"},
+    "downloading": {"downloading", "stalledDL", "forcedDL", "queuedDL", "metaDL", "forcedMetaDL"},
+    "paused": {"pausedUP", "pausedDL", "stoppedUP", "stoppedDL"},
+    "error": {"error", "missingFiles"},
+}
+
+# Phases où le suivi n'a plus rien à montrer (vérification terminée ou échouée)
+TERMINAL_PHASES = {"seeding", "error"}
+
+
+def phase(state: Optional[str]) -> str:
+    for name, states in PHASES.items():
+        if state in states:
+            return name
+    return "unknown"
+
+
+class SeedingTracker:
+    """Miroir en mémoire de l'état des torrents ajoutés pour seeding
+
+    Alimenté par sync/maindata: avec le rid du dernier échange, qBittorrent
+    ne renvoie que les champs modifiés et les torrents retirés, ce qui coûte
+    bien moins qu'un torrents/info complet à chaque interrogation. La tâche
+    de fond ne tourne que tant qu'au moins un torrent est suivi: elle
+    s'arrête quand le dernier est retiré et track() la relance.
+
+    Un torrent arrivé dans une phase terminale (TERMINAL_PHASES) ou retiré
+    de qBittorrent cesse d'être suivi après qbittorrent_sync_retention
+    secondes, le temps que les clients voient son dernier état.
+
+    Chaque changement d'un torrent suivi incrémente version et réveille les
+    abonnés (flux SSE de /torrent/seeding/events). Les primitives asyncio
+    sont créées à la première utilisation, dans la boucle courante.
+    """
+
+    def __init__(self):
+        self.rid = 0
+        self.version = 0
+        self.synced_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._torrents: Dict[str, dict] = {}
+        self._tracked: Dict[str, float] = {}
+        # Hash suivi -> date à laquelle il a atteint une phase terminale (ou a été retiré)
+        self._finished: Dict[str, float] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._credentials: Optional[Callable[[], Credentials]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _event(self, name: str) -> asyncio.Event:
+        event = getattr(self, name)
+        if event is None:
+            event = asyncio.Event()
+            setattr(self, name, event)
+        return event
+
+    def track(self, hashes: Iterable[str]):
+        """Suit ces torrents (info hash); la prochaine synchronisation est avancée"""
+        added = False
+        for torrent_hash in hashes:
+            if torrent_hash and torrent_hash.lower() not in self._tracked:
+                self._tracked[torrent_hash.lower()] = time.time()
+                added = True
+        if added:
+            self._notify()
+            if self._wakeup is not None:
+                self._wakeup.set()
+            self._ensure_running()
+
+    def untrack(self, torrent_hash: str) -> bool:
+        if self._tracked.pop(torrent_hash.lower(), None) is None:
+            return False
+        self._finished.pop(torrent_hash.lower(), None)
+        self._notify()
+        return True
+
+    @property
+    def tracked(self) -> list:
+        return list(self._tracked)
+
+    def _notify(self):
+        self.version += 1
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def _mark_finished(self, torrent_hash: str, now: float):
+        if torrent_hash in self._tracked:
+            self._finished.setdefault(torrent_hash, now)
+
+    def prune(self) -> bool:
+        """Cesse de suivre les torrents terminés depuis plus que la rétention"""
+        limit = time.time() - settings.qbittorrent_sync_retention
+        expired = [h for h, finished_at in self._finished.items() if finished_at <= limit]
+        for torrent_hash in expired:
+            self._finished.pop(torrent_hash)
+            self._tracked.pop(torrent_hash, None)
+        if expired:
+            self._notify()
+        return bool(expired)
+
+    def apply(self, data: dict) -> bool:
+        """Applique une réponse de sync/maindata; True si un torrent suivi a changé"""
+        changed = False
+        now = time.time()
+        if data.get("full_update"):
+            changed = any(h in self._tracked for h in self._torrents)
+            self._torrents = {}
+        for torrent_hash, fields in (data.get("torrents") or {}).items():
+            update = {key: value for key, value in fields.items() if key in FIELDS}
+            torrent = self._torrents.setdefault(torrent_hash, {})
+            if torrent_hash in self._tracked and any(torrent.get(k) != v for k, v in update.items()):
+                changed = True
+            torrent.update(update)
+            if phase(torrent.get("state")) in TERMINAL_PHASES:
+                self._mark_finished(torrent_hash, now)
+            else:
+                self._finished.pop(torrent_hash, None)
+        for torrent_hash in data.get("torrents_removed") or []:
+            if self._torrents.pop(torrent_hash, None) is not None and torrent_hash in self._tracked:
+                changed = True
+            self._mark_finished(torrent_hash, now)
+        if data.get("full_update"):
+            # Suivi avant cet échange mais inconnu de qBittorrent: absent
+            for torrent_hash, tracked_at in self._tracked.items():
+                if torrent_hash not in self._torrents and tracked_at < now:
+                    self._mark_finished(torrent_hash, now)
+        self.rid = data.get("rid", self.rid)
+        return changed
+
+    async def sync(self, client: AsyncQBittorrentClient):
+        """Un échange sync/maindata; une erreur repart d'une mise à jour complète"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            was_error = self.error
+            try:
+                data = await client.maindata(self.rid)
+            except QBittorrentError as e:
+                self.rid = 0
+                self.error = str(e)
+                if was_error != self.error:
+                    self._notify()
+                raise
+            changed = self.apply(data)
+            self.error = None
+            first_sync = self.synced_at is None
+            self.synced_at = time.time()
+            if changed or was_error or first_sync:
+                self._notify()
+            self.prune()
+
+    def snapshot(self) -> dict:
+        torrents = []
+        for torrent_hash, tracked_at in self._tracked.items():
+            torrent = self._torrents.get(torrent_hash)
+            if torrent is None:
+                # Pas (encore) vu par qBittorrent, ou retiré depuis
+                state = "absent" if self.synced_at is not None and self.synced_at > tracked_at else "unknown"
+                torrents.append({"hash": torrent_hash, "tracked_at": tracked_at, "state": None, "phase": state})
+            else:
+                torrents.append({"hash": torrent_hash, "tracked_at": tracked_at, **torrent,
+                                 "phase": phase(torrent.get("state"))})
+        return {
+            "version": self.version,
+            "rid": self.rid,
+            "synced_at": self.synced_at,
+            "error": self.error,
+            "torrents": torrents,
+        }
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Attend une version plus récente que version (False si timeout)"""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._event("_changed").wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self, credentials: Callable[[], Credentials]):
+        wakeup = self._event("_wakeup")
+        while self._tracked:
+            wakeup.clear()
+            try:
+                await self.sync(qbittorrent_async.client(credentials()))
+            except QBittorrentError as e:
+                logger.debug("Suivi du seeding: %s", e)
+            except Exception:
+                logger.exception("Suivi du seeding: erreur inattendue")
+            if not self._tracked:
+                break
+            try:
+                await asyncio.wait_for(wakeup.wait(), settings.qbittorrent_sync_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _ensure_running(self):
+        if self._credentials is None or not self._tracked:
+            return
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run(self._credentials))
+
+    def start(self, credentials: Callable[[], Credentials]):
+        """Active la synchronisation dans la boucle courante (lifespan)
+
+        La tâche ne démarre que lorsqu'un torrent est suivi.
+        """
+        if settings.qbittorrent_sync_interval <= 0:
+            return
+        self._credentials = credentials
+        self._ensure_running()
+
+    async def stop(self):
+        self._credentials = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+seeding_tracker = SeedingTracker()
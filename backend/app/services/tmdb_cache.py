@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (données, encore fraîches)
+CachedResponse = Tuple[Any, bool]
+
+
+class TMDBCache:
+    """Cache des réponses TMDB: LRU en mémoire devant une base SQLite
+
+    La clé couvre l'endpoint et les paramètres envoyés, langue comprise
+    (la clé API en est exclue). Chaque réponse est fraîche pendant la durée
+    de son endpoint (recherches: tmdb_cache_search_ttl, fiches:
+    tmdb_cache_details_ttl), puis périmée pendant tmdb_cache_stale_ttl:
+    elle est encore servie, le temps que TMDBService la rafraîchisse en
+    tâche de fond. Au-delà, elle n'est plus utilisée.
+
+    Depuis la boucle d'événements, aget/aput font les accès SQLite dans un
+    thread; les last_used des hits (mémoire comme disque) sont écrits par
+    lots, pour que l'éviction sur disque garde les entrées les plus utilisées.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        endpoint TEXT NOT NULL,
+        data TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+    """
+
+    MAX_ENTRIES = 5000
+    # L'éviction sur disque n'est faite qu'une écriture sur EVICT_EVERY
+    EVICT_EVERY = 100
+    # Les last_used des hits sont écrits au plus toutes les N secondes
+    TOUCH_FLUSH_INTERVAL = 60
+
+    def __init__(self, db_path: Optional[Path] = None, memory_entries: Optional[int] = None):
+        self._db_path = db_path
+        self._memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._puts = 0
+        self.metrics: Dict[str, int] = {
+            "memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0,
+            "revalidations": 0, "revalidation_errors": 0,
+        }
+
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = settings.data_path / "tmdb_cache.db"
+        return self._db_path
+
+    @property
+    def memory_entries(self) -> int:
+        return self._memory_entries or settings.tmdb_cache_memory_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(self.SCHEMA)
+                    conn.commit()
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """endpoint + paramètres triés (langue comprise, sans la clé API)"""
+        query = {key: value for key, value in params.items() if key != "api_key"}
+        return f"{endpoint}?{json.dumps(query, sort_keys=True, default=str)}"
+
+    @staticmethod
+    def ttl(endpoint: str) -> int:
+        if endpoint.startswith("/search/"):
+            return settings.tmdb_cache_search_ttl
+        return settings.tmdb_cache_details_ttl
+
+    def _remember(self, key: str, data: Any, expires_at: float):
+        with self._memory_lock:
+            self._memory[key] = (data, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _touch(self, key: str):
+        """Note l'accès: last_used est écrit en base par lots (flush_touched)"""
+        with self._memory_lock:
+            self._touched[key] = time.time()
+
+    def _read_disk(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            row = self._connect().execute(
+                "SELECT data, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            return json.loads(row[0]), row[1]
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Cache TMDB indisponible: %s", e)
+            return None
+
+    def _from_memory(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        return entry
+
+    def _result(self, key: str, entry: Optional[Tuple[Any, float]], layer: str) -> Optional[CachedResponse]:
+        now = time.time()
+        if entry is None or now > entry[1] + settings.tmdb_cache_stale_ttl:
+            self.metrics["misses"] += 1
+            return None
+        self._touch(key)
+        data, expires_at = entry
+        fresh = now <= expires_at
+        self.metrics[layer] += 1
+        if not fresh:
+            self.metrics["stale_hits"] += 1
+        return data, fresh
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """(données, fraîches) ou None si absente ou trop ancienne (bloquant)"""
+        entry = self._from_memory(key)
+        if entry is not None:
+            return self._result(key, entry, "memory_hits")
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, *entry)
+        return self._result(key, entry, "disk_hits")
+
+    async def aget(self, key: str) -> Optional[CachedResponse]:
+        """Comme get: la mémoire est lue sur place, la base dans un thread"""
+        entry = self._from_memory(key)
+        if entry is not None:
+            result = self._result(key, entry, "memory_hits")
+        else:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._remember(key, *entry)
+            result = self._result(key, entry, "disk_hits")
+        if time.monotonic() - self._flushed_at > self.TOUCH_FLUSH_INTERVAL:
+            self._flushed_at = time.monotonic()
+            await asyncio.to_thread(self.flush_touched)
+        return result
+
+    def flush_touched(self):
+        """Écrit en une transaction les last_used accumulés (éviction LRU sur disque)"""
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        try:
+            conn = self._connect()
+            conn.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                             [(used, key) for key, used in touched.items()])
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache TMDB: écriture impossible: %s", e)
+
+    def _write_disk(self, key: str, endpoint: str, data: Any, fetched_at: float, expires_at: float):
+        self.flush_touched()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, data, fetched_at, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, json.dumps(data), fetched_at, expires_at, fetched_at)
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.MAX_ENTRIES,)
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache TMDB: écriture impossible: %s", e)
+
+    def put(self, key: str, endpoint: str, data: Any):
+        now = time.time()
+        expires_at = now + self.ttl(endpoint)
+        self._remember(key, data, expires_at)
+        self._write_disk(key, endpoint, data, now, expires_at)
+
+    async def aput(self, key: str, endpoint: str, data: Any):
+        """Comme put: la mémoire est à jour tout de suite, la base dans un thread"""
+        now = time.time()
+        expires_at = now + self.ttl(endpoint)
+        self._remember(key, data, expires_at)
+        await asyncio.to_thread(self._write_disk, key, endpoint, data, now, expires_at)
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+            self._touched.clear()
+        conn = self._connect()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+
+    def stats(self) -> dict:
+        try:
+            count, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            count, size = 0, 0
+        hits = self.metrics["memory_hits"] + self.metrics["disk_hits"]
+        lookups = hits + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": count,
+            "disk_bytes": size,
+        }
+
+    def close(self):
+        self.flush_touched()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+tmdb_cache = TMDBCache()
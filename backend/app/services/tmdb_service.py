@@ -1,7 +1,9 @@
 import httpx
+import asyncio
 import logging
 from typing import Optional, List, Dict, Any
 from app.config import settings, user_settings
+from app.services.tmdb_cache import TMDBCache, tmdb_cache
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +12,12 @@ class TMDBService:
     BASE_URL = "https://api.themoviedb.org/3"
     IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
     
-    def __init__(self):
+    def __init__(self, cache: Optional[TMDBCache] = None):
         self._client: Optional[httpx.AsyncClient] = None
+        self._cache = cache
+        # Appels en cours par clé de requête, partagés par les demandes identiques
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
     
     def _get_client(self) -> httpx.AsyncClient:
         """Réutilise un client HTTP unique avec timeout"""
@@ -54,7 +60,11 @@ class TMDBService:
         return params
     
     async def _make_request(self, endpoint: str, params: dict = None) -> Optional[Dict]:
-        """Effectue une requête GET vers l'API TMDB
+        """Effectue une requête GET vers l'API TMDB, via le cache s'il y en a un
+        
+        Une réponse périmée mais encore dans la fenêtre tmdb_cache_stale_ttl
+        est renvoyée tout de suite et rafraîchie en tâche de fond. Les
+        requêtes identiques simultanées partagent un seul appel à TMDB.
         
         Args:
             endpoint: Endpoint API (ex: "/search/movie")
@@ -67,10 +77,72 @@ class TMDBService:
         if not api_key:
             return None
         
+        query = self._build_params(**(params or {}))
+        key = TMDBCache.make_key(endpoint, query)
+        store = self._cache is not None and settings.tmdb_cache_enabled
+        if store:
+            cached = await self._cache.aget(key)
+            if cached is not None:
+                data, fresh = cached
+                if not fresh:
+                    self._revalidate(key, endpoint, query)
+                return data
+        
+        if key in self._inflight:
+            self.coalesced += 1
+        # shield: un appelant annulé (client déconnecté) n'annule pas l'appel partagé
+        return await asyncio.shield(self._start_fetch(key, endpoint, query, store))
+    
+    def _start_fetch(self, key: str, endpoint: str, query: dict, store: bool) -> asyncio.Task:
+        """Appel à TMDB pour cette clé: celui en cours s'il y en a un (single-flight)"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+        
+        async def fetch():
+            data = await self._fetch(endpoint, query)
+            if data is not None and store:
+                await self._cache.aput(key, endpoint, data)
+            return data
+        
+        task = asyncio.get_running_loop().create_task(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+    
+    def _revalidate(self, key: str, endpoint: str, query: dict):
+        """Rafraîchit une réponse périmée en tâche de fond (une seule fois par clé)"""
+        if key in self._inflight:
+            return
+        
+        def done(task: asyncio.Task):
+            if task.cancelled():
+                return
+            error = task.exception()
+            if error is None and task.result() is not None:
+                self._cache.metrics["revalidations"] += 1
+                return
+            self._cache.metrics["revalidation_errors"] += 1
+            if error is not None:
+                logger.info("TMDB: rafraîchissement de %s impossible: %s", endpoint, error)
+        
+        self._start_fetch(key, endpoint, query, store=True).add_done_callback(done)
+    
+    def cache_stats(self) -> dict:
+        if self._cache is None:
+            return {"enabled": False, "coalesced": self.coalesced}
+        return {"enabled": bool(settings.tmdb_cache_enabled), "coalesced": self.coalesced, **self._cache.stats()}
+    
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+    
+    async def _fetch(self, endpoint: str, query: dict) -> Optional[Dict]:
+        """GET endpoint sur l'API TMDB avec les paramètres déjà construits"""
         client = self._get_client()
         response = await client.get(
             f"{self.BASE_URL}{endpoint}",
-            params=self._build_params(**(params or {})),
+            params=query,
             headers=self._get_headers()
         )
         
@@ -191,4 +263,4 @@ class TMDBService:
         }
 
 
-tmdb_service = TMDBService()
+tmdb_service = TMDBService(cache=tmdb_cache)
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import contextvars
+import logging
+import os
+import threading
+
+from app.models.torrent import TorrentCreate
+from app.services.directory_size_service import directory_size_service
+from app.services.job_service import Job, job_service
+from app.services.piece_hash_service import piece_hasher
+from app.services.qbittorrent_service import qbittorrent_service
+from app.utils.disks import is_rotational, physical_disk_id
+from app.utils.fs_executor import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class TorrentBatchService:
+    """Création d'un lot de torrents dans une seule tâche de fond
+
+    Les sources sont regroupées par disque physique et les disques
+    différents sont lus en parallèle. Sur un disque mécanique, les lectures
+    sont sérialisées (les lectures concurrentes s'y transforment en seeks);
+    sur SSD/NVMe, le hachage garde ses lectures parallèles. Le hachage passe par un pool partagé par tout le lot, pour
+    ne pas multiplier les threads par le nombre de torrents.
+
+    Chaque source a son résultat dans job.details["items"], mis à jour dès
+    qu'elle est terminée; l'échec d'une source n'interrompt pas le lot.
+    """
+
+    @staticmethod
+    def _source_size(path: str) -> int:
+        try:
+            if os.path.isdir(path):
+                return directory_size_service.get_size(path)
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _disk_of(path: str) -> str:
+        try:
+            return physical_disk_id(path)
+        except OSError:
+            # Source introuvable: l'erreur sera rapportée par create_torrent_sync
+            return "missing"
+
+    @staticmethod
+    def _serialize_reads(disk: str) -> bool:
+        return is_rotational(disk)
+
+    def group_by_disk(self, items: List[TorrentCreate]) -> Dict[str, List[int]]:
+        """Indices des sources, par disque physique (ordre d'origine conservé)"""
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(self._disk_of(item.source_path), []).append(index)
+        return groups
+
+    def start_batch_job(self, items: List[TorrentCreate]) -> Job:
+        def run(job: Job) -> List[dict]:
+            sizes = [self._source_size(item.source_path) for item in items]
+            bytes_total = sum(sizes)
+            results = [
+                {"index": index, "source_path": item.source_path, "status": "pending"}
+                for index, item in enumerate(items)
+            ]
+            hashed = [0] * len(items)
+            lock = threading.Lock()
+            counters = {"done": 0, "succeeded": 0}
+
+            def publish():
+                job.set_details(items=[dict(result) for result in results],
+                                succeeded=counters["succeeded"])
+                job.update(counters["done"], len(items), sum(hashed), bytes_total)
+
+            def process(index: int, read_lock: Optional[threading.Lock], pool: ThreadPoolExecutor):
+                item = items[index]
+
+                def progress(pieces_done: int, pieces_total: int, bytes_done: int, total: int):
+                    with lock:
+                        hashed[index] = bytes_done
+                        results[index].update(pieces_done=pieces_done, pieces_total=pieces_total)
+                        job.update(counters["done"], len(items), sum(hashed), bytes_total)
+
+                with lock:
+                    results[index]["status"] = "running"
+                    publish()
+                success, result = qbittorrent_service.create_torrent_sync(
+                    item.source_path, item.name, item.piece_size, item.private,
+                    item.tracker_url, progress, read_lock, pool
+                )
+                with lock:
+                    counters["done"] += 1
+                    hashed[index] = sizes[index]
+                    if success:
+                        counters["succeeded"] += 1
+                        results[index].update(status="completed", result=result)
+                    else:
+                        results[index].update(status="failed", error=result.get("error", "Erreur inconnue"))
+                        logger.warning("Lot de torrents: échec pour %s: %s",
+                                       item.source_path, results[index]["error"])
+                    publish()
+
+            def read_disk(disk: str, indices: List[int], pool: ThreadPoolExecutor):
+                read_lock = threading.Lock() if self._serialize_reads(disk) else None
+                for index in indices:
+                    check_cancelled()
+                    process(index, read_lock, pool)
+
+            groups = self.group_by_disk(items)
+            with lock:
+                publish()
+                job.set_details(disks=len(groups))
+            pool = ThreadPoolExecutor(max_workers=max(1, piece_hasher.workers),
+                                      thread_name_prefix="batch-hash")
+            readers = ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="batch-disk")
+            try:
+                futures = [
+                    readers.submit(contextvars.copy_context().run, read_disk, disk, indices, pool)
+                    for disk, indices in groups.items()
+                ]
+                for future in futures:
+                    future.result()
+            finally:
+                readers.shutdown(wait=True)
+                pool.shutdown(wait=True)
+
+            job.message = f"{counters['succeeded']}/{len(items)} torrents créés"
+            return results
+
+        description = f"{len(items)} torrents"
+        if len(items) == 1:
+            description = Path(items[0].source_path).name
+        return job_service.submit("torrent_batch", run, description=description)
+
+
+torrent_batch_service = TorrentBatchService()
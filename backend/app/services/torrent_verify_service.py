@@ -0,0 +1,259 @@
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import torf
+
+from app.config import settings
+from app.models.torrent import TorrentVerification
+from app.services.job_service import Job, job_service
+from app.services.piece_hash_cache import PieceHashCache, piece_hash_cache
+from app.services.piece_hash_service import PieceHasher, PieceProgress, piece_hasher
+
+logger = logging.getLogger(__name__)
+
+
+class VerificationCache:
+    """Vérifications réussies, indexées par info_hash et identité du contenu
+
+    L'identité est celle du cache des pièces (inode, taille, mtime de chaque
+    fichier): tant qu'aucun fichier n'est modifié ou remplacé, un contenu
+    vérifié le reste et peut être ajouté sans recheck.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS verifications (
+        key TEXT PRIMARY KEY,
+        info_hash TEXT NOT NULL,
+        content_path TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        checked_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_verifications_checked_at ON verifications(checked_at);
+    """
+
+    MAX_ENTRIES = 5000
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = settings.data_path / "verifications.db"
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(self.SCHEMA)
+                    conn.commit()
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def make_key(info_hash: str, content_key: str) -> str:
+        return hashlib.sha1(f"{info_hash}\0{content_key}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Mode de la vérification réussie mémorisée (sample/full), ou None"""
+        try:
+            row = self._connect().execute(
+                "SELECT mode FROM verifications WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache des vérifications indisponible: %s", e)
+            return None
+        return row[0] if row else None
+
+    def put(self, key: str, info_hash: str, content_path: str, mode: str):
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO verifications (key, info_hash, content_path, mode, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, info_hash, content_path, mode, time.time())
+            )
+            conn.execute(
+                "DELETE FROM verifications WHERE key IN (SELECT key FROM verifications "
+                "ORDER BY checked_at DESC LIMIT -1 OFFSET ?)",
+                (self.MAX_ENTRIES,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache des vérifications: écriture impossible: %s", e)
+
+    def discard(self, key: str):
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM verifications WHERE key = ?", (key,))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache des vérifications: suppression impossible: %s", e)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class TorrentVerifier:
+    """Vérifie localement qu'un contenu correspond à un .torrent existant
+
+    Mode full: toutes les pièces. Mode sample: la première et la dernière
+    pièce de chaque fichier (troncature, décalage) et un échantillon
+    réparti sur le reste. Les pièces sont hachées en parallèle par le
+    PieceHasher. Si le cache des pièces connaît déjà ce contenu (torrent
+    créé ici), la vérification complète ne lit rien.
+    """
+
+    def __init__(self, hasher: Optional[PieceHasher] = None,
+                 cache: Optional[VerificationCache] = None,
+                 pieces_cache: Optional[PieceHashCache] = None):
+        self._hasher = hasher
+        self.cache = cache or VerificationCache()
+        self.pieces_cache = pieces_cache
+
+    @property
+    def hasher(self) -> PieceHasher:
+        return self._hasher or piece_hasher
+
+    @staticmethod
+    def content_files(torrent: torf.Torrent, content_path: str) -> List[Tuple[str, int]]:
+        """Fichiers du torrent (chemin local, taille), dans l'ordre des pièces"""
+        if torrent.mode == "singlefile":
+            return [(content_path, torrent.files[0].size)]
+        return [(os.path.join(content_path, *file.parts[1:]), file.size) for file in torrent.files]
+
+    @staticmethod
+    def sample_pieces(files: List[Tuple[str, int]], piece_size: int, count: int) -> Set[int]:
+        offsets = PieceHasher._offsets(files)
+        pieces = -(-offsets[-1] // piece_size)
+        indices = set()
+        for (_, size), offset in zip(files, offsets):
+            if size > 0:
+                indices.add(offset // piece_size)
+                indices.add((offset + size - 1) // piece_size)
+        if pieces > 0 and count > 0:
+            step = max(1, pieces // count)
+            indices.update(range(random.randrange(step), pieces, step))
+        return indices
+
+    def _content_key(self, torrent: torf.Torrent, content_path: str,
+                     files: List[Tuple[str, int]]) -> Optional[str]:
+        return PieceHashCache.make_key(content_path, files, torrent.piece_size)
+
+    def _trusted_mode(self, torrent: torf.Torrent, content_path: str,
+                      files: List[Tuple[str, int]]) -> Tuple[Optional[str], Optional[str]]:
+        """(clé du contenu, mode de vérification déjà acquis ou None)"""
+        content_key = self._content_key(torrent, content_path, files)
+        if content_key is None:
+            return None, None
+        mode = self.cache.get(self.cache.make_key(torrent.infohash, content_key))
+        if mode is None and self.pieces_cache is not None and settings.torrent_hash_cache_enabled:
+            # Contenu haché ici même: ses pièces sont connues, rien à relire
+            pieces = self.pieces_cache.get(content_key)
+            if pieces is not None and pieces == torrent.metainfo["info"]["pieces"]:
+                mode = "full"
+        return content_key, mode
+
+    def verify(self, torrent_path: str, content_path: str, mode: str = "sample",
+               progress: Optional[PieceProgress] = None) -> TorrentVerification:
+        started = time.monotonic()
+        torrent = torf.Torrent.read(torrent_path)
+        files = self.content_files(torrent, content_path)
+        result = TorrentVerification(
+            info_hash=torrent.infohash, content_path=content_path, mode=mode,
+            ok=False, pieces_total=torrent.pieces
+        )
+
+        for path, size in files:
+            try:
+                if os.path.getsize(path) != size:
+                    result.missing_files.append(path)
+            except OSError:
+                result.missing_files.append(path)
+        if result.missing_files:
+            result.duration = time.monotonic() - started
+            return result
+
+        content_key, trusted = self._trusted_mode(torrent, content_path, files)
+        if trusted == "full" or trusted == mode:
+            result.ok = result.cached = True
+            result.mode = trusted
+            result.pieces_checked = torrent.pieces if trusted == "full" else 0
+            result.duration = time.monotonic() - started
+            return result
+
+        if mode == "full":
+            indices = set(range(torrent.pieces))
+        else:
+            indices = self.sample_pieces(files, torrent.piece_size, settings.torrent_verify_sample_pieces)
+        expected = torrent.metainfo["info"]["pieces"]
+        digests = self.hasher.hash_selected(files, torrent.piece_size, indices, progress)
+        result.pieces_checked = len(digests)
+        result.mismatched = sorted(
+            index for index, digest in digests.items()
+            if digest != expected[index * 20:(index + 1) * 20]
+        )
+        result.ok = not result.mismatched
+
+        # Le contenu ne doit pas avoir changé pendant la lecture
+        if content_key is not None and self._content_key(torrent, content_path, files) == content_key:
+            key = self.cache.make_key(torrent.infohash, content_key)
+            if result.ok:
+                self.cache.put(key, torrent.infohash, content_path, mode)
+            else:
+                self.cache.discard(key)
+        result.duration = time.monotonic() - started
+        logger.info("Vérification %s de %s: %s (%d pièces lues, %d différentes)",
+                    mode, content_path, "conforme" if result.ok else "non conforme",
+                    result.pieces_checked, len(result.mismatched))
+        return result
+
+    def is_trusted(self, torrent_path: str, content_path: str) -> bool:
+        """Vrai si le contenu a été vérifié (et n'a pas changé): ajout sans recheck possible"""
+        try:
+            torrent = torf.Torrent.read(torrent_path)
+            files = self.content_files(torrent, content_path)
+            _, mode = self._trusted_mode(torrent, content_path, files)
+        except Exception as e:
+            logger.debug("Vérification inconnue pour %s: %s", content_path, e)
+            return False
+        return mode == "full" or (mode == "sample" and settings.torrent_verify_trust_sample)
+
+    def start_verify_job(self, torrent_path: str, content_path: str, mode: str = "sample") -> Job:
+        def run(job: Job) -> dict:
+            def progress(pieces_done: int, pieces_total: int, bytes_done: int, bytes_total: int):
+                job.set_details(pieces_done=pieces_done, pieces_total=pieces_total)
+                job.update(0, 1, bytes_done, bytes_total)
+
+            result = self.verify(torrent_path, content_path, mode, progress)
+            job.update(1, 1, job.bytes_done, job.bytes_total)
+            if result.missing_files:
+                job.message = f"{len(result.missing_files)} fichiers absents ou de taille différente"
+            elif result.ok:
+                job.message = "Contenu conforme" + (" (déjà vérifié)" if result.cached else "")
+            else:
+                job.message = f"{len(result.mismatched)} pièces différentes"
+            return result.model_dump()
+
+        return job_service.submit("verify", run, description=f"{Path(torrent_path).name} ({mode})")
+
+
+torrent_verifier = TorrentVerifier(pieces_cache=piece_hash_cache)
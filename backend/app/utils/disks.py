@@ -0,0 +1,39 @@
+import os
+
+SYS_BLOCK = "/sys/block"
+
+
+def physical_disk_id(path: str) -> str:
+    """Identifiant du disque physique qui porte path
+
+    Sous Linux, le périphérique (major:minor) est remonté via /sys jusqu'au
+    disque entier: deux partitions de sda donnent "sda". Ailleurs (ou pour
+    un système de fichiers réseau/virtuel sans entrée /sys), on se rabat
+    sur st_dev: un identifiant par système de fichiers.
+    """
+    st_dev = os.stat(path).st_dev
+    try:
+        block = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+        if os.path.isdir(block):
+            if os.path.exists(os.path.join(block, "partition")):
+                block = os.path.dirname(block)
+            return os.path.basename(block)
+    except (AttributeError, OSError):
+        pass
+    return f"dev:{st_dev}"
+
+
+def is_rotational(disk_id: str) -> bool:
+    """Vrai si le disque (voir physical_disk_id) est un disque mécanique
+
+    Lu dans /sys/block/<disque>/queue/rotational. SSD/NVMe, disques inconnus
+    et identifiants de repli (st_dev) donnent False: les lectures
+    parallèles y sont sans pénalité de seek.
+    """
+    if os.sep in disk_id or disk_id.startswith("dev:"):
+        return False
+    try:
+        with open(os.path.join(SYS_BLOCK, disk_id, "queue", "rotational")) as f:
+            return f.read().strip() == "1"
+    except OSError:
+        return False
@@ -0,0 +1,136 @@
+from typing import Callable, Optional
+import errno
+import logging
+import os
+import shutil
+
+from app.utils.fs_executor import check_cancelled
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ioctl(dest_fd, FICLONE, src_fd): clone des extents (btrfs, XFS reflink=1)
+FICLONE = 0x40049409
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Reçoit, dans l'ordre, les octets copiés en espace utilisateur
+CopySink = Callable[[bytes], None]
+
+# Erreurs signifiant "méthode non disponible ici": on passe à la suivante
+_UNSUPPORTED = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP,
+    errno.ENOTTY, errno.EBADF, errno.EPERM, errno.ETXTBSY,
+}
+
+
+def _reflink(src_fd: int, dst_fd: int):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink non disponible")
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+
+
+def _copy_range(src_fd: int, dst_fd: int, size: int) -> int:
+    offset = 0
+    while offset < size:
+        check_cancelled()
+        copied = os.copy_file_range(src_fd, dst_fd, min(CHUNK_SIZE, size - offset), offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+    return offset
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> int:
+    offset = 0
+    while offset < size:
+        check_cancelled()
+        sent = os.sendfile(dst_fd, src_fd, offset, min(CHUNK_SIZE, size - offset))
+        if sent == 0:
+            break
+        offset += sent
+    return offset
+
+
+def _stream_copy(src, dst, sink: Optional[CopySink] = None):
+    while True:
+        check_cancelled()
+        chunk = src.read(1024 * 1024)
+        if not chunk:
+            break
+        if sink is not None:
+            sink(chunk)
+        dst.write(chunk)
+
+
+def transfer_file(source: str, destination: str, sink: Optional[CopySink] = None) -> str:
+    """Copie un fichier avec la méthode la moins coûteuse disponible
+
+    Ordre: reflink (FICLONE, aucune donnée copiée), copy_file_range (copie
+    dans le noyau, déléguée au serveur sur NFS 4.2), sendfile, puis copie
+    en espace utilisateur. Une méthode qui échoue avant d'avoir écrit quoi
+    que ce soit laisse la place à la suivante. La destination ne doit pas
+    exister; elle est supprimée si la copie échoue ou est annulée.
+
+    Avec un sink, les octets doivent de toute façon être lus: on saute les
+    copies noyau (invisibles) au profit de la copie en espace utilisateur,
+    dont chaque bloc est aussi passé au sink (hachage pendant la copie).
+    Un reflink reste préféré: il ne lit rien.
+
+    Returns:
+        La stratégie utilisée: reflink, copy_file_range, sendfile ou copy
+    """
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        try:
+            src_fd, dst_fd = src.fileno(), dst.fileno()
+            size = os.fstat(src_fd).st_size
+            strategy = _transfer_fds(src, dst, src_fd, dst_fd, size, sink)
+        except BaseException:
+            dst.close()
+            try:
+                os.unlink(destination)
+            except OSError:
+                pass
+            raise
+    shutil.copystat(source, destination)
+    return strategy
+
+
+def _transfer_fds(src, dst, src_fd: int, dst_fd: int, size: int,
+                  sink: Optional[CopySink] = None) -> str:
+    try:
+        _reflink(src_fd, dst_fd)
+        return "reflink"
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+
+    attempts = []
+    if sink is None and hasattr(os, "copy_file_range"):
+        attempts.append(("copy_file_range", _copy_range))
+    if sink is None and hasattr(os, "sendfile"):
+        attempts.append(("sendfile", _sendfile))
+    for strategy, method in attempts:
+        try:
+            done = method(src_fd, dst_fd, size)
+        except OSError as e:
+            # Échec en cours de route: on ne sait pas reprendre proprement
+            if e.errno not in _UNSUPPORTED or os.fstat(dst_fd).st_size > 0:
+                raise
+            logger.debug("Transfert: %s indisponible (%s)", strategy, e)
+            continue
+        if done == size:
+            return strategy
+        # Fichier source modifié pendant la copie: repli sur la copie simple
+        os.ftruncate(dst_fd, 0)
+        break
+
+    src.seek(0)
+    dst.seek(0)
+    _stream_copy(src, dst, sink)
+    return "copy"
+
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("fs_cancel_event", default=None)
+
+
+class OperationCancelled(BaseException):
+    """Opération disque annulée (client déconnecté)
+
+    Hérite de BaseException, comme asyncio.CancelledError, pour ne pas être
+    avalée par les `except Exception` des services: un résultat partiel ne
+    doit jamais être mis en cache comme s'il était complet.
+    """
+
+
+def check_cancelled():
+    """À appeler dans les boucles de parcours disque exécutées via fs_executor"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise OperationCancelled()
+
+
+def run_cancellable(event: threading.Event, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Exécute func (dans le thread courant) avec event comme signal d'annulation
+
+    Utilisé par les workers de fs_executor et par les tâches de fond (jobs).
+    """
+    def call():
+        _cancel_event.set(event)
+        return func(*args, **kwargs)
+
+    return contextvars.copy_context().run(call)
+
+
+class FilesystemExecutor:
+    """Pool de threads borné dédié aux opérations disque
+
+    Les handlers async ne bloquent plus la boucle d'événements, et le nombre
+    de parcours simultanés est limité (un disque en veille ne monopolise pas
+    tous les threads de l'application).
+    """
+
+    DISCONNECT_POLL_INTERVAL = 0.5
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers or settings.fs_max_workers,
+                    thread_name_prefix="fs"
+                )
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, request=None, **kwargs) -> Any:
+        """Exécute func dans le pool; l'annule si le client se déconnecte
+
+        L'annulation est coopérative: les boucles de parcours appellent
+        check_cancelled() et lèvent OperationCancelled.
+        """
+        event = threading.Event()
+        call = functools.partial(func, *args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.executor, contextvars.copy_context().run, run_cancellable, event, call
+        )
+        watcher = None
+        if request is not None:
+            watcher = asyncio.create_task(self._watch_disconnect(request, event))
+        try:
+            return await future
+        finally:
+            event.set()
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _watch_disconnect(self, request, event: threading.Event):
+        while not event.is_set():
+            if await request.is_disconnected():
+                logger.debug("Client déconnecté, annulation de %s", request.url.path)
+                event.set()
+                return
+            await asyncio.sleep(self.DISCONNECT_POLL_INTERVAL)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+fs_executor = FilesystemExecutor()
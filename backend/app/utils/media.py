@@ -0,0 +1,9 @@
+# Extensions reconnues, par type (filtres de /files)
+MEDIA_EXTENSIONS = {
+    'video': ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.ts', '.m2ts'],
+    'audio': ['.mp3', '.flac', '.wav', '.aac', '.ogg', '.m4a', '.wma', '.opus'],
+    'ebook': ['.pdf', '.epub', '.mobi', '.azw', '.cbr', '.cbz', '.djvu'],
+    'archive': ['.zip', '.rar', '.7z', '.tar', '.gz', '.iso']
+}
+
+VIDEO_EXTENSIONS = frozenset(MEDIA_EXTENSIONS['video'])
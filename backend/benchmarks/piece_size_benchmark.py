@@ -0,0 +1,110 @@
+"""Benchmark des politiques de taille de pièce
+
+Pour chaque politique: taille de pièce choisie, nombre de pièces, taille
+réelle du .torrent et débit de hachage sur un contenu synthétique, puis
+l'estimation pour des tailles de contenu réalistes (sans rien écrire).
+
+Usage (depuis backend/):
+    python -m benchmarks.piece_size_benchmark --sizes 256M,1G --files 1,50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import torf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.piece_hash_service import PieceHasher
+from app.services.piece_size_policy import POLICIES
+from app.utils.helpers import format_size
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# Contenus types pour l'estimation: (description, taille, nombre de fichiers)
+ESTIMATES = [
+    ("Épisode 720p", 1 * UNITS["G"], 1),
+    ("Film 1080p", 10 * UNITS["G"], 2),
+    ("Saison 1080p", 40 * UNITS["G"], 24),
+    ("REMUX 4K", 80 * UNITS["G"], 1),
+    ("Intégrale", 500 * UNITS["G"], 400),
+    ("Pack d'ebooks", 2 * UNITS["G"], 3000),
+]
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def write_synthetic(directory: Path, total_size: int, file_count: int):
+    """Écrit file_count fichiers totalisant total_size octets (données aléatoires)"""
+    block = os.urandom(4 * UNITS["M"])
+    base = total_size // file_count
+    for index in range(file_count):
+        size = base + (total_size - base * file_count if index == file_count - 1 else 0)
+        with open(directory / f"file{index:05d}.bin", "wb") as f:
+            while size > 0:
+                chunk = block[:min(size, len(block))]
+                f.write(chunk)
+                size -= len(chunk)
+
+
+def run_measured(total_size: int, file_count: int, workers: int):
+    with tempfile.TemporaryDirectory(prefix="piece-bench-") as tmp:
+        content = Path(tmp) / "content"
+        content.mkdir()
+        write_synthetic(content, total_size, file_count)
+        hasher = PieceHasher(workers=workers)
+
+        print(f"\n== {format_size(total_size)} en {file_count} fichier(s), {workers} worker(s)")
+        print(f"{'politique':<10} {'pièce':>10} {'pièces':>8} {'.torrent':>10} {'durée':>8} {'débit':>12}")
+        for name, policy in POLICIES.items():
+            torrent = torf.Torrent(path=str(content), private=True)
+            torrent.piece_size = policy.choose(torrent.size, len(torrent.files))
+            started = time.perf_counter()
+            hasher.generate(torrent)
+            duration = time.perf_counter() - started
+            metainfo = len(torrent.dump())
+            print(f"{name:<10} {format_size(torrent.piece_size):>10} {torrent.pieces:>8} "
+                  f"{format_size(metainfo):>10} {duration:>7.2f}s {format_size(total_size / duration):>10}/s")
+
+
+def print_estimates():
+    print("\n== Estimation pour des contenus types")
+    header = f"{'contenu':<16} {'taille':>10} {'fichiers':>8}"
+    for name in POLICIES:
+        header += f" {name:>20}"
+    print(header)
+    for label, size, files in ESTIMATES:
+        line = f"{label:<16} {format_size(size):>10} {files:>8}"
+        for policy in POLICIES.values():
+            piece = policy.choose(size, files)
+            cell = f"{format_size(piece)}/{format_size(policy.estimate_metainfo_size(size, files))}"
+            line += f" {cell:>20}"
+        print(line)
+    print("(cellule: taille de pièce / taille estimée du .torrent)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="256M", help="Tailles de contenu à générer, séparées par des virgules")
+    parser.add_argument("--files", default="1,50", help="Nombres de fichiers, séparés par des virgules")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Threads de hachage")
+    parser.add_argument("--estimate-only", action="store_true", help="N'écrire aucun contenu synthétique")
+    args = parser.parse_args()
+
+    if not args.estimate_only:
+        for size in args.sizes.split(","):
+            for files in args.files.split(","):
+                run_measured(parse_size(size), int(files), args.workers)
+    print_estimates()
+
+
+if __name__ == "__main__":
+    main()
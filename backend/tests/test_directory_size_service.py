@@ -0,0 +1,97 @@
+"""Tests unitaires pour le calcul des tailles de dossiers"""
+import pytest
+import sys
+import os
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.directory_size_service import DirectorySizeService
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "S01").mkdir()
+    (tmp_path / "S01" / "E01.mkv").write_bytes(b"a" * 100)
+    (tmp_path / "S01" / "E02.mkv").write_bytes(b"b" * 50)
+    (tmp_path / "S02" / "extras").mkdir(parents=True)
+    (tmp_path / "S02" / "extras" / "bonus.mkv").write_bytes(b"c" * 25)
+    (tmp_path / "info.nfo").write_bytes(b"d" * 5)
+    # Fichiers terminés depuis longtemps (le mtime des dossiers ne change pas)
+    old = time.time() - 86400
+    for path in tmp_path.rglob("*"):
+        if path.is_file():
+            os.utime(path, (old, old))
+    return tmp_path
+
+
+class TestDirectorySizeService:
+    """Tests pour le calcul et la mémoïsation des tailles"""
+
+    def setup_method(self):
+        self.service = DirectorySizeService()
+
+    def test_total_size(self, tree):
+        assert self.service.get_size(str(tree)) == 180
+
+    def test_subdirectory_size(self, tree):
+        assert self.service.get_size(str(tree / "S02")) == 25
+
+    def test_missing_directory(self, tree):
+        assert self.service.get_size(str(tree / "missing")) == 0
+
+    def test_file_path_returns_zero(self, tree):
+        assert self.service.get_size(str(tree / "info.nfo")) == 0
+
+    def test_unchanged_directories_not_rescanned(self, tree):
+        self.service.get_size(str(tree))
+        with patch.object(self.service, "_scan", wraps=self.service._scan) as scan:
+            assert self.service.get_size(str(tree)) == 180
+            assert scan.call_count == 0
+
+    def test_only_changed_branch_rescanned(self, tree):
+        self.service.get_size(str(tree))
+        (tree / "S01" / "E03.mkv").write_bytes(b"e" * 10)
+        os.utime(tree / "S01", ns=(1, 1))
+        with patch.object(self.service, "_scan", wraps=self.service._scan) as scan:
+            assert self.service.get_size(str(tree)) == 190
+            scanned = [call.args[0] for call in scan.call_args_list]
+        assert scanned == [str(tree / "S01")]
+
+    def test_file_growing_in_place_is_reported(self, tree):
+        assert self.service.get_size(str(tree)) == 180
+        download = tree / "S02" / "download.mkv"
+        download.write_bytes(b"f" * 10)
+        assert self.service.get_size(str(tree)) == 190
+        stat = os.stat(tree / "S02")
+        with open(download, "ab") as f:
+            f.write(b"f" * 30)
+        # Le mtime du dossier est inchangé: seul celui du fichier bouge
+        assert os.stat(tree / "S02").st_mtime_ns == stat.st_mtime_ns
+        assert self.service.get_size(str(tree)) == 220
+        assert self.service.get_size(str(tree / "S02")) == 65
+
+    def test_stream_ends_with_done(self, tree):
+        results = list(self.service.iter_directory_size(str(tree)))
+        assert results[-1]["done"] is True
+        assert results[-1]["files"] == 4
+        assert results[-1]["directories"] == 4
+
+    def test_partial_results(self, tree):
+        self.service.PROGRESS_INTERVAL = 0
+        results = list(self.service.iter_directory_size(str(tree)))
+        assert any(not r["done"] for r in results)
+        sizes = [r["size"] for r in results]
+        assert sizes == sorted(sizes)
+
+    def test_invalidate(self, tree):
+        self.service.get_size(str(tree))
+        self.service.invalidate(str(tree / "S01"))
+        with patch.object(self.service, "_scan", wraps=self.service._scan) as scan:
+            self.service.get_size(str(tree))
+            assert scan.call_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
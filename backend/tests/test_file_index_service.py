@@ -0,0 +1,146 @@
+"""Tests unitaires pour l'index SQLite des fichiers"""
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.file_index_service import FileIndexService
+
+
+@pytest.fixture
+def media_tree(tmp_path):
+    """Arborescence média minimale"""
+    root = tmp_path / "media"
+    season = root / "Show.S01"
+    season.mkdir(parents=True)
+    (season / "Show.S01E01.mkv").write_bytes(b"a" * 10)
+    (season / "Show.S01E02.mkv").write_bytes(b"b" * 20)
+    (season / "notes.txt").write_text("notes")
+    (root / "Movie.2024.mkv").write_bytes(b"c" * 30)
+    (root / ".hidden.mkv").write_bytes(b"d")
+    return root
+
+
+@pytest.fixture
+def index(media_tree, tmp_path):
+    service = FileIndexService(root=media_tree, db_path=tmp_path / "index.db", refresh_interval=3600)
+    yield service
+    service.close()
+
+
+class TestFileIndexRefresh:
+    """Tests pour la construction et le rafraîchissement incrémental"""
+
+    def test_initial_build_scans_all_directories(self, index):
+        stats = index.refresh()
+        assert stats == {"visited": 2, "rescanned": 2}
+        assert index.is_built()
+
+    def test_unchanged_tree_not_rescanned(self, index):
+        index.refresh()
+        stats = index.refresh()
+        assert stats["rescanned"] == 0
+
+    def test_new_file_detected(self, index, media_tree):
+        index.refresh()
+        (media_tree / "Show.S01" / "Show.S01E03.mkv").write_bytes(b"e")
+        os.utime(media_tree / "Show.S01", ns=(1, 1))
+        index.refresh()
+        results = index.search(str(media_tree), "e03")
+        assert [r["name"] for r in results] == ["Show.S01E03.mkv"]
+
+    def test_removed_directory_purged(self, index, media_tree):
+        index.refresh()
+        for item in (media_tree / "Show.S01").iterdir():
+            item.unlink()
+        (media_tree / "Show.S01").rmdir()
+        os.utime(media_tree, ns=(1, 1))
+        index.refresh()
+        assert index.search(str(media_tree), "show") == []
+
+    def test_symlink_loops_are_not_followed(self, index, media_tree):
+        (media_tree / "Show.S01" / "loop").symlink_to("..")
+        (media_tree / "Show.S01" / "loop2").symlink_to("..")
+
+        assert index.refresh() == {"visited": 2, "rescanned": 2}
+        assert index.refresh()["visited"] == 2
+        # Le lien est indexé comme dossier, sans son contenu
+        assert [r["name"] for r in index.search(str(media_tree), "loop")] == ["loop", "loop2"]
+        assert all(r["is_dir"] for r in index.search(str(media_tree), "loop"))
+
+
+class TestFileIndexSearch:
+    """Tests pour la recherche dans l'index"""
+
+    def test_search_substring_case_insensitive(self, index, media_tree):
+        index.refresh()
+        results = index.search(str(media_tree), "S01E0")
+        assert [r["name"] for r in results] == ["Show.S01E01.mkv", "Show.S01E02.mkv"]
+        assert results[0]["size"] == 10
+        assert results[0]["extension"] == ".mkv"
+
+    def test_search_short_query(self, index, media_tree):
+        """Les requêtes de moins de 3 caractères n'utilisent pas le FTS"""
+        index.refresh()
+        results = index.search(str(media_tree), "e0")
+        assert len(results) == 2
+
+    def test_directories_first(self, index, media_tree):
+        index.refresh()
+        results = index.search(str(media_tree), "s")
+        assert results[0]["is_dir"] is True
+        assert results[0]["name"] == "Show.S01"
+
+    def test_hidden_entries_excluded(self, index, media_tree):
+        index.refresh()
+        assert index.search(str(media_tree), "hidden") == []
+
+    def test_filter_extensions(self, index, media_tree):
+        index.refresh()
+        results = index.search(str(media_tree), "o", extensions=[".txt"])
+        names = [r["name"] for r in results]
+        assert "notes.txt" in names
+        assert "Movie.2024.mkv" not in names
+
+    def test_search_limited_to_base_path(self, index, media_tree):
+        index.refresh()
+        results = index.search(str(media_tree / "Show.S01"), "mkv")
+        assert all(r["path"].startswith(str(media_tree / "Show.S01")) for r in results)
+        assert len(results) == 2
+
+    def test_max_results(self, index, media_tree):
+        index.refresh()
+        assert len(index.search(str(media_tree), "mkv", max_results=1)) == 1
+
+    def test_search_builds_index_when_empty(self, index, media_tree):
+        results = index.search(str(media_tree), "movie")
+        assert [r["name"] for r in results] == ["Movie.2024.mkv"]
+
+    def test_search_waits_for_background_build(self, index, media_tree):
+        """La recherche sur un index vide attend le parcours de fond, sans en refaire un"""
+        release = threading.Event()
+        walk = index._refresh
+
+        def slow_walk(base_path):
+            release.wait(5)
+            return walk(base_path)
+
+        with patch.object(index, "_refresh", side_effect=slow_walk) as walks:
+            index.refresh_in_background()
+            threading.Timer(0.05, release.set).start()
+            results = index.search(str(media_tree), "movie")
+
+        assert [r["name"] for r in results] == ["Movie.2024.mkv"]
+        assert walks.call_count == 1
+
+    def test_covers(self, index, media_tree):
+        assert index.covers(str(media_tree))
+        assert index.covers(str(media_tree / "Show.S01"))
+        assert not index.covers(str(media_tree) + "2")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
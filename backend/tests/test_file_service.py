@@ -3,7 +3,7 @@ import pytest
 import sys
 import os
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -104,5 +104,259 @@ class TestFileServicePathSecurity:
             assert result == False
 
 
+@pytest.fixture
+def listing_service(tmp_path):
+    """FileService dont media_root pointe vers un dossier temporaire"""
+    from app.services.file_service import FileService
+    
+    (tmp_path / "b_dir").mkdir()
+    (tmp_path / "A_dir").mkdir()
+    (tmp_path / "z.mkv").write_bytes(b"x" * 5)
+    (tmp_path / "a.mkv").write_bytes(b"x" * 3)
+    (tmp_path / "notes.txt").write_text("n")
+    (tmp_path / ".hidden").write_text("h")
+    
+    service = FileService()
+    service.media_root = tmp_path
+    return service
+
+
+class TestFileServiceListDirectory:
+    """Tests pour le listage de dossiers"""
+    
+    def test_sorted_dirs_first(self, listing_service, tmp_path):
+        """Test tri: dossiers d'abord puis nom insensible à la casse"""
+        items = listing_service.list_directory(str(tmp_path))
+        assert [i["name"] for i in items] == ["A_dir", "b_dir", "a.mkv", "notes.txt", "z.mkv"]
+        assert items[2]["size"] == 3
+        assert items[2]["extension"] == ".mkv"
+        assert items[0]["size"] == 0
+    
+    def test_filter_type(self, listing_service, tmp_path):
+        """Test filtre par type (les dossiers restent visibles)"""
+        items = listing_service.list_directory(str(tmp_path), "video")
+        assert [i["name"] for i in items] == ["A_dir", "b_dir", "a.mkv", "z.mkv"]
+    
+    def test_missing_directory(self, listing_service, tmp_path):
+        """Test dossier inexistant"""
+        assert listing_service.list_directory(str(tmp_path / "missing")) == []
+    
+    def test_pagination_walks_all_items(self, listing_service, tmp_path):
+        """Test pagination par curseur"""
+        names = []
+        cursor = None
+        while True:
+            page = listing_service.list_directory_page(str(tmp_path), limit=2, cursor=cursor)
+            assert page["total"] == 5
+            names.extend(i["name"] for i in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert names == ["A_dir", "b_dir", "a.mkv", "notes.txt", "z.mkv"]
+    
+    def test_cursor_stable_after_insert(self, listing_service, tmp_path):
+        """Test que le curseur reste valide si une entrée est ajoutée avant"""
+        page = listing_service.list_directory_page(str(tmp_path), limit=3)
+        (tmp_path / "0_first.mkv").write_bytes(b"x")
+        next_page = listing_service.list_directory_page(str(tmp_path), limit=3, cursor=page["next_cursor"])
+        assert [i["name"] for i in next_page["items"]] == ["notes.txt", "z.mkv"]
+    
+    def test_invalid_cursor(self, listing_service, tmp_path):
+        """Test curseur invalide"""
+        with pytest.raises(ValueError):
+            listing_service.list_directory_page(str(tmp_path), cursor="not-a-cursor")
+
+
+class TestFileServiceFolderSummary:
+    """Tests pour l'analyse de dossier en un seul parcours"""
+    
+    @pytest.fixture
+    def season(self, tmp_path):
+        from app.services.file_service import FileService
+        
+        season = tmp_path / "Show.S01"
+        (season / "Extras").mkdir(parents=True)
+        (season / "Show.S01E02.mkv").write_bytes(b"x" * 20)
+        (season / "Show.S01E01.mkv").write_bytes(b"x" * 10)
+        (season / "Extras" / "Making.Of.mp4").write_bytes(b"x" * 5)
+        (season / "Show.S01.nfo").write_bytes(b"x" * 2)
+        
+        service = FileService()
+        service.media_root = tmp_path
+        return service, season
+    
+    def test_summary(self, season):
+        """Test premier épisode, comptes et tailles"""
+        service, path = season
+        summary = service.get_folder_summary(str(path))
+        
+        assert summary["first_video"]["name"] == "Making.Of.mp4"
+        assert summary["video_count"] == 3
+        assert summary["total_size"] == 37
+        assert summary["file_count"] == 4
+        assert summary["extensions"][".mkv"] == {"count": 2, "size": 30}
+        assert summary["extensions"][".nfo"] == {"count": 1, "size": 2}
+    
+    def test_episodes_detected(self, season):
+        """Test détection saison/épisode dans la liste des épisodes"""
+        service, path = season
+        episodes = service.get_folder_summary(str(path))["episodes"]
+        
+        assert [e["name"] for e in episodes] == ["Making.Of.mp4", "Show.S01E01.mkv", "Show.S01E02.mkv"]
+        assert (episodes[1]["season"], episodes[1]["episode"]) == (1, 1)
+        assert episodes[0]["episode"] is None
+    
+    def test_matches_individual_methods(self, season):
+        """Test cohérence avec first-video, video-count et directory-size"""
+        service, path = season
+        summary = service.get_folder_summary(str(path))
+        
+        assert summary["first_video"] == service.get_first_video_file(str(path))
+        assert summary["video_count"] == service.count_video_files(str(path))
+        assert summary["total_size"] == service.get_directory_size(str(path))
+    
+    def test_not_a_directory(self, season):
+        """Test fichier ou dossier hors media_root"""
+        service, path = season
+        assert service.get_folder_summary(str(path / "Show.S01E01.mkv")) is None
+        assert service.get_folder_summary("/etc") is None
+
+    
+    def test_first_video_in_subdirectory(self, season):
+        """Test premier fichier par nom, quel que soit le sous-dossier"""
+        service, path = season
+        first = service.get_first_video_file(str(path))
+        assert first["name"] == "Making.Of.mp4"
+        assert first["path"] == str(path / "Extras" / "Making.Of.mp4")
+        assert first["size"] == 5
+    
+    def test_first_video_none(self, season):
+        """Test dossier sans vidéo"""
+        service, path = season
+        (path / "empty").mkdir()
+        assert service.get_first_video_file(str(path / "empty")) is None
+
+
+class TestFileServiceStreamingSearch:
+    """Tests pour la recherche en flux (parcours disque)"""
+    
+    @pytest.fixture
+    def tree(self, tmp_path):
+        from app.services.file_service import FileService
+        
+        (tmp_path / "Show" / "S01").mkdir(parents=True)
+        (tmp_path / "Show" / "S01" / "Show.E01.mkv").write_bytes(b"x" * 4)
+        (tmp_path / "Show" / "show.nfo").write_text("n")
+        (tmp_path / ".show.mkv").write_text("h")
+        
+        service = FileService()
+        service.media_root = tmp_path
+        return service, tmp_path
+    
+    def test_iter_walk_search(self, tree):
+        """Test toutes les correspondances (dossier compris), sans les fichiers cachés"""
+        service, root = tree
+        results = list(service._iter_walk_search(root, "show", None))
+        assert sorted(r["name"] for r in results) == ["Show", "Show.E01.mkv", "show.nfo"]
+    
+    def test_iter_walk_search_filter(self, tree):
+        """Test filtre par type"""
+        service, root = tree
+        results = list(service._iter_walk_search(root, "show", "video"))
+        assert sorted(r["name"] for r in results) == ["Show", "Show.E01.mkv"]
+        assert next(r for r in results if not r["is_dir"])["size"] == 4
+    
+    def test_iter_search_files_outside_root(self, tree):
+        """Test chemin hors media_root"""
+        service, _ = tree
+        assert list(service.iter_search_files("/etc", "passwd")) == []
+
+
+
+class TestFileServiceHardlinkJob:
+    """Tests pour la création de hardlinks en tâche de fond"""
+    
+    @pytest.fixture
+    def jobs(self, tmp_path):
+        """FileService, JobService et journaux isolés dans un dossier temporaire"""
+        import time
+        from app.services.file_service import FileService
+        from app.services.hardlink_journal_service import HardlinkJournalService
+        from app.services.job_service import JobService
+        
+        service = FileService()
+        service.media_root = tmp_path
+        job_service = JobService(max_workers=1)
+        
+        def wait(job):
+            deadline = time.monotonic() + 10
+            while not job.finished and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert job.finished
+            return job
+        
+        with patch("app.services.file_service.job_service", job_service), \
+                patch("app.services.file_service.hardlink_journal_service",
+                      HardlinkJournalService(tmp_path / "journals")), \
+                patch("app.config.user_settings.get", return_value={"paths": {}}), \
+                patch("app.services.hardlink_service.settings") as mock_settings:
+            mock_settings.hardlink_workers = 2
+            yield service, wait
+        job_service.shutdown()
+    
+    def test_single_file_copy_reports_bytes(self, jobs, tmp_path):
+        """Test que la copie d'un fichier seul (hardlink impossible) fait avancer bytes_done"""
+        import errno
+        service, wait = jobs
+        source = tmp_path / "a.mkv"
+        source.write_bytes(os.urandom(3 * 1024 * 1024 + 10))
+        from app.services.job_service import Job
+        updates = []
+        original = Job.update
+        
+        def record(job, *args):
+            updates.append(args)
+            original(job, *args)
+        
+        with patch("app.services.hardlink_service.os.link",
+                   side_effect=OSError(errno.EXDEV, "Cross-device link")), \
+                patch("app.utils.file_transfer._reflink",
+                      side_effect=OSError(errno.EOPNOTSUPP, "reflink non disponible")), \
+                patch.object(Job, "update", record):
+            job = wait(service.start_hardlink_job(str(source), str(tmp_path / "links" / "a.mkv")))
+        
+        assert job.status == "completed", job.error
+        size = source.stat().st_size
+        assert (job.files_done, job.bytes_done, job.bytes_total) == (1, size, size)
+        assert any(0 < bytes_done < size for _, _, bytes_done, _ in updates)
+
+    
+    def test_directory_journal_reserved_before_job(self, jobs, tmp_path):
+        """Test qu'une seconde demande pour le même dossier échoue tant que le job existe"""
+        import threading
+        from app.services.file_service import hardlink_journal_service, job_service
+        from app.services.hardlink_journal_service import HardlinkJournalBusy
+        service, wait = jobs
+        source = tmp_path / "Season"
+        source.mkdir()
+        (source / "E01.mkv").write_bytes(b"x" * 10)
+        destination = tmp_path / "links" / "Season"
+        release = threading.Event()
+        blocker = job_service.submit("test", lambda job: release.wait(5))
+        
+        job = service.start_hardlink_job(str(source), str(destination))
+        with pytest.raises(HardlinkJournalBusy):
+            service.start_hardlink_job(str(source), str(destination))
+        
+        # Annulé avant d'avoir démarré: la réservation est tout de même libérée
+        job.cancel()
+        release.set()
+        wait(blocker)
+        assert wait(job).status == "cancelled"
+        assert not hardlink_journal_service.is_active(str(source), str(destination))
+        assert wait(service.start_hardlink_job(str(source), str(destination))).status == "completed"
+        assert (destination / "E01.mkv").exists()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+"""Tests unitaires pour la copie de fichiers par stratégies successives"""
+import pytest
+import sys
+import os
+import errno
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import file_transfer
+from app.utils.file_transfer import transfer_file
+from app.utils.fs_executor import OperationCancelled, run_cancellable
+
+
+def unsupported(*args, **kwargs):
+    raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+
+def cross_device(*args, **kwargs):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "film.mkv"
+    path.write_bytes(os.urandom(300_000))
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    return path
+
+
+class TestTransferFile:
+    """Tests pour le choix de la stratégie et l'intégrité de la copie"""
+
+    def test_copies_content_and_mtime(self, source, tmp_path):
+        destination = tmp_path / "copie.mkv"
+        strategy = transfer_file(str(source), str(destination))
+
+        assert strategy in ("reflink", "copy_file_range", "sendfile", "copy")
+        assert destination.read_bytes() == source.read_bytes()
+        assert int(destination.stat().st_mtime) == 1_600_000_000
+
+    def test_falls_back_to_copy_file_range(self, source, tmp_path):
+        if not hasattr(os, "copy_file_range"):
+            pytest.skip("copy_file_range indisponible")
+        destination = tmp_path / "copie.mkv"
+        with patch.object(file_transfer, "_reflink", unsupported):
+            assert transfer_file(str(source), str(destination)) == "copy_file_range"
+        assert destination.read_bytes() == source.read_bytes()
+
+    def test_falls_back_to_sendfile(self, source, tmp_path):
+        if not hasattr(os, "sendfile"):
+            pytest.skip("sendfile indisponible")
+        destination = tmp_path / "copie.mkv"
+        with patch.object(file_transfer, "_reflink", unsupported), \
+                patch.object(file_transfer, "_copy_range", cross_device):
+            assert transfer_file(str(source), str(destination)) == "sendfile"
+        assert destination.read_bytes() == source.read_bytes()
+
+    def test_falls_back_to_stream_copy(self, source, tmp_path):
+        destination = tmp_path / "copie.mkv"
+        with patch.object(file_transfer, "_reflink", unsupported), \
+                patch.object(file_transfer, "_copy_range", cross_device), \
+                patch.object(file_transfer, "_sendfile", unsupported):
+            assert transfer_file(str(source), str(destination)) == "copy"
+        assert destination.read_bytes() == source.read_bytes()
+
+    def test_existing_destination_is_not_overwritten(self, source, tmp_path):
+        destination = tmp_path / "copie.mkv"
+        destination.write_bytes(b"autre")
+        with pytest.raises(FileExistsError):
+            transfer_file(str(source), str(destination))
+        assert destination.read_bytes() == b"autre"
+
+    def test_cancelled_copy_removes_partial_file(self, source, tmp_path):
+        destination = tmp_path / "copie.mkv"
+        event = threading.Event()
+        event.set()
+        with patch.object(file_transfer, "_reflink", unsupported):
+            with pytest.raises(OperationCancelled):
+                run_cancellable(event, transfer_file, str(source), str(destination))
+        assert not destination.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,203 @@
+"""Tests unitaires pour la surveillance des fichiers et le cache de dossiers"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.file_watcher_service import (
+    DirectoryCache,
+    FileWatcherService,
+    InotifyBackend,
+    PollingBackend,
+)
+
+
+class TestDirectoryCache:
+    """Tests pour l'invalidation du cache"""
+
+    def test_compute_once(self):
+        cache = DirectoryCache()
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        assert cache.get_or_compute_aggregate("/data/a", "size", compute) == 1
+        assert cache.get_or_compute_aggregate("/data/a", "size", compute) == 1
+        assert len(calls) == 1
+
+    def test_invalidate_listing_only_for_directory(self):
+        cache = DirectoryCache()
+        cache.get_or_compute_listing("/data/a", None, lambda: ["a"])
+        cache.get_or_compute_listing("/data/a/b", None, lambda: ["b"])
+        cache.invalidate("/data/a/b")
+        assert cache.get_or_compute_listing("/data/a", None, lambda: ["new"]) == ["a"]
+        assert cache.get_or_compute_listing("/data/a/b", None, lambda: ["new"]) == ["new"]
+
+    def test_invalidate_aggregates_of_ancestors(self):
+        cache = DirectoryCache()
+        cache.get_or_compute_aggregate("/data", "size", lambda: 1)
+        cache.get_or_compute_aggregate("/data/a", "size", lambda: 1)
+        cache.get_or_compute_aggregate("/data/other", "size", lambda: 1)
+        cache.invalidate("/data/a/b")
+        assert cache.get_or_compute_aggregate("/data", "size", lambda: 2) == 2
+        assert cache.get_or_compute_aggregate("/data/a", "size", lambda: 2) == 2
+        assert cache.get_or_compute_aggregate("/data/other", "size", lambda: 2) == 1
+
+    def test_invalidate_subtree(self):
+        cache = DirectoryCache()
+        cache.get_or_compute_listing("/data/a/b/c", None, lambda: ["c"])
+        cache.invalidate("/data/a", subtree=True)
+        assert cache.stats()["listings"] == 0
+
+    def test_no_store_when_invalidated_during_compute(self):
+        cache = DirectoryCache()
+
+        def compute():
+            cache.invalidate("/data/a")
+            return "stale"
+
+        cache.get_or_compute_listing("/data/a", None, compute)
+        assert cache.stats()["listings"] == 0
+
+    def test_unwatched_subtree_is_never_cached(self):
+        cache = DirectoryCache()
+        cache.get_or_compute_listing("/data/a/b", None, lambda: ["old"])
+        cache.get_or_compute_listing("/data/a", None, lambda: ["a"])
+        cache.get_or_compute_aggregate("/data", "size", lambda: 1)
+        cache.get_or_compute_aggregate("/data/other", "size", lambda: 1)
+        cache.mark_unwatched("/data/a/b")
+
+        assert cache.get_or_compute_listing("/data/a/b", None, lambda: ["new"]) == ["new"]
+        assert cache.get_or_compute_listing("/data/a/b/c", None, lambda: ["c"]) == ["c"]
+        assert cache.get_or_compute_aggregate("/data", "size", lambda: 2) == 2
+        assert cache.get_or_compute_aggregate("/data", "size", lambda: 3) == 3
+        # Le dossier parent et les branches voisines restent surveillés
+        assert cache.get_or_compute_listing("/data/a", None, lambda: ["new"]) == ["a"]
+        assert cache.get_or_compute_aggregate("/data/other", "size", lambda: 2) == 1
+        assert cache.stats()["unwatched"] == 1
+
+        cache.reset()
+        cache.get_or_compute_listing("/data/a/b", None, lambda: ["b"])
+        assert cache.get_or_compute_listing("/data/a/b", None, lambda: ["new"]) == ["b"]
+
+
+class TestPollingBackend:
+    """Tests pour le repli par polling"""
+
+    def test_detects_new_file(self, tmp_path):
+        changes = []
+        backend = PollingBackend(lambda d, subtree: changes.append((d, subtree)), interval=60)
+        (tmp_path / "sub").mkdir()
+        backend.add_tree(str(tmp_path))
+        (tmp_path / "sub" / "file.mkv").write_bytes(b"x")
+        os.utime(tmp_path / "sub", ns=(1, 1))
+        backend._poll_tree(str(tmp_path))
+        assert (str(tmp_path / "sub"), False) in changes
+
+    def test_reports_subtree_that_cannot_be_watched(self, tmp_path):
+        unwatched = []
+        backend = InotifyBackend(lambda d, subtree: None, lambda: None, unwatched.append)
+        backend.add_tree(str(tmp_path))
+
+        def add_tree(path):
+            raise OSError(28, "No space left on device")
+
+        backend.add_tree = add_tree
+        stop = threading.Event()
+        thread = threading.Thread(target=backend.run, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            (tmp_path / "new").mkdir()
+            deadline = time.monotonic() + 5
+            while not unwatched and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+            backend.close()
+        assert unwatched == [str(tmp_path / "new")]
+
+    def test_detects_removed_directory(self, tmp_path):
+        changes = []
+        backend = PollingBackend(lambda d, subtree: changes.append((d, subtree)), interval=60)
+        (tmp_path / "sub").mkdir()
+        backend.add_tree(str(tmp_path))
+        (tmp_path / "sub").rmdir()
+        os.utime(tmp_path, ns=(1, 1))
+        backend._poll_tree(str(tmp_path))
+        assert (str(tmp_path / "sub"), True) in changes
+
+
+@pytest.mark.skipif(not InotifyBackend.is_supported(), reason="inotify indisponible")
+class TestInotifyBackend:
+    """Tests pour la surveillance inotify"""
+
+    def test_reports_file_creation_in_subdirectory(self, tmp_path):
+        changes = []
+        backend = InotifyBackend(lambda d, subtree: changes.append((d, subtree)), lambda: None)
+        (tmp_path / "sub").mkdir()
+        backend.add_tree(str(tmp_path))
+        stop = threading.Event()
+        thread = threading.Thread(target=backend.run, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            (tmp_path / "sub" / "file.mkv").write_bytes(b"x")
+            deadline = time.monotonic() + 5
+            while (str(tmp_path / "sub"), False) not in changes and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+            backend.close()
+        assert (str(tmp_path / "sub"), False) in changes
+
+    def test_reports_subtree_that_cannot_be_watched(self, tmp_path):
+        unwatched = []
+        backend = InotifyBackend(lambda d, subtree: None, lambda: None, unwatched.append)
+        backend.add_tree(str(tmp_path))
+
+        def add_tree(path):
+            raise OSError(28, "No space left on device")
+
+        backend.add_tree = add_tree
+        stop = threading.Event()
+        thread = threading.Thread(target=backend.run, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            (tmp_path / "new").mkdir()
+            deadline = time.monotonic() + 5
+            while not unwatched and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+            backend.close()
+        assert unwatched == [str(tmp_path / "new")]
+
+
+class TestFileWatcherService:
+    """Tests pour l'application des changements"""
+
+    def test_flush_invalidates_cache(self, tmp_path):
+        service = FileWatcherService()
+        service.cache.get_or_compute_aggregate(str(tmp_path), "size", lambda: 1)
+        service._on_change(str(tmp_path / "sub"), False)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.services.file_watcher_service.settings.file_index_enabled", False)
+            service.flush()
+        assert service.cache.stats()["aggregates"] == 0
+
+    def test_start_and_stop_polling(self, tmp_path):
+        service = FileWatcherService()
+        assert service.start(backend="polling", roots=[str(tmp_path)])
+        try:
+            assert service.is_running
+            assert service.backend_name == "polling"
+        finally:
+            service.stop()
+        assert not service.is_running
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""Tests unitaires pour le pool de threads des opérations disque"""
+import pytest
+import sys
+import os
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.fs_executor import FilesystemExecutor, OperationCancelled, check_cancelled
+
+
+class FakeRequest:
+    """Requête minimale dont on contrôle la déconnexion"""
+
+    class url:
+        path = "/files/search"
+
+    def __init__(self, disconnected: bool = False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+class TestFilesystemExecutor:
+    """Tests pour l'exécution et l'annulation"""
+
+    def setup_method(self):
+        self.executor = FilesystemExecutor(max_workers=2)
+        self.executor.DISCONNECT_POLL_INTERVAL = 0.01
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        result = await self.executor.run(lambda a, b=0: a + b, 1, b=2)
+        assert result == 3
+
+    @pytest.mark.asyncio
+    async def test_runs_outside_event_loop_thread(self):
+        name = await self.executor.run(lambda: threading.current_thread().name)
+        assert name.startswith("fs")
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate(self):
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await self.executor.run(fail)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_on_disconnect(self):
+        started = threading.Event()
+
+        def walk():
+            started.set()
+            while True:
+                check_cancelled()
+
+        request = FakeRequest()
+        task = asyncio.create_task(self.executor.run(walk, request=request))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        request.disconnected = True
+        with pytest.raises(OperationCancelled):
+            await asyncio.wait_for(task, timeout=5)
+
+    def test_check_cancelled_outside_executor(self):
+        """Hors du pool, check_cancelled ne fait rien"""
+        check_cancelled()
+
+    def test_operation_cancelled_not_caught_by_exception(self):
+        assert not issubclass(OperationCancelled, Exception)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
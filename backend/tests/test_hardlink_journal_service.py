@@ -0,0 +1,163 @@
+"""Tests unitaires pour la journalisation et la reprise des hardlinks de dossiers"""
+import pytest
+import sys
+import os
+import errno
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.hardlink_journal_service import HardlinkJournal, HardlinkJournalBusy, HardlinkJournalService
+from app.services.hardlink_service import HardlinkEngine
+from app.utils.fs_executor import OperationCancelled, run_cancellable
+
+
+@pytest.fixture
+def season(tmp_path):
+    source = tmp_path / "source" / "Show.S01"
+    (source / "Extras").mkdir(parents=True)
+    for index in range(1, 7):
+        (source / f"E0{index}.mkv").write_bytes(b"x" * (10 * index))
+    (source / "Extras" / "bonus.mkv").write_bytes(b"c" * 25)
+    return source
+
+
+@pytest.fixture
+def journals(tmp_path):
+    return HardlinkJournalService(directory=tmp_path / "journals")
+
+
+def interrupted_run(season, destination, journals, after):
+    """Exécute l'opération et l'interrompt après `after` fichiers"""
+    journal = journals.open(str(season), str(destination))
+    event = threading.Event()
+
+    def progress(files_done, files_total, bytes_done, bytes_total):
+        if files_done >= after:
+            event.set()
+
+    with pytest.raises(OperationCancelled):
+        run_cancellable(event, HardlinkEngine(workers=1).link_tree,
+                        str(season), str(destination), progress, journal)
+    journal.close()
+    return journal
+
+
+class TestHardlinkJournal:
+    """Tests pour la reprise, le rollback et la relecture des journaux"""
+
+    def test_interrupted_operation_is_listed(self, season, tmp_path, journals):
+        destination = tmp_path / "links" / "Show.S01"
+        interrupted_run(season, destination, journals, after=2)
+
+        pending = journals.list_pending()
+        assert len(pending) == 1
+        assert pending[0]["planned_files"] == 7
+        assert pending[0]["files_done"] >= 2
+
+    def test_resume_skips_journaled_files(self, season, tmp_path, journals):
+        destination = tmp_path / "links" / "Show.S01"
+        first = interrupted_run(season, destination, journals, after=3)
+        already = len(first.done)
+
+        journal = journals.open(str(season), str(destination))
+        assert journal.resumed
+        with patch("app.services.hardlink_service.os.link", side_effect=os.link) as link:
+            report = HardlinkEngine(workers=2).link_tree(str(season), str(destination), journal=journal)
+        # Les fichiers journalisés ne sont ni reliés ni comparés (pas de FileExistsError)
+        assert link.call_count == 7 - already
+
+        assert report.resumed == already
+        assert report.linked == 7 - already
+        assert all((destination / f"E0{index}.mkv").exists() for index in range(1, 7))
+
+    def test_rollback_removes_created_entries_only(self, season, tmp_path, journals):
+        destination = tmp_path / "links" / "Show.S01"
+        destination.mkdir(parents=True)
+        (destination / "notes.txt").write_text("à garder")
+        interrupted_run(season, destination, journals, after=3)
+
+        journal_id = journals.list_pending()[0]["id"]
+        result = journals.rollback(journal_id)
+
+        assert result["files_removed"] >= 3
+        assert sorted(os.listdir(destination)) == ["notes.txt"]
+        assert journals.list_pending() == []
+
+    def test_partial_copy_is_restarted(self, season, tmp_path, journals):
+        destination = tmp_path / "links" / "Show.S01"
+        journal = journals.open(str(season), str(destination))
+        journal.begin(7, 0)
+        destination.mkdir(parents=True)
+        journal.record_copy(str(destination / "E01.mkv"))
+        (destination / "E01.mkv").write_bytes(b"tronq")
+        journal.close()
+
+        journal = journals.open(str(season), str(destination))
+        with patch("app.services.hardlink_service.os.link", side_effect=OSError(errno.EXDEV, "Cross-device link")):
+            report = HardlinkEngine(workers=2).link_tree(str(season), str(destination), journal=journal)
+
+        assert report.copied == 7
+        assert (destination / "E01.mkv").read_bytes() == b"x" * 10
+
+    def test_truncated_last_line_is_ignored(self, tmp_path, journals):
+        journal = journals.open("/data/a", "/data/b")
+        journal.begin(2, 20)
+        journal.record_file("/data/b/1.mkv", "linked")
+        journal.close()
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"op": "done", "pa')
+
+        loaded = HardlinkJournal.load(journal.path)
+        assert loaded.done == {"/data/b/1.mkv": "linked"}
+
+    def test_active_journal_cannot_be_reopened_or_rolled_back(self, season, tmp_path, journals):
+        destination = tmp_path / "links" / "Show.S01"
+        journal = journals.open(str(season), str(destination))
+        journal.begin(7, 0)
+
+        assert journals.is_active(str(season), str(destination))
+        with pytest.raises(HardlinkJournalBusy):
+            journals.open(str(season), str(destination))
+        with pytest.raises(HardlinkJournalBusy):
+            journals.rollback(journal.id)
+
+        journal.close()
+        assert not journals.is_active(str(season), str(destination))
+        assert journals.rollback(journal.id) is not None
+
+    def test_done_lines_are_fsynced_in_groups(self, tmp_path, journals):
+        journal = journals.open("/data/a", "/data/b")
+        with patch("app.services.hardlink_journal_service.os.fsync") as fsync, \
+                patch.object(HardlinkJournal, "SYNC_INTERVAL", 60):
+            journal.begin(1000, 10)
+            assert fsync.call_count == 1
+            for index in range(HardlinkJournal.SYNC_EVERY + 10):
+                journal.record_file(f"/data/b/{index}.mkv", "linked")
+            assert fsync.call_count == 2
+            journal.record_copy("/data/b/copie.mkv")
+            assert fsync.call_count == 3
+            journal.record_file("/data/b/copie.mkv", "copied")
+            journal.close()
+            assert fsync.call_count == 4
+        journal.discard()
+
+    def test_incomplete_line_stops_replay(self, tmp_path, journals):
+        journal = journals.open("/data/a", "/data/b")
+        journal.begin(2, 20)
+        journal.record_file("/data/b/1.mkv", "linked")
+        journal.close()
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"op": "done", "path": "/data/b/2.mkv"}\n[1, 2]\n')
+
+        assert HardlinkJournal.load(journal.path).done == {"/data/b/1.mkv": "linked"}
+        assert [pending["id"] for pending in journals.list_pending()] == [journal.id]
+
+    def test_unknown_journal(self, journals):
+        assert journals.get("../etc") is None
+        assert journals.rollback("0" * 40) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,114 @@
+"""Tests unitaires pour le moteur de hardlinks de dossiers"""
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.hardlink_service import HardlinkEngine
+from app.utils.fs_executor import OperationCancelled, run_cancellable
+
+
+@pytest.fixture
+def season(tmp_path):
+    source = tmp_path / "source" / "Show.S01"
+    (source / "Extras").mkdir(parents=True)
+    (source / "Vide").mkdir()
+    (source / "E01.mkv").write_bytes(b"a" * 100)
+    (source / "E02.mkv").write_bytes(b"b" * 50)
+    (source / "Extras" / "bonus.mkv").write_bytes(b"c" * 25)
+    return source
+
+
+class TestHardlinkPlan:
+    """Tests pour la planification de l'arborescence"""
+
+    def test_plan_lists_files_and_directories(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        plan = HardlinkEngine(workers=2).plan(str(season), str(destination))
+
+        assert len(plan.links) == 3
+        assert plan.bytes_total == 175
+        # Parents avant enfants, sans doublon, dossier vide non créé
+        assert plan.directories == [str(destination), str(destination / "Extras")]
+
+    def test_plan_does_not_touch_destination(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        HardlinkEngine(workers=2).plan(str(season), str(destination))
+        assert not destination.exists()
+
+
+class TestHardlinkEngine:
+    """Tests pour l'exécution parallèle des liens"""
+
+    def test_links_all_files(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        report = HardlinkEngine(workers=4).link_tree(str(season), str(destination))
+
+        assert report.linked == 3
+        assert report.strategies == {"hardlink": 3}
+        assert report.directories_created == 2
+        assert report.bytes_total == 175
+        assert os.stat(destination / "Extras" / "bonus.mkv").st_ino == \
+            os.stat(season / "Extras" / "bonus.mkv").st_ino
+        assert all(result.status == "linked" for result in report.files)
+
+    def test_second_run_reports_existing(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        engine = HardlinkEngine(workers=4)
+        engine.link_tree(str(season), str(destination))
+        report = engine.link_tree(str(season), str(destination))
+
+        assert report.linked == 0
+        assert report.existing == 3
+        assert report.directories_created == 0
+
+    def test_different_file_is_skipped_not_overwritten(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        destination.mkdir(parents=True)
+        (destination / "E01.mkv").write_bytes(b"autre")
+
+        report = HardlinkEngine(workers=2).link_tree(str(season), str(destination))
+
+        assert report.skipped == 1
+        assert report.linked == 2
+        assert (destination / "E01.mkv").read_bytes() == b"autre"
+
+    def test_falls_back_to_copy(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        with patch("app.services.hardlink_service.os.link", side_effect=OSError(18, "Cross-device link")):
+            report = HardlinkEngine(workers=2).link_tree(str(season), str(destination))
+
+        assert report.copied == 3
+        assert (destination / "E02.mkv").read_bytes() == b"b" * 50
+        assert report.files[0].error
+        assert report.files[0].strategy in ("reflink", "copy_file_range", "sendfile", "copy")
+        assert sum(report.strategies.values()) == 3
+
+    def test_summary_matches_previous_format(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        engine = HardlinkEngine(workers=2)
+        report = engine.link_tree(str(season), str(destination))
+        assert engine.summarize(report) == "Dossier traité: 3 hardlinks créés"
+
+    def test_progress_reports_files_and_bytes(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        calls = []
+        HardlinkEngine(workers=2).link_tree(str(season), str(destination), progress=lambda *a: calls.append(a))
+
+        assert calls[0] == (0, 3, 0, 175)
+        assert calls[-1] == (3, 3, 175, 175)
+
+    def test_cancelled_before_links(self, season, tmp_path):
+        destination = tmp_path / "links" / "Show.S01"
+        event = threading.Event()
+        event.set()
+        with pytest.raises(OperationCancelled):
+            run_cancellable(event, HardlinkEngine(workers=2).link_tree, str(season), str(destination))
+        assert not (destination / "E01.mkv").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""Tests unitaires pour les tâches de fond"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.job_service import Job, JobService
+from app.utils.fs_executor import check_cancelled
+
+
+def wait_finished(job: Job, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+class TestJobService:
+    """Tests pour l'exécution, la progression et l'annulation des jobs"""
+
+    def setup_method(self):
+        self.service = JobService(max_workers=2)
+
+    def teardown_method(self):
+        self.service.shutdown()
+
+    def test_job_completes_with_result(self):
+        def run(job):
+            job.update(2, 2, 300, 300)
+            return {"success": True}
+
+        job = self.service.submit("test", run)
+        wait_finished(job)
+
+        data = job.to_dict()
+        assert data["status"] == "completed"
+        assert data["result"] == {"success": True}
+        assert data["files_done"] == 2
+        assert data["progress"] == 1.0
+        assert self.service.get(job.id) is job
+
+    def test_job_failure_is_recorded(self):
+        def run(job):
+            raise RuntimeError("La source n'existe pas")
+
+        job = self.service.submit("test", run)
+        wait_finished(job)
+
+        assert job.status == "failed"
+        assert job.error == "La source n'existe pas"
+
+    def test_cancel_running_job(self):
+        started = threading.Event()
+
+        def run(job):
+            job.update(0, 10, 0, 1000)
+            started.set()
+            while True:
+                check_cancelled()
+                time.sleep(0.01)
+
+        job = self.service.submit("test", run)
+        assert started.wait(5)
+        assert self.service.cancel(job.id)
+        wait_finished(job)
+
+        assert job.status == "cancelled"
+        assert not job.cancel()
+
+    def test_rate_and_eta_while_running(self):
+        release = threading.Event()
+
+        def run(job):
+            job.update(1, 4, 100, 400)
+            release.wait(5)
+
+        job = self.service.submit("test", run)
+        while job.status != "running":
+            time.sleep(0.01)
+        time.sleep(0.05)
+        data = job.to_dict()
+        release.set()
+        wait_finished(job)
+
+        assert data["bytes_per_second"] > 0
+        assert data["eta"] is not None and data["eta"] > 0
+
+    def test_finished_jobs_are_purged(self):
+        self.service.MAX_FINISHED_JOBS = 2
+        jobs = [self.service.submit("test", lambda job: None) for _ in range(3)]
+        for job in jobs:
+            wait_finished(job)
+        self.service.submit("test", lambda job: None)
+
+        assert self.service.get(jobs[0].id) is None
+        assert len(self.service.list_jobs("test")) <= 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+"""Tests unitaires pour le cache des empreintes de pièces"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+import torf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.piece_hash_cache import PieceHashCache
+from app.services.piece_hash_service import PieceHasher
+
+
+@pytest.fixture
+def release(tmp_path):
+    root = tmp_path / "Release"
+    root.mkdir()
+    (root / "Release.mkv").write_bytes(os.urandom(100_000))
+    (root / "Release.nfo").write_bytes(os.urandom(500))
+    return root
+
+
+@pytest.fixture
+def hasher(tmp_path):
+    cache = PieceHashCache(db_path=tmp_path / "pieces.db")
+    with patch("app.services.piece_hash_service.settings") as mock_settings:
+        mock_settings.torrent_hash_cache_enabled = True
+        yield PieceHasher(workers=2, buffer_size=65536, cache=cache)
+    cache.close()
+
+
+def make_torrent(path, piece_size=16384, **kwargs):
+    torrent = torf.Torrent(path=str(path), **kwargs)
+    torrent.piece_size = piece_size
+    return torrent
+
+
+class TestPieceHashCache:
+    """Tests de réutilisation et d'invalidation du cache"""
+
+    def test_metadata_change_reuses_pieces(self, release, hasher):
+        first = make_torrent(release)
+        hasher.generate(first)
+
+        second = make_torrent(release, private=True, trackers=[["https://tracker/announce"]])
+        second.name = "Autre.Nom"
+        with patch.object(hasher, "hash_pieces", side_effect=AssertionError("relu")):
+            hasher.generate(second)
+
+        assert second.metainfo["info"]["pieces"] == first.metainfo["info"]["pieces"]
+        assert hasher._cache.stats()["hits"] == 1
+
+    def test_modified_file_is_rehashed(self, release, hasher):
+        hasher.generate(make_torrent(release))
+        path = release / "Release.nfo"
+        path.write_bytes(os.urandom(500))
+        os.utime(path, ns=(0, 1_000_000_000))
+
+        torrent = make_torrent(release)
+        hasher.generate(torrent)
+
+        reference = make_torrent(release)
+        reference.generate(threads=1)
+        assert torrent.metainfo["info"]["pieces"] == reference.metainfo["info"]["pieces"]
+        assert hasher._cache.stats()["hits"] == 0
+
+    def test_piece_size_is_part_of_key(self, release, hasher):
+        hasher.generate(make_torrent(release, piece_size=16384))
+        torrent = make_torrent(release, piece_size=32768)
+        hasher.generate(torrent)
+
+        assert hasher._cache.stats()["hits"] == 0
+        assert len(torrent.metainfo["info"]["pieces"]) == 20 * torrent.pieces
+
+    def test_progress_reported_on_hit(self, release, hasher):
+        hasher.generate(make_torrent(release))
+        torrent = make_torrent(release)
+        calls = []
+        hasher.generate(torrent, progress=lambda *a: calls.append(a))
+
+        assert calls == [(torrent.pieces, torrent.pieces, torrent.size, torrent.size)]
+
+    def test_eviction_keeps_recent_entries(self, tmp_path):
+        cache = PieceHashCache(db_path=tmp_path / "pieces.db")
+        cache.MAX_ENTRIES = 2
+        for index in range(3):
+            cache.put(f"key{index}", 16384, 1, b"x" * 20)
+
+        assert cache.get("key0") is None
+        assert cache.get("key2") == b"x" * 20
+        assert cache.stats()["entries"] == 2
+        cache.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""Tests unitaires pour le hachage parallèle des pièces"""
+import pytest
+import sys
+import os
+import threading
+
+import torf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.piece_hash_service import PieceHasher
+from app.utils.fs_executor import OperationCancelled, run_cancellable
+
+
+@pytest.fixture
+def release(tmp_path):
+    root = tmp_path / "Release"
+    (root / "Sub").mkdir(parents=True)
+    (root / "Release.mkv").write_bytes(os.urandom(200_000))
+    (root / "empty.txt").write_bytes(b"")
+    (root / "Sub" / "Release.srt").write_bytes(os.urandom(7_777))
+    (root / "Release.nfo").write_bytes(os.urandom(1_234))
+    return root
+
+
+def torf_pieces(path, piece_size):
+    torrent = torf.Torrent(path=str(path))
+    torrent.piece_size = piece_size
+    torrent.generate(threads=1)
+    return torrent.metainfo["info"]["pieces"]
+
+
+class TestPieceHasher:
+    """Tests de conformité avec torf et de progression"""
+
+    @pytest.mark.parametrize("buffer_size", [16384, 65536, 1 << 20])
+    def test_matches_torf_for_directory(self, release, buffer_size):
+        torrent = torf.Torrent(path=str(release))
+        torrent.piece_size = 16384
+        PieceHasher(workers=4, buffer_size=buffer_size).generate(torrent)
+
+        assert torrent.metainfo["info"]["pieces"] == torf_pieces(release, 16384)
+
+    def test_matches_torf_for_single_file(self, release):
+        path = release / "Release.mkv"
+        torrent = torf.Torrent(path=str(path))
+        torrent.piece_size = 32768
+        PieceHasher(workers=3, buffer_size=65536).generate(torrent)
+
+        assert torrent.metainfo["info"]["pieces"] == torf_pieces(path, 32768)
+        assert torrent.infohash
+
+    def test_progress_reaches_total(self, release):
+        torrent = torf.Torrent(path=str(release))
+        torrent.piece_size = 16384
+        calls = []
+        PieceHasher(workers=2, buffer_size=32768).generate(torrent, progress=lambda *a: calls.append(a))
+
+        assert calls[0] == (0, torrent.pieces, 0, torrent.size)
+        assert calls[-1] == (torrent.pieces, torrent.pieces, torrent.size, torrent.size)
+
+    def test_empty_content_raises(self, tmp_path):
+        (tmp_path / "vide").mkdir()
+        (tmp_path / "vide" / "a.txt").write_bytes(b"")
+        torrent = torf.Torrent(path=str(tmp_path / "vide"), exclude_globs=[])
+        with pytest.raises(torf.TorfError):
+            PieceHasher(workers=2).generate(torrent)
+
+    def test_truncated_file_raises(self, release):
+        torrent = torf.Torrent(path=str(release))
+        torrent.piece_size = 16384
+        files = [(str(p), f.size) for p, f in zip(torrent.filepaths, torrent.files)]
+        path, size = files[0]
+        files[0] = (path, size + 10)
+        with pytest.raises(torf.ReadError):
+            PieceHasher(workers=2).hash_pieces(files, 16384)
+
+    def test_cancellation(self, release):
+        torrent = torf.Torrent(path=str(release))
+        torrent.piece_size = 16384
+        event = threading.Event()
+        event.set()
+        with pytest.raises(OperationCancelled):
+            run_cancellable(event, PieceHasher(workers=2, buffer_size=16384).generate, torrent)
+        assert not torrent.metainfo["info"].get("pieces")
+
+    def test_buffers_released_after_call_on_shared_pool(self, release):
+        import gc
+        import weakref
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+        torrent = torf.Torrent(path=str(release))
+        torrent.piece_size = 16384
+        hasher = PieceHasher(workers=2, buffer_size=65536)
+        buffers = []
+        original = PieceHasher._buffer
+
+        def spy(local, size):
+            buffers.append(weakref.ref(local))
+            return original(local, size)
+
+        with ThreadPoolExecutor(max_workers=2) as pool, patch.object(PieceHasher, "_buffer", staticmethod(spy)):
+            hasher.generate(torrent, executor=pool)
+            gc.collect()
+            # Les threads du pool vivent encore, mais plus leurs tampons
+            assert buffers and all(ref() is None for ref in buffers)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
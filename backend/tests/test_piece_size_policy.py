@@ -0,0 +1,57 @@
+"""Tests unitaires pour le choix de la taille de pièce"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.piece_size_policy import (
+    MAX_PIECE_SIZE, MIN_PIECE_SIZE, POLICIES, choose_piece_size, get_policy
+)
+
+GIB = 1024 ** 3
+
+
+class TestPieceSizePolicy:
+    """Tests des bornes et du budget de pièces"""
+
+    @pytest.mark.parametrize("name", ["compact", "balanced", "fine", "torf"])
+    @pytest.mark.parametrize("size", [1, 10 * 1024 ** 2, GIB, 40 * GIB, 2000 * GIB])
+    def test_power_of_two_within_bounds(self, name, size):
+        piece = POLICIES[name].choose(size, 10)
+        assert MIN_PIECE_SIZE <= piece <= MAX_PIECE_SIZE
+        assert piece & (piece - 1) == 0
+
+    def test_balanced_targets_piece_count(self):
+        policy = POLICIES["balanced"]
+        for size in (GIB, 4 * GIB, 10 * GIB):
+            pieces = -(-size // policy.choose(size, 1))
+            assert policy.target_pieces // 2 < pieces <= policy.target_pieces
+
+    def test_many_files_increase_piece_size(self):
+        policy = POLICIES["balanced"]
+        assert policy.choose(2 * GIB, 10000) > policy.choose(2 * GIB, 1)
+
+    def test_metainfo_size_bounded(self):
+        policy = POLICIES["balanced"]
+        assert policy.estimate_metainfo_size(10 * GIB, 20) <= policy.max_metainfo_size
+
+    def test_policies_ordered_by_granularity(self):
+        size = 4 * GIB
+        assert POLICIES["compact"].choose(size) >= POLICIES["balanced"].choose(size) >= POLICIES["fine"].choose(size)
+
+    def test_empty_content(self):
+        assert choose_piece_size(0, 0, "balanced") == MIN_PIECE_SIZE
+
+    def test_unknown_policy_falls_back_to_balanced(self):
+        assert get_policy("inconnue") is POLICIES["balanced"]
+
+    def test_policy_from_settings(self):
+        with patch("app.services.piece_size_policy.settings") as mock_settings:
+            mock_settings.torrent_piece_size_policy = "fine"
+            assert get_policy() is POLICIES["fine"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
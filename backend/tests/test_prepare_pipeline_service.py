@@ -0,0 +1,169 @@
+"""Tests unitaires pour la préparation combinée hardlink + MediaInfo + torrent"""
+import pytest
+import sys
+import os
+import errno
+import hashlib
+import time
+from unittest.mock import patch
+
+import torf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.file_service import FileService
+from app.services.hardlink_journal_service import HardlinkJournalService
+from app.services.job_service import JobService
+from app.services.piece_hash_service import PieceCapture, PieceHasher
+from app.services.prepare_pipeline_service import PreparePipelineService
+from app.utils.file_transfer import transfer_file
+
+PIECE_SIZE = 16384
+
+
+def no_reflink(src_fd, dst_fd):
+    raise OSError(errno.EOPNOTSUPP, "reflink non disponible")
+
+
+def torf_pieces(path, piece_size=PIECE_SIZE):
+    torrent = torf.Torrent(path=str(path))
+    torrent.piece_size = piece_size
+    torrent.generate(threads=1)
+    return torrent.metainfo["info"]["pieces"]
+
+
+@pytest.fixture
+def release(tmp_path):
+    source = tmp_path / "media" / "Release"
+    (source / "Subs").mkdir(parents=True)
+    (source / "Release.mkv").write_bytes(os.urandom(150_000))
+    (source / "Release.nfo").write_bytes(os.urandom(3_000))
+    (source / "Subs" / "Release.srt").write_bytes(os.urandom(40_000))
+    return source
+
+
+class TestPieceCapture:
+    """Tests du hachage pendant la copie"""
+
+    def test_captures_pieces_inside_file(self, tmp_path):
+        data = os.urandom(100_000)
+        source = tmp_path / "a.bin"
+        source.write_bytes(data)
+        # Fichier placé à 5000 octets dans un flux de 110000 octets
+        capture = PieceCapture(5000, len(data), PIECE_SIZE, 110_000)
+
+        with patch("app.utils.file_transfer._reflink", side_effect=no_reflink):
+            strategy = transfer_file(str(source), str(tmp_path / "b.bin"), capture)
+
+        assert strategy == "copy"
+        assert capture.complete
+        stream = b"\0" * 5000 + data + b"\0" * 5000
+        # Pièces 1 à 5: entièrement dans le fichier; 0 et 6 à cheval
+        assert sorted(capture.pieces) == [1, 2, 3, 4, 5]
+        for index, digest in capture.pieces.items():
+            piece = stream[index * PIECE_SIZE:(index + 1) * PIECE_SIZE]
+            assert digest == hashlib.sha1(piece).digest()
+
+    def test_last_piece_of_torrent_is_captured(self):
+        capture = PieceCapture(0, 20_000, PIECE_SIZE, 20_000)
+        capture(b"x" * 20_000)
+        assert sorted(capture.pieces) == [0, 1]
+
+    def test_grown_file_is_discarded(self):
+        capture = PieceCapture(0, 20_000, PIECE_SIZE, 20_000)
+        capture(b"x" * 20_001)
+        assert not capture.complete
+        assert capture.pieces == {}
+
+
+class TestPreparePipeline:
+    """Tests de la préparation complète en tâche de fond"""
+
+    def setup_method(self):
+        self.jobs = JobService(max_workers=1)
+
+    def teardown_method(self):
+        self.jobs.shutdown()
+
+    def run(self, tmp_path, release, destination):
+        files = FileService()
+        files.media_root = tmp_path
+        read = []
+        hasher = PieceHasher(workers=2, buffer_size=PIECE_SIZE * 2)
+        original = hasher._read_range
+
+        def spy(files_, offsets, start, view):
+            read.append(len(view))
+            return original(files_, offsets, start, view)
+
+        hasher._read_range = spy
+        with patch("app.services.prepare_pipeline_service.job_service", self.jobs), \
+                patch("app.services.prepare_pipeline_service.file_service", files), \
+                patch("app.services.file_service.hardlink_journal_service",
+                      HardlinkJournalService(tmp_path / "journals")), \
+                patch("app.config.user_settings.get", return_value={"paths": {}}), \
+                patch("app.services.prepare_pipeline_service.mediainfo_service.analyze_file",
+                      return_value=None) as analyze_file, \
+                patch("app.services.qbittorrent_service.piece_hasher", hasher), \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings, \
+                patch("app.services.qbittorrent_service.settings") as mock_settings:
+            mock_user_settings.get.return_value = {}
+            mock_settings.output_path = tmp_path
+            mock_settings.torrent_hash_cache_enabled = False
+            job = PreparePipelineService().start_prepare_job(
+                str(release), str(destination), piece_size=PIECE_SIZE
+            )
+            deadline = time.monotonic() + 10
+            while not job.finished and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert job.finished
+        return job, sum(read), analyze_file
+
+    def test_copy_fallback_hashes_during_copy(self, tmp_path, release):
+        destination = tmp_path / "media" / "links" / "Release"
+        with patch("app.services.hardlink_service.os.link", side_effect=OSError(errno.EXDEV, "Cross-device link")), \
+                patch("app.utils.file_transfer._reflink", side_effect=no_reflink):
+            job, bytes_read, _ = self.run(tmp_path, release, destination)
+
+        assert job.status == "completed", job.error
+        assert job.result["report"]["copied"] == 3
+        assert job.result["pieces_from_copy"] > 0
+        # Seules les pièces à cheval sur deux fichiers ont été relues
+        assert bytes_read <= 2 * PIECE_SIZE * 2
+        torrent = torf.Torrent.read(job.result["torrent"]["torrent_path"])
+        assert torrent.metainfo["info"]["pieces"] == torf_pieces(destination)
+
+    def test_single_file_copy_fallback_hashes_during_copy(self, tmp_path, release):
+        source = release / "Release.mkv"
+        destination = tmp_path / "media" / "links" / "Renamed.mkv"
+        with patch("app.services.hardlink_service.os.link", side_effect=OSError(errno.EXDEV, "Cross-device link")), \
+                patch("app.utils.file_transfer._reflink", side_effect=no_reflink):
+            job, bytes_read, _ = self.run(tmp_path, source, destination)
+
+        assert job.status == "completed", job.error
+        assert destination.read_bytes() == source.read_bytes()
+        assert job.result["pieces_from_copy"] == len(torf_pieces(source)) // 20
+        assert bytes_read == 0
+        torrent = torf.Torrent.read(job.result["torrent"]["torrent_path"])
+        assert torrent.metainfo["info"]["pieces"] == torf_pieces(destination)
+
+    def test_hardlinks_hash_once_and_run_mediainfo(self, tmp_path, release):
+        destination = tmp_path / "media" / "links" / "Release"
+        job, bytes_read, analyze_file = self.run(tmp_path, release, destination)
+
+        assert job.status == "completed", job.error
+        assert job.result["report"]["linked"] == 3
+        assert job.result["pieces_from_copy"] == 0
+        assert bytes_read == 193_000
+        analyze_file.assert_called_once_with(str(destination / "Release.mkv"))
+        torrent = torf.Torrent.read(job.result["torrent"]["torrent_path"])
+        assert torrent.metainfo["info"]["pieces"] == torf_pieces(destination)
+
+    def test_missing_source_fails(self, tmp_path):
+        job, _, _ = self.run(tmp_path, tmp_path / "absent", tmp_path / "links")
+        assert job.status == "failed"
+        assert "n'existe pas" in job.error
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,459 @@
+"""Tests de l'adaptateur qBittorrent asynchrone contre une fausse WebUI locale"""
+import pytest
+import sys
+import os
+import asyncio
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import torf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qbittorrent_async import (
+    CircuitBreaker, QBittorrentAsyncAdapter, QBittorrentAuthError, QBittorrentUnavailable
+)
+from app.models.torrent import TorrentSeedItem
+from app.services.qbittorrent_service import QBittorrentService
+from app.services.seeding_tracker import SeedingTracker
+
+
+class FakeWebUI:
+    """Sous-ensemble de l'API v2 de qBittorrent, servi sur 127.0.0.1"""
+
+    def __init__(self, username="admin", password="secret"):
+        self.username = username
+        self.password = password
+        self.sessions = set()
+        self.logins = 0
+        self.delay = 0.0
+        self.added = []
+        self.rechecked = []
+        self.renamed = []
+        self.rejected = set()
+        self.torrents = [{"hash": "aaa", "name": "A", "state": "uploading"},
+                         {"hash": "bbb", "name": "B", "state": "pausedUP"}]
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status=200, body="", headers=None):
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def authorized(self):
+                cookie = self.headers.get("Cookie", "")
+                match = re.search(r"SID=([\w-]+)", cookie)
+                return match is not None and match.group(1) in fake.sessions
+
+            def body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_GET(self):
+                time.sleep(fake.delay)
+                url = urlsplit(self.path)
+                if not self.authorized():
+                    return self.reply(403, "Forbidden")
+                if url.path == "/api/v2/app/version":
+                    return self.reply(200, "v4.6.2")
+                if url.path == "/api/v2/torrents/info":
+                    hashes = parse_qs(url.query).get("hashes", [""])[0].split("|")
+                    torrents = [t for t in fake.torrents if not hashes[0] or t["hash"] in hashes]
+                    return self.reply(200, json.dumps(torrents), {"Content-Type": "application/json"})
+                self.reply(404, "Not Found")
+
+            def do_POST(self):
+                time.sleep(fake.delay)
+                url = urlsplit(self.path)
+                body = self.body()
+                if url.path == "/api/v2/auth/login":
+                    form = parse_qs(body.decode())
+                    fake.logins += 1
+                    if form.get("username") == [fake.username] and form.get("password") == [fake.password]:
+                        sid = uuid.uuid4().hex
+                        fake.sessions.add(sid)
+                        return self.reply(200, "Ok.", {"Set-Cookie": f"SID={sid}; HttpOnly; path=/"})
+                    return self.reply(200, "Fails.")
+                if not self.authorized():
+                    return self.reply(403, "Forbidden")
+                if url.path == "/api/v2/torrents/add":
+                    text = body.decode("latin-1")
+                    fields = dict(re.findall(r'name="(\w+)"\r\n\r\n([^\r]*)\r\n', text))
+                    fake.added.append({"files": text.count('name="torrents"'), **fields})
+                    fake.register(self.headers["Content-Type"], body, fields.get("skip_checking"))
+                    return self.reply(200, "Ok.")
+                if url.path == "/api/v2/torrents/recheck":
+                    fake.rechecked.append(parse_qs(body.decode())["hashes"][0])
+                    return self.reply(200, "")
+                if url.path == "/api/v2/torrents/rename":
+                    form = parse_qs(body.decode())
+                    fake.renamed.append((form["hash"][0], form["name"][0]))
+                    return self.reply(200, "")
+                self.reply(404, "Not Found")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def register(self, content_type, body, skip_checking):
+        """Ajoute à torrents/info les .torrent valides reçus (sauf self.rejected)"""
+        boundary = content_type.split("boundary=")[1].encode()
+        for part in body.split(b"--" + boundary):
+            if b'name="torrents"' not in part:
+                continue
+            content = part.split(b"\r\n\r\n", 1)[1][:-2]
+            try:
+                torrent = torf.Torrent.read_stream(BytesIO(content))
+            except torf.TorfError:
+                continue
+            if torrent.name not in self.rejected:
+                state = "stalledUP" if skip_checking == "true" else "checkingUP"
+                self.torrents.append({"hash": torrent.infohash, "name": torrent.name, "state": state})
+
+    @property
+    def credentials(self):
+        return ("http://127.0.0.1", self.server.server_port, self.username, self.password)
+
+    def expire_sessions(self):
+        self.sessions.clear()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def webui():
+    with FakeWebUI() as fake:
+        yield fake
+
+
+@pytest.fixture
+async def adapter():
+    adapter = QBittorrentAsyncAdapter()
+    yield adapter
+    await adapter.aclose()
+
+
+class TestAsyncClient:
+    """Tests login/add/info/recheck"""
+
+    async def test_login_once_and_reuse_session(self, webui, adapter):
+        client = adapter.client(webui.credentials)
+        assert await client.version() == "v4.6.2"
+        assert await client.version() == "v4.6.2"
+        assert webui.logins == 1
+
+    async def test_add_sends_every_torrent_in_one_request(self, webui, adapter):
+        client = adapter.client(webui.credentials)
+        await client.add([("a.torrent", b"d4:infoe"), ("b.torrent", b"d4:infoe")],
+                         save_path="/data", skip_checking=True, rename="Release")
+
+        assert webui.added == [{"files": 2, "skip_checking": "true", "savepath": "/data", "rename": "Release"}]
+
+    async def test_info_and_recheck(self, webui, adapter):
+        client = adapter.client(webui.credentials)
+        assert [t["hash"] for t in await client.info()] == ["aaa", "bbb"]
+        assert [t["hash"] for t in await client.info(["bbb"])] == ["bbb"]
+        await client.recheck(["aaa", "bbb"])
+        assert webui.rechecked == ["aaa|bbb"]
+
+    async def test_relogin_when_session_expires(self, webui, adapter):
+        client = adapter.client(webui.credentials)
+        await client.version()
+        webui.expire_sessions()
+
+        assert await client.version() == "v4.6.2"
+        assert webui.logins == 2
+
+    async def test_wrong_credentials(self, webui, adapter):
+        credentials = webui.credentials[:3] + ("mauvais",)
+        with pytest.raises(QBittorrentAuthError):
+            await adapter.client(credentials).version()
+        success, message = await adapter.test_connection(credentials)
+        assert not success and "identifiants" in message
+
+    async def test_test_connection(self, webui, adapter):
+        success, message = await adapter.test_connection(webui.credentials)
+        assert success and "v4.6.2" in message
+
+    async def test_clients_are_bounded(self, webui, adapter):
+        for index in range(adapter.MAX_CLIENTS + 2):
+            await adapter.test_connection(webui.credentials[:3] + (f"essai{index}",))
+        adapter.client(("http://127.0.0.1", closed_port(), "admin", "secret"))
+
+        assert len(adapter._clients) == adapter.MAX_CLIENTS
+        # Le coupe-circuit d'une WebUI qui n'a plus de client est oublié
+        assert len(adapter._breakers) == 2
+        adapter.client(webui.credentials)
+        adapter.client(webui.credentials[:3] + ("autre",))
+        adapter.client(webui.credentials[:3] + ("encore",))
+        adapter.client(webui.credentials[:3] + ("dernier",))
+        assert len(adapter._breakers) == 1
+
+
+class TestHealthProbe:
+    """Tests de la sonde de santé (mêmes clients que les routes)"""
+
+    async def test_probe_reports_version(self, webui, adapter):
+        health = await adapter.probe(webui.credentials)
+        assert health["ok"] and health["version"] == "v4.6.2"
+        assert adapter.health == health
+
+    async def test_probe_reports_wrong_credentials(self, webui, adapter):
+        health = await adapter.probe(webui.credentials[:3] + ("mauvais",))
+        assert not health["ok"]
+        assert health["error"] == "identifiants incorrects"
+
+    async def test_probe_sees_the_routes_breaker(self, adapter):
+        credentials = ("http://127.0.0.1", closed_port(), "admin", "secret")
+        adapter.client(credentials).breaker.opened_at = time.monotonic()
+
+        health = await adapter.probe(credentials)
+
+        assert not health["ok"] and "nouvel essai" in health["error"]
+
+    async def test_background_probe_runs_and_stops(self, webui, adapter):
+        adapter.start_health_probe(lambda: webui.credentials, interval=0.01)
+        deadline = time.monotonic() + 5
+        while not adapter.health and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await adapter.aclose()
+
+        assert adapter.health["ok"]
+        assert adapter._probe_task is None
+
+    async def test_rejected_credentials_are_not_retried(self, webui, adapter):
+        credentials = [webui.credentials[:3] + ("mauvais",)]
+        adapter.start_health_probe(lambda: credentials[0], interval=0.01)
+        await asyncio.sleep(0.2)
+        assert webui.logins == 1
+        assert adapter.health["error"] == "identifiants incorrects"
+
+        credentials[0] = webui.credentials
+        deadline = time.monotonic() + 5
+        while not adapter.health["ok"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert adapter.health["ok"]
+
+    async def test_probe_waits_for_configuration(self, adapter):
+        service = QBittorrentService()
+        with patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            mock_user_settings.DEFAULTS = {"qbittorrent": {"host": "http://localhost", "port": 8080,
+                                                           "username": "admin", "password": ""}}
+            mock_user_settings.get.return_value = {"qbittorrent": dict(mock_user_settings.DEFAULTS["qbittorrent"])}
+            service.start_health_probe()
+            assert adapter._probe_task is None
+
+            mock_user_settings.get.return_value["qbittorrent"]["password"] = "secret"
+            service.start_health_probe()
+            assert adapter._probe_task is not None
+
+
+class TestTimeoutsAndBreaker:
+    """Tests des délais et du coupe-circuit"""
+
+    async def test_slow_webui_times_out(self, webui):
+        webui.delay = 1.0
+        with patch("app.services.qbittorrent_async.settings") as mock_settings:
+            mock_settings.qbittorrent_timeout = 0.1
+            mock_settings.qbittorrent_connect_timeout = 0.1
+            mock_settings.qbittorrent_breaker_failures = 5
+            mock_settings.qbittorrent_breaker_reset = 30
+            adapter = QBittorrentAsyncAdapter()
+            started = time.monotonic()
+            with pytest.raises(QBittorrentUnavailable):
+                await adapter.client(webui.credentials).version()
+            await adapter.aclose()
+        assert time.monotonic() - started < 1.0
+
+    async def test_breaker_opens_and_fails_fast(self, adapter):
+        credentials = ("http://127.0.0.1", closed_port(), "admin", "secret")
+        client = adapter.client(credentials)
+        client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        for _ in range(2):
+            with pytest.raises(QBittorrentUnavailable):
+                await client.version()
+        assert client.breaker.state == "open"
+
+        with patch.object(client._http, "request") as request:
+            with pytest.raises(QBittorrentUnavailable, match="nouvel essai"):
+                await client.version()
+            request.assert_not_called()
+
+    def test_breaker_half_open_allows_one_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        assert breaker.state == "open"
+        time.sleep(0.02)
+        assert breaker.state == "half_open"
+        breaker.before_call()
+        with pytest.raises(QBittorrentUnavailable):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_breaker_reopens_after_failed_trial(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.01)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+
+class TestSeedingAsync:
+    """Tests de l'ajout pour seeding via l'adaptateur"""
+
+    async def test_add_for_seeding_async(self, webui, adapter, tmp_path):
+        torrent_path = tmp_path / "Release.Name.mkv.torrent"
+        torrent_path.write_bytes(b"d4:infoe")
+        service = QBittorrentService()
+        tracker = SeedingTracker()
+        with patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch("app.services.qbittorrent_service.seeding_tracker", tracker), \
+                patch.object(service, "credentials", return_value=webui.credentials), \
+                patch("app.services.qbittorrent_service.torrent_verifier") as verifier, \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            verifier.is_trusted.return_value = False
+            mock_user_settings.get.return_value = {"paths": {"qbittorrent_download_path": "/seed"}}
+            success, message = await service.add_torrent_for_seeding_async(str(torrent_path), str(tmp_path))
+
+        assert success, message
+        assert webui.added == [{"files": 1, "skip_checking": "false", "savepath": "/seed", "rename": "Release.Name"}]
+        # .torrent illisible: pas d'info hash à suivre
+        assert tracker.tracked == []
+
+    async def test_add_for_seeding_async_unavailable(self, adapter, tmp_path):
+        torrent_path = tmp_path / "Release.torrent"
+        torrent_path.write_bytes(b"d4:infoe")
+        service = QBittorrentService()
+        credentials = ("http://127.0.0.1", closed_port(), "admin", "secret")
+        with patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch.object(service, "credentials", return_value=credentials), \
+                patch("app.services.qbittorrent_service.torrent_verifier") as verifier, \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            verifier.is_trusted.return_value = False
+            mock_user_settings.get.return_value = {}
+            success, message = await service.add_torrent_for_seeding_async(str(torrent_path), str(tmp_path))
+
+        assert not success
+        assert "injoignable" in message
+
+
+@pytest.fixture
+def torrents(tmp_path):
+    """Trois .torrent: deux fichiers vidéo et un dossier"""
+    def make(name, is_dir=False):
+        content = tmp_path / "content" / name
+        content.parent.mkdir(exist_ok=True)
+        if is_dir:
+            content.mkdir()
+            (content / "video.mkv").write_bytes(os.urandom(20_000))
+        else:
+            content.write_bytes(os.urandom(20_000))
+        torrent = torf.Torrent(path=str(content))
+        torrent.generate(threads=1)
+        torrent_path = tmp_path / f"{content.stem if not is_dir else name}.torrent"
+        torrent.write(str(torrent_path))
+        return {"torrent_path": str(torrent_path), "content_path": str(content), "info_hash": torrent.infohash}
+
+    return [make("Show.S01E01.mkv"), make("Show.S01E02.mkv"), make("Movie", is_dir=True)]
+
+
+class TestSeedingBulk:
+    """Tests de l'ajout en lot (une requête torrents/add par save_path)"""
+
+    async def seed(self, service, adapter, webui, items, trusted=False):
+        self.tracker = SeedingTracker()
+        with patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch("app.services.qbittorrent_service.seeding_tracker", self.tracker), \
+                patch.object(service, "credentials", return_value=webui.credentials), \
+                patch("app.services.qbittorrent_service.torrent_verifier") as verifier, \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            verifier.is_trusted.return_value = trusted
+            mock_user_settings.get.return_value = {"paths": {"qbittorrent_download_path": "/seed"}}
+            results = await service.add_torrents_for_seeding_async(items)
+        mock_user_settings.get.assert_called_once()
+        return results
+
+    async def test_one_request_per_save_path(self, webui, adapter, torrents):
+        torrents[2]["save_path"] = "/films"
+        webui.torrents = []
+        results = await self.seed(QBittorrentService(), adapter, webui, torrents, trusted=True)
+
+        assert sorted((a["files"], a["savepath"]) for a in webui.added) == [(1, "/films"), (2, "/seed")]
+        assert [r["success"] for r in results] == [True, True, True]
+        assert [r["info_hash"] for r in results] == [t["info_hash"] for t in torrents]
+        assert sorted(self.tracker.tracked) == sorted(t["info_hash"] for t in torrents)
+        assert all(r["state"] == "stalledUP" and "sans recheck" in r["message"] for r in results)
+        # Seuls les torrents d'un fichier vidéo ont un nom affiché différent
+        assert sorted(webui.renamed) == sorted([(torrents[0]["info_hash"], "Show.S01E01"),
+                                                (torrents[1]["info_hash"], "Show.S01E02")])
+
+    async def test_unreadable_and_rejected_torrents(self, webui, adapter, torrents, tmp_path):
+        broken = tmp_path / "broken.torrent"
+        broken.write_bytes(b"pas un torrent")
+        webui.rejected.add("Show.S01E02.mkv")
+        items = torrents + [{"torrent_path": str(broken), "content_path": str(tmp_path)}]
+
+        results = await self.seed(QBittorrentService(), adapter, webui, items)
+
+        assert [r["success"] for r in results] == [True, False, True, False]
+        assert results[0]["state"] == "checkingUP"
+        assert "n'a pas ajouté" in results[1]["message"]
+        assert "lecture" in results[3]["message"]
+        assert [a["files"] for a in webui.added] == [3]
+
+    async def test_client_cannot_force_skip_checking(self, webui, adapter, torrents):
+        items = [TorrentSeedItem(**torrent, skip_checking=True).model_dump() for torrent in torrents]
+        assert all("skip_checking" not in item for item in items)
+
+        results = await self.seed(QBittorrentService(), adapter, webui, items, trusted=False)
+
+        assert [a["skip_checking"] for a in webui.added] == ["false"]
+        assert not any(r["skip_checking"] for r in results)
+
+    async def test_unavailable_webui(self, adapter, torrents):
+        credentials = ("http://127.0.0.1", closed_port(), "admin", "secret")
+        service = QBittorrentService()
+        with patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch.object(service, "credentials", return_value=credentials), \
+                patch("app.services.qbittorrent_service.torrent_verifier") as verifier, \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            verifier.is_trusted.return_value = False
+            mock_user_settings.get.return_value = {}
+            results = await service.add_torrents_for_seeding_async(torrents)
+
+        assert not any(r["success"] for r in results)
+        assert all("injoignable" in r["message"] for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -2,11 +2,14 @@
 import pytest
 import sys
 import os
+import time
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.services.job_service import JobService
+from app.services.piece_hash_service import PieceHasher
 from app.services.qbittorrent_service import QBittorrentService
 
 
@@ -16,52 +19,12 @@ class TestQBittorrentServiceConnection:
     def setup_method(self):
         self.service = QBittorrentService()
     
-    def test_initial_client_none(self):
-        """Test que le client est None initialement"""
-        assert self.service._client is None
-    
     def test_get_settings_returns_dict(self):
         """Test que _get_settings retourne un dictionnaire"""
         with patch('app.services.qbittorrent_service.user_settings') as mock_settings:
             mock_settings.get.return_value = {"qbittorrent": {"host": "http://localhost"}}
             result = self.service._get_settings()
             assert isinstance(result, dict)
-    
-    def test_connect_failure_wrong_credentials(self):
-        """Test échec de connexion avec mauvais identifiants"""
-        import qbittorrentapi
-        
-        with patch('qbittorrentapi.Client') as mock_client:
-            mock_instance = MagicMock()
-            mock_instance.auth_log_in.side_effect = qbittorrentapi.LoginFailed()
-            mock_client.return_value = mock_instance
-            
-            success, message = self.service.connect(
-                host="http://localhost",
-                port=8080,
-                username="wrong",
-                password="wrong"
-            )
-            
-            assert success == False
-            assert "identifiants" in message.lower()
-    
-    def test_test_connection_success(self):
-        """Test connexion réussie"""
-        with patch('qbittorrentapi.Client') as mock_client:
-            mock_instance = MagicMock()
-            mock_instance.app.version = "4.5.0"
-            mock_client.return_value = mock_instance
-            
-            success, message = self.service.test_connection(
-                host="http://localhost",
-                port=8080,
-                username="admin",
-                password="admin"
-            )
-            
-            assert success == True
-            assert "4.5.0" in message
 
 
 class TestQBittorrentServiceTorrent:
@@ -113,7 +76,8 @@ class TestQBittorrentServiceTorrent:
             def write(self, output_file, overwrite=True):
                 return None
 
-        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent):
+        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent), \
+                patch('app.services.qbittorrent_service.piece_hasher.generate', new=lambda torrent, *args: True):
             with patch('app.services.qbittorrent_service.settings') as mock_settings:
                 mock_settings.output_path = tmp_path
 
@@ -153,7 +117,8 @@ class TestQBittorrentServiceTorrent:
             def write(self, output_file, overwrite=True):
                 return None
 
-        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent):
+        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent), \
+                patch('app.services.qbittorrent_service.piece_hasher.generate', new=lambda torrent, *args: True):
             with patch('app.services.qbittorrent_service.settings') as mock_settings:
                 mock_settings.output_path = tmp_path
 
@@ -185,6 +150,7 @@ class TestQBittorrentServiceTorrent:
                 self.infohash = "deadbeef"
                 self.size = 123
                 self.pieces = 4
+                self.files = []
                 FakeTorrent.last_instance = self
 
             def generate(self):
@@ -193,7 +159,8 @@ class TestQBittorrentServiceTorrent:
             def write(self, output_file, overwrite=True):
                 return None
 
-        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent):
+        with patch('app.services.qbittorrent_service.torf.Torrent', new=FakeTorrent), \
+                patch('app.services.qbittorrent_service.piece_hasher.generate', new=lambda torrent, *args: True):
             with patch('app.services.qbittorrent_service.settings') as mock_settings:
                 mock_settings.output_path = tmp_path
 
@@ -208,22 +175,51 @@ class TestQBittorrentServiceTorrent:
                 assert FakeTorrent.last_instance.name == "The.Onion.Movie.2008.mkv"
 
 
-class TestQBittorrentServiceSeeding:
-    """Tests pour l'ajout de torrents pour seeding"""
+class TestQBittorrentServiceTorrentJob:
+    """Tests pour la création de torrent en tâche de fond"""
     
     def setup_method(self):
         self.service = QBittorrentService()
+        self.jobs = JobService(max_workers=1)
+    
+    def teardown_method(self):
+        self.jobs.shutdown()
     
-    def test_add_torrent_for_seeding_no_client(self):
-        """Test ajout torrent sans client connecté"""
-        # Mock la connexion pour qu'elle échoue
-        with patch.object(self.service, 'connect', return_value=(False, "Connection failed")):
-            success, message = self.service.add_torrent_for_seeding(
-                "/path/to/torrent.torrent",
-                "/path/to/content"
-            )
-            
-            assert success == False
+    def wait(self, job):
+        deadline = time.monotonic() + 10
+        while not job.finished and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert job.finished
+    
+    def test_job_reports_pieces_and_result(self, tmp_path):
+        """Test que le job expose les pièces hachées et le résultat"""
+        source = tmp_path / "Release.mkv"
+        source.write_bytes(os.urandom(100_000))
+        
+        with patch('app.services.qbittorrent_service.job_service', self.jobs), \
+                patch('app.services.qbittorrent_service.piece_hasher', PieceHasher(workers=1)), \
+                patch('app.services.qbittorrent_service.user_settings') as mock_user_settings, \
+                patch('app.services.qbittorrent_service.settings') as mock_settings:
+            mock_user_settings.get.return_value = {}
+            mock_settings.output_path = tmp_path
+            job = self.service.start_torrent_job(str(source), name="Release", piece_size=16384)
+            self.wait(job)
+        
+        data = job.to_dict()
+        assert data["status"] == "completed"
+        assert data["details"] == {"pieces_done": 7, "pieces_total": 7}
+        assert data["bytes_done"] == data["bytes_total"] == 100_000
+        assert data["result"]["piece_count"] == 7
+        assert (tmp_path / "Release.torrent").exists()
+    
+    def test_job_failure_keeps_error(self, tmp_path):
+        """Test qu'une source absente fait échouer le job avec le message"""
+        with patch('app.services.qbittorrent_service.job_service', self.jobs):
+            job = self.service.start_torrent_job(str(tmp_path / "absent"))
+            self.wait(job)
+        
+        assert job.status == "failed"
+        assert "n'existe pas" in job.error
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 import pytest
 import sys
 import os
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,6 +16,82 @@ class TestFilesRouter:
         from app.routers.files import router
         assert router is not None
         assert router.prefix == "/files"
+    
+    def test_directory_size_stream_runs_in_fs_executor(self):
+        """Test que le parcours de /directory-size/stream avance dans fs_executor"""
+        import json
+        import threading
+        from fastapi import FastAPI
+        from app.routers.files import router
+        from app.utils.fs_executor import FilesystemExecutor
+        
+        def fake_sizes(path):
+            for done in (False, True):
+                yield {"path": path, "thread": threading.current_thread().name, "done": done}
+        
+        app = FastAPI()
+        app.include_router(router)
+        with patch("app.routers.files.file_service") as mock_file_service, \
+                patch("app.routers.files.fs_executor", FilesystemExecutor(max_workers=1)):
+            mock_file_service.iter_directory_size.side_effect = fake_sizes
+            response = TestClient(app).get("/files/directory-size/stream", params={"path": "/data"})
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["done"] for line in lines] == [False, True]
+        assert all(line["thread"].startswith("fs") for line in lines)
+
+    def test_busy_hardlink_journal_is_a_conflict(self):
+        """Test qu'une opération de hardlink en cours donne 409 (rollback ou relance)"""
+        from fastapi import FastAPI
+        from app.routers.files import router
+        from app.services.hardlink_journal_service import HardlinkJournalBusy
+        from app.utils.fs_executor import FilesystemExecutor
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        busy = HardlinkJournalBusy("Une opération sur ces dossiers est déjà en cours")
+        with patch("app.routers.files.file_service") as mock_file_service, \
+                patch("app.routers.files.hardlink_journal_service") as mock_journals, \
+                patch("app.routers.files.fs_executor", FilesystemExecutor(max_workers=1)):
+            mock_file_service.create_hardlink_detailed.side_effect = busy
+            mock_file_service.start_hardlink_job.side_effect = busy
+            mock_journals.rollback.side_effect = busy
+            data = {"source_path": "/data/a", "destination_path": "/data/b"}
+
+            assert client.post("/files/create-hardlink", json=data).status_code == 409
+            assert client.post("/files/create-hardlink/job", json=data).status_code == 409
+            assert client.post("/files/hardlink-journals/abc/rollback").status_code == 409
+
+    def test_create_hardlink_runs_on_job_pool(self):
+        """Test que /create-hardlink attend un job au lieu d'occuper fs_executor"""
+        import threading
+        from fastapi import FastAPI
+        from app.routers.files import router
+        from app.services.job_service import JobService
+        from app.utils.fs_executor import FilesystemExecutor
+
+        jobs = JobService(max_workers=1)
+
+        def start_hardlink_job(source, destination):
+            def run(job):
+                return {"success": True, "message": threading.current_thread().name, "report": None}
+            return jobs.submit("hardlink", run)
+
+        app = FastAPI()
+        app.include_router(router)
+        try:
+            with patch("app.routers.files.file_service") as mock_file_service, \
+                    patch("app.routers.files.job_service", jobs), \
+                    patch("app.routers.files.fs_executor", FilesystemExecutor(max_workers=1)):
+                mock_file_service.start_hardlink_job.side_effect = start_hardlink_job
+                response = TestClient(app).post("/files/create-hardlink",
+                                                json={"source_path": "/data/a", "destination_path": "/data/b"})
+        finally:
+            jobs.shutdown()
+
+        assert response.json()["success"] is True
+        assert response.json()["message"].startswith("job")
 
 
 class TestTorrentRouter:
@@ -92,6 +168,16 @@ class TestTmdbRouter:
         assert router.prefix == "/tmdb"
 
 
+class TestJobsRouter:
+    """Tests pour le router jobs"""
+    
+    def test_jobs_router_exists(self):
+        """Test que le router jobs existe"""
+        from app.routers.jobs import router
+        assert router is not None
+        assert router.prefix == "/jobs"
+
+
 class TestMainApp:
     """Tests pour l'application principale"""
     
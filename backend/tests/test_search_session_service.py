@@ -0,0 +1,73 @@
+"""Tests unitaires pour les sessions de recherche paginées"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_session_service import SearchSessionService, take
+
+
+def numbers(n):
+    for i in range(n):
+        yield {"value": i}
+
+
+class TestTake:
+    """Tests pour la prise par lots"""
+
+    def test_limit(self):
+        iterator = numbers(5)
+        items, exhausted = take(iterator, 2)
+        assert [i["value"] for i in items] == [0, 1]
+        assert exhausted is False
+
+    def test_exhausted(self):
+        items, exhausted = take(numbers(2), 5)
+        assert len(items) == 2
+        assert exhausted is True
+
+    def test_max_wait_returns_early(self):
+        items, exhausted = take(numbers(100), 50, max_wait=0)
+        assert len(items) == 2
+        assert exhausted is False
+
+
+class TestSearchSessionService:
+    """Tests pour la pagination sans relancer le parcours"""
+
+    def setup_method(self):
+        self.service = SearchSessionService()
+
+    def test_pages_continue_iterator(self):
+        session = self.service.create(numbers(5), "/data", "q")
+        assert [i["value"] for i in session.next_page(2)] == [0, 1]
+        assert [i["value"] for i in session.next_page(2)] == [2, 3]
+        assert [i["value"] for i in session.next_page(2)] == [4]
+        assert session.done
+        assert session.next_page(2) == []
+        assert session.returned == 5
+
+    def test_get_and_close(self):
+        session = self.service.create(numbers(5), "/data", "q")
+        assert self.service.get(session.id) is session
+        assert self.service.close(session.id)
+        assert self.service.get(session.id) is None
+        assert not self.service.close(session.id)
+
+    def test_expired_sessions_purged(self):
+        session = self.service.create(numbers(5), "/data", "q")
+        session.last_access -= self.service.SESSION_TTL + 1
+        assert self.service.get(session.id) is None
+
+    def test_oldest_session_evicted(self):
+        self.service.MAX_SESSIONS = 2
+        first = self.service.create(numbers(1), "/data", "a")
+        first.last_access -= 10
+        self.service.create(numbers(1), "/data", "b")
+        self.service.create(numbers(1), "/data", "c")
+        assert self.service.get(first.id) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
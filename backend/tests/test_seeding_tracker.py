@@ -0,0 +1,207 @@
+"""Tests unitaires pour le suivi des torrents en seeding (sync/maindata)"""
+import pytest
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qbittorrent_async import QBittorrentUnavailable
+from app.services.seeding_tracker import SeedingTracker, phase
+
+
+class FakeMaindataClient:
+    """Rejoue des réponses sync/maindata et note les rid demandés"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.rids = []
+
+    async def maindata(self, rid=0):
+        self.rids.append(rid)
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+FULL = {
+    "rid": 1,
+    "full_update": True,
+    "torrents": {
+        "aaa": {"name": "Release", "state": "checkingUP", "progress": 0.2, "tags": "", "ratio": 0},
+        "zzz": {"name": "Autre", "state": "uploading", "progress": 1},
+    },
+}
+
+
+class TestIncrementalSync:
+    """Tests de l'application des mises à jour"""
+
+    async def test_partial_updates_are_merged(self):
+        tracker = SeedingTracker()
+        tracker.track(["AAA"])
+        client = FakeMaindataClient(
+            FULL,
+            {"rid": 2, "torrents": {"aaa": {"state": "stalledUP", "progress": 1}}},
+        )
+
+        await tracker.sync(client)
+        await tracker.sync(client)
+
+        assert client.rids == [0, 1]
+        [torrent] = tracker.snapshot()["torrents"]
+        assert torrent["hash"] == "aaa"
+        assert torrent["name"] == "Release"
+        assert torrent["state"] == "stalledUP" and torrent["phase"] == "seeding"
+        assert "tags" not in torrent
+
+    async def test_untracked_changes_do_not_notify(self):
+        tracker = SeedingTracker()
+        tracker.track(["aaa"])
+        client = FakeMaindataClient(FULL, {"rid": 2, "torrents": {"zzz": {"upspeed": 1000}}})
+        await tracker.sync(client)
+        version = tracker.version
+
+        await tracker.sync(client)
+
+        assert tracker.version == version
+        assert tracker.rid == 2
+
+    async def test_removed_torrent_becomes_absent(self):
+        tracker = SeedingTracker()
+        tracker.track(["aaa"])
+        client = FakeMaindataClient(FULL, {"rid": 2, "torrents_removed": ["aaa"]})
+        await tracker.sync(client)
+        await tracker.sync(client)
+
+        assert tracker.snapshot()["torrents"][0]["phase"] == "absent"
+
+    async def test_error_resets_rid(self):
+        tracker = SeedingTracker()
+        tracker.track(["aaa"])
+        client = FakeMaindataClient(FULL, QBittorrentUnavailable("injoignable"), FULL)
+        await tracker.sync(client)
+        with pytest.raises(QBittorrentUnavailable):
+            await tracker.sync(client)
+        assert tracker.snapshot()["error"] == "injoignable"
+
+        await tracker.sync(client)
+
+        assert client.rids == [0, 1, 0]
+        assert tracker.error is None
+
+    async def test_finished_torrents_are_dropped_after_retention(self):
+        tracker = SeedingTracker()
+        tracker.track(["aaa", "bbb", "ccc"])
+        client = FakeMaindataClient(
+            FULL,
+            {"rid": 2, "torrents": {"aaa": {"state": "stalledUP", "progress": 1},
+                                    "bbb": {"state": "checkingUP"}}},
+            {"rid": 3, "torrents_removed": ["bbb"]},
+        )
+        with patch("app.services.seeding_tracker.settings") as mock_settings:
+            mock_settings.qbittorrent_sync_retention = 60
+            await tracker.sync(client)
+            await tracker.sync(client)
+            await tracker.sync(client)
+            # Derniers états encore visibles pendant la rétention
+            assert [t["phase"] for t in tracker.snapshot()["torrents"]] == ["seeding", "absent", "absent"]
+
+            with patch("app.services.seeding_tracker.time.time", return_value=time.time() + 120):
+                version = tracker.version
+                assert tracker.prune()
+        assert tracker.tracked == []
+        assert tracker.version > version
+
+    async def test_torrent_leaving_terminal_phase_stays_tracked(self):
+        tracker = SeedingTracker()
+        tracker.track(["aaa"])
+        client = FakeMaindataClient(
+            {"rid": 1, "full_update": True, "torrents": {"aaa": {"state": "uploading"}}},
+            {"rid": 2, "torrents": {"aaa": {"state": "checkingUP"}}},
+        )
+        with patch("app.services.seeding_tracker.settings") as mock_settings:
+            mock_settings.qbittorrent_sync_retention = 60
+            await tracker.sync(client)
+            await tracker.sync(client)
+            with patch("app.services.seeding_tracker.time.time", return_value=time.time() + 120):
+                assert not tracker.prune()
+        assert tracker.tracked == ["aaa"]
+
+    def test_phases(self):
+        assert phase("checkingResumeData") == "checking"
+        assert phase("forcedUP") == "seeding"
+        assert phase("missingFiles") == "error"
+        assert phase(None) == "unknown"
+
+
+class TestPush:
+    """Tests des notifications et de la boucle de fond"""
+
+    async def test_wait_for_change(self):
+        tracker = SeedingTracker()
+        version = tracker.version
+        assert not await tracker.wait_for_change(version, 0.01)
+
+        waiter = asyncio.ensure_future(tracker.wait_for_change(version, 5))
+        await asyncio.sleep(0)
+        tracker.track(["aaa"])
+
+        assert await waiter
+
+    async def test_background_loop_syncs_only_when_tracking(self):
+        tracker = SeedingTracker()
+        client = FakeMaindataClient(FULL)
+        with patch("app.services.seeding_tracker.qbittorrent_async") as adapter, \
+                patch("app.services.seeding_tracker.settings") as mock_settings:
+            adapter.client.return_value = client
+            mock_settings.qbittorrent_sync_interval = 0.01
+            tracker.start(lambda: ("http://localhost", 8080, "admin", "secret"))
+            await asyncio.sleep(0.05)
+            assert client.rids == []
+
+            tracker.track(["aaa"])
+            await tracker.wait_for_change(tracker.version, 1)
+            deadline = asyncio.get_running_loop().time() + 1
+            while tracker.synced_at is None and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(0.01)
+            await tracker.stop()
+
+        assert client.rids[0] == 0
+        assert tracker.snapshot()["torrents"][0]["phase"] == "checking"
+
+    async def test_background_loop_stops_when_nothing_is_tracked(self):
+        tracker = SeedingTracker()
+        client = FakeMaindataClient(FULL)
+        with patch("app.services.seeding_tracker.qbittorrent_async") as adapter, \
+                patch("app.services.seeding_tracker.settings") as mock_settings:
+            adapter.client.return_value = client
+            mock_settings.qbittorrent_sync_interval = 0.01
+            mock_settings.qbittorrent_sync_retention = 300
+            tracker.start(lambda: ("http://localhost", 8080, "admin", "secret"))
+            assert tracker._task is None
+
+            tracker.track(["aaa"])
+            task = tracker._task
+            await asyncio.sleep(0.05)
+            tracker.untrack("aaa")
+            await asyncio.wait_for(task, 1)
+
+            tracker.track(["bbb"])
+            assert tracker._task is not task and not tracker._task.done()
+            await tracker.stop()
+            tracker.track(["ccc"])
+            assert tracker._task is None
+
+    def test_asyncio_primitives_created_lazily(self):
+        # Instancié à l'import du module, hors de toute boucle
+        tracker = SeedingTracker()
+        tracker.track(["aaa"])
+        assert tracker._lock is None and tracker._changed is None and tracker._wakeup is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
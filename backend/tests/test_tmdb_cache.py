@@ -0,0 +1,232 @@
+"""Tests unitaires pour le cache des réponses TMDB"""
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tmdb_cache import TMDBCache
+from app.services.tmdb_service import TMDBService
+
+
+@pytest.fixture
+def cache_settings():
+    with patch("app.services.tmdb_cache.settings") as mock_settings:
+        mock_settings.tmdb_cache_search_ttl = 3600
+        mock_settings.tmdb_cache_details_ttl = 86400
+        mock_settings.tmdb_cache_stale_ttl = 86400
+        mock_settings.tmdb_cache_memory_entries = 2
+        yield mock_settings
+
+
+@pytest.fixture
+def cache(tmp_path, cache_settings):
+    cache = TMDBCache(tmp_path / "tmdb_cache.db")
+    yield cache
+    cache.close()
+
+
+def response(data):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = data
+    return mock_response
+
+
+@pytest.fixture
+def service(cache):
+    """TMDBService avec cache et client HTTP simulé (clé v3)"""
+    service = TMDBService(cache=cache)
+    service._client = MagicMock(is_closed=False)
+    service._client.get = AsyncMock(return_value=response({"id": 603, "title": "Matrix"}))
+    with patch.object(service, "_get_api_key", return_value="a" * 32), \
+            patch("app.services.tmdb_service.settings") as mock_settings:
+        mock_settings.tmdb_cache_enabled = True
+        yield service
+
+
+class TestTMDBCache:
+    """Tests des deux niveaux du cache"""
+
+    def test_key_includes_language_but_not_api_key(self):
+        key = TMDBCache.make_key("/movie/603", {"language": "fr-FR", "api_key": "secret"})
+        assert "fr-FR" in key and "secret" not in key
+        assert key != TMDBCache.make_key("/movie/603", {"language": "en-US"})
+        assert TMDBCache.make_key("/search/movie", {"query": "a", "year": 1999}) == \
+            TMDBCache.make_key("/search/movie", {"year": 1999, "query": "a"})
+
+    def test_ttl_per_endpoint(self, cache_settings):
+        assert TMDBCache.ttl("/search/movie") == 3600
+        assert TMDBCache.ttl("/movie/603") == 86400
+
+    def test_disk_layer_survives_restart(self, cache, tmp_path):
+        cache.put("k", "/movie/603", {"id": 603})
+        assert cache.get("k") == ({"id": 603}, True)
+
+        other = TMDBCache(tmp_path / "tmdb_cache.db")
+        assert other.get("k") == ({"id": 603}, True)
+        assert other.get("k") == ({"id": 603}, True)
+        assert other.metrics["disk_hits"] == 1 and other.metrics["memory_hits"] == 1
+        other.close()
+
+    def test_memory_is_lru(self, cache):
+        for key in ("a", "b", "c"):
+            cache.put(key, "/movie/1", {"key": key})
+        assert list(cache._memory) == ["b", "c"]
+        assert cache.get("a") == ({"key": "a"}, True)
+        assert cache.metrics["disk_hits"] == 1
+
+    def test_stale_then_expired(self, cache, cache_settings):
+        cache.put("k", "/search/movie", {"results": []})
+        with patch("app.services.tmdb_cache.time.time", return_value=time.time() + 7200):
+            assert cache.get("k") == ({"results": []}, False)
+        with patch("app.services.tmdb_cache.time.time", return_value=time.time() + 3600 + 86400 + 60):
+            assert cache.get("k") is None
+        stats = cache.stats()
+        assert stats["stale_hits"] == 1 and stats["misses"] == 1
+        assert stats["disk_entries"] == 1
+
+    def test_memory_hits_refresh_last_used_on_disk(self, cache):
+        cache.put("old", "/movie/1", {"id": 1})
+        cache.put("new", "/movie/2", {"id": 2})
+        with patch("app.services.tmdb_cache.time.time", return_value=time.time() + 60):
+            assert cache.get("old") == ({"id": 1}, True)
+        cache.flush_touched()
+
+        rows = cache._connect().execute("SELECT key FROM responses ORDER BY last_used DESC").fetchall()
+        assert [row[0] for row in rows] == ["old", "new"]
+
+    async def test_disk_layer_runs_off_the_event_loop(self, cache):
+        loop_thread = threading.get_ident()
+        threads = []
+        read_disk, write_disk = cache._read_disk, cache._write_disk
+
+        def record(func):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return func(*args)
+            return wrapper
+
+        with patch.object(cache, "_read_disk", record(read_disk)), \
+                patch.object(cache, "_write_disk", record(write_disk)):
+            await cache.aput("k", "/movie/603", {"id": 603})
+            cache._memory.clear()
+            assert await cache.aget("k") == ({"id": 603}, True)
+            assert await cache.aget("k") == ({"id": 603}, True)
+
+        assert len(threads) == 2 and loop_thread not in threads
+        assert cache.metrics["disk_hits"] == 1 and cache.metrics["memory_hits"] == 1
+
+
+class TestTMDBServiceCache:
+    """Tests de TMDBService avec cache"""
+
+    async def test_repeated_details_hit_the_cache(self, service):
+        first = await service.get_movie_details(603)
+        second = await service.get_movie_details(603)
+
+        assert first == second
+        service._client.get.assert_awaited_once()
+        assert service.cache_stats()["hits"] == 1
+
+    async def test_stale_response_is_served_and_revalidated(self, service, cache):
+        await service._make_request("/movie/603")
+        service._client.get.return_value = response({"id": 603, "title": "The Matrix"})
+        key = next(iter(cache._memory))
+        cache._memory[key] = (cache._memory[key][0], time.time() - 1)
+
+        stale = await service._make_request("/movie/603")
+        assert stale["title"] == "Matrix"
+        await asyncio.gather(*service._inflight.values())
+
+        assert (await service._make_request("/movie/603"))["title"] == "The Matrix"
+        assert service._client.get.await_count == 2
+        assert cache.metrics["revalidations"] == 1
+
+    async def test_errors_are_not_cached(self, service):
+        error = MagicMock(status_code=404, text="Not Found")
+        service._client.get.return_value = error
+        assert await service._make_request("/movie/1") is None
+        assert await service._make_request("/movie/1") is None
+        assert service._client.get.await_count == 2
+
+    async def test_cache_can_be_disabled(self, service):
+        with patch("app.services.tmdb_service.settings") as mock_settings:
+            mock_settings.tmdb_cache_enabled = False
+            await service._make_request("/movie/603")
+            await service._make_request("/movie/603")
+        assert service._client.get.await_count == 2
+
+
+class TestSingleFlight:
+    """Tests du partage des appels identiques simultanés"""
+
+    @staticmethod
+    def slow_client(service, data):
+        calls = []
+
+        async def get(url, params=None, headers=None):
+            calls.append((url, params))
+            await asyncio.sleep(0.05)
+            return response(data)
+
+        service._client.get = get
+        return calls
+
+    async def test_concurrent_identical_requests_share_one_call(self, service):
+        calls = self.slow_client(service, {"results": [{"id": 1, "title": "Matrix"}]})
+
+        results = await asyncio.gather(*[service.search_movie("Matrix") for _ in range(5)])
+
+        assert len(calls) == 1
+        assert all(result == results[0] for result in results)
+        assert service.cache_stats()["coalesced"] == 4
+        assert service._inflight == {}
+
+    async def test_different_requests_are_not_shared(self, service):
+        calls = self.slow_client(service, {"results": []})
+        await asyncio.gather(service.search_movie("Matrix"), service.search_movie("Matrix", 1999),
+                             service.search_tv("Matrix"))
+        assert len(calls) == 3
+
+    async def test_without_cache(self):
+        service = TMDBService()
+        service._client = MagicMock(is_closed=False)
+        calls = self.slow_client(service, {"id": 603, "title": "Matrix"})
+        with patch.object(service, "_get_api_key", return_value="a" * 32):
+            await asyncio.gather(service.get_movie_details(603), service.get_movie_details(603))
+            await service.get_movie_details(603)
+        # Partagé tant que l'appel est en cours, refait ensuite (pas de cache)
+        assert len(calls) == 2
+
+    async def test_cancelled_caller_does_not_cancel_shared_call(self, service, cache):
+        calls = self.slow_client(service, {"id": 603, "title": "Matrix"})
+        first = asyncio.ensure_future(service.get_movie_details(603))
+        second = asyncio.ensure_future(service.get_movie_details(603))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert (await second)["title"] == "Matrix"
+        assert len(calls) == 1
+        assert cache.stats()["disk_entries"] == 1
+
+    async def test_errors_reach_every_caller(self, service):
+        async def get(url, params=None, headers=None):
+            await asyncio.sleep(0.02)
+            raise httpx.ConnectTimeout("délai dépassé")
+
+        service._client.get = get
+        results = await asyncio.gather(service._make_request("/movie/1"), service._make_request("/movie/1"),
+                                       return_exceptions=True)
+        assert all(isinstance(result, httpx.ConnectTimeout) for result in results)
+        assert service._inflight == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
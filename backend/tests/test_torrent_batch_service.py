@@ -0,0 +1,181 @@
+"""Tests unitaires pour la création de torrents par lots"""
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.torrent import TorrentCreate
+from app.services.job_service import JobService
+from app.services.piece_hash_service import PieceHasher
+from app.services.torrent_batch_service import TorrentBatchService
+from app.utils.disks import is_rotational, physical_disk_id
+
+
+def wait(job):
+    deadline = time.monotonic() + 10
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+class TestPhysicalDiskId:
+    """Tests de l'identification du disque physique"""
+
+    def test_same_filesystem_same_disk(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"a")
+        (tmp_path / "b").mkdir()
+        assert physical_disk_id(str(tmp_path / "a")) == physical_disk_id(str(tmp_path / "b"))
+
+    def test_missing_path_raises(self, tmp_path):
+        with pytest.raises(OSError):
+            physical_disk_id(str(tmp_path / "absent"))
+
+    def test_rotational_from_sysfs(self, tmp_path):
+        for disk, flag in (("sda", "1"), ("nvme0n1", "0")):
+            (tmp_path / disk / "queue").mkdir(parents=True)
+            (tmp_path / disk / "queue" / "rotational").write_text(flag + "\n")
+        with patch("app.utils.disks.SYS_BLOCK", str(tmp_path)):
+            assert is_rotational("sda")
+            assert not is_rotational("nvme0n1")
+            assert not is_rotational("sdb")
+            assert not is_rotational("dev:2049")
+
+
+class TestTorrentBatchService:
+    """Tests du lot: résultats par source, échecs isolés, un lecteur par disque"""
+
+    def setup_method(self):
+        self.service = TorrentBatchService()
+        self.jobs = JobService(max_workers=1)
+
+    def teardown_method(self):
+        self.jobs.shutdown()
+
+    def run_batch(self, tmp_path, items):
+        with patch('app.services.torrent_batch_service.job_service', self.jobs), \
+                patch('app.services.torrent_batch_service.piece_hasher', PieceHasher(workers=2)), \
+                patch('app.services.qbittorrent_service.piece_hasher', PieceHasher(workers=2)), \
+                patch('app.services.qbittorrent_service.user_settings') as mock_user_settings, \
+                patch('app.services.qbittorrent_service.settings') as mock_settings:
+            mock_user_settings.get.return_value = {}
+            mock_settings.output_path = tmp_path
+            job = self.service.start_batch_job(items)
+            wait(job)
+        return job
+
+    def test_batch_creates_every_torrent(self, tmp_path):
+        sources = []
+        for i in range(3):
+            source = tmp_path / f"Release.{i}.mkv"
+            source.write_bytes(os.urandom(50_000 + i))
+            sources.append(source)
+        items = [TorrentCreate(source_path=str(s), piece_size=16384) for s in sources]
+
+        job = self.run_batch(tmp_path, items)
+
+        data = job.to_dict()
+        assert data["status"] == "completed"
+        assert data["files_done"] == data["files_total"] == 3
+        assert data["bytes_done"] == data["bytes_total"] == sum(s.stat().st_size for s in sources)
+        assert job.message == "3/3 torrents créés"
+        assert [item["status"] for item in job.result] == ["completed"] * 3
+        for i in range(3):
+            assert (tmp_path / f"Release.{i}.torrent").exists()
+
+    def test_failed_item_does_not_fail_batch(self, tmp_path):
+        source = tmp_path / "Release.mkv"
+        source.write_bytes(os.urandom(40_000))
+        items = [
+            TorrentCreate(source_path=str(tmp_path / "absent")),
+            TorrentCreate(source_path=str(source), piece_size=16384),
+        ]
+
+        job = self.run_batch(tmp_path, items)
+
+        assert job.status == "completed"
+        assert job.message == "1/2 torrents créés"
+        assert job.result[0]["status"] == "failed"
+        assert "n'existe pas" in job.result[0]["error"]
+        assert job.result[1]["status"] == "completed"
+        assert job.details["succeeded"] == 1
+
+    def test_one_reader_per_disk(self, tmp_path):
+        """Les sources d'un même disque sont traitées l'une après l'autre"""
+        for i in range(4):
+            (tmp_path / f"R{i}.mkv").write_bytes(b"x" * 1000)
+        items = [TorrentCreate(source_path=str(tmp_path / f"R{i}.mkv")) for i in range(4)]
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_create(source_path, *args):
+            with lock:
+                active.append(source_path)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(source_path)
+            return True, {"torrent_name": os.path.basename(source_path)}
+
+        disks = {str(tmp_path / f"R{i}.mkv"): f"disk{i % 2}" for i in range(4)}
+        with patch('app.services.torrent_batch_service.job_service', self.jobs), \
+                patch('app.services.torrent_batch_service.qbittorrent_service.create_torrent_sync',
+                      side_effect=fake_create), \
+                patch.object(self.service, '_disk_of', side_effect=lambda path: disks[path]):
+            job = self.service.start_batch_job(items)
+            wait(job)
+
+        assert job.status == "completed"
+        assert job.details["disks"] == 2
+        assert max(peak) <= 2
+
+    def test_reads_serialised_only_on_rotational_disks(self, tmp_path):
+        for i in range(2):
+            (tmp_path / f"R{i}.mkv").write_bytes(b"x" * 1000)
+        items = [TorrentCreate(source_path=str(tmp_path / f"R{i}.mkv")) for i in range(2)]
+        disks = {str(tmp_path / "R0.mkv"): "sda", str(tmp_path / "R1.mkv"): "nvme0n1"}
+        locks = {}
+
+        def fake_create(source_path, name, piece_size, private, tracker_url, progress, read_lock, pool):
+            locks[source_path] = read_lock
+            return True, {"torrent_name": os.path.basename(source_path)}
+
+        with patch('app.services.torrent_batch_service.job_service', self.jobs), \
+                patch('app.services.torrent_batch_service.qbittorrent_service.create_torrent_sync',
+                      side_effect=fake_create), \
+                patch.object(self.service, '_disk_of', side_effect=lambda path: disks[path]), \
+                patch.object(self.service, '_serialize_reads', side_effect=lambda disk: disk == "sda"):
+            wait(self.service.start_batch_job(items))
+
+        assert locks[str(tmp_path / "R0.mkv")] is not None
+        assert locks[str(tmp_path / "R1.mkv")] is None
+
+    def test_cancel_stops_batch(self, tmp_path):
+        items = [TorrentCreate(source_path=str(tmp_path)) for _ in range(3)]
+        started = threading.Event()
+        release = threading.Event()
+
+        def fake_create(source_path, *args):
+            started.set()
+            release.wait(5)
+            return True, {}
+
+        with patch('app.services.torrent_batch_service.job_service', self.jobs), \
+                patch('app.services.torrent_batch_service.qbittorrent_service.create_torrent_sync',
+                      side_effect=fake_create):
+            job = self.service.start_batch_job(items)
+            assert started.wait(5)
+            self.jobs.cancel(job.id)
+            release.set()
+            wait(job)
+
+        assert job.status == "cancelled"
+        assert job.files_done == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,180 @@
+"""Tests unitaires pour la vérification locale des torrents"""
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import torf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.piece_hash_cache import PieceHashCache
+from app.services.piece_hash_service import PieceHasher
+from app.services.qbittorrent_service import QBittorrentService
+from app.services.torrent_verify_service import TorrentVerifier, VerificationCache
+
+PIECE_SIZE = 16384
+
+
+@pytest.fixture
+def release(tmp_path):
+    root = tmp_path / "Release"
+    (root / "Sub").mkdir(parents=True)
+    (root / "Release.mkv").write_bytes(os.urandom(300_000))
+    (root / "Release.nfo").write_bytes(os.urandom(2_000))
+    (root / "Sub" / "Release.srt").write_bytes(os.urandom(30_000))
+    torrent = torf.Torrent(path=str(root))
+    torrent.piece_size = PIECE_SIZE
+    torrent.generate(threads=1)
+    torrent_path = tmp_path / "Release.torrent"
+    torrent.write(str(torrent_path))
+    return root, str(torrent_path)
+
+
+@pytest.fixture
+def verifier(tmp_path):
+    cache = VerificationCache(tmp_path / "verifications.db")
+    yield TorrentVerifier(hasher=PieceHasher(workers=2, buffer_size=PIECE_SIZE * 4), cache=cache)
+    cache.close()
+
+
+def corrupt(path, offset):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+class TestTorrentVerifier:
+    """Tests des modes sample/full et des fichiers manquants"""
+
+    def test_full_verification_ok(self, release, verifier):
+        root, torrent_path = release
+        result = verifier.verify(torrent_path, str(root), mode="full")
+
+        assert result.ok
+        assert result.pieces_checked == result.pieces_total
+        assert not result.cached
+
+    def test_full_verification_finds_corrupted_piece(self, release, verifier):
+        root, torrent_path = release
+        # Position de la vidéo dans le flux du torrent (torf trie les fichiers)
+        torrent = torf.Torrent.read(torrent_path)
+        files = TorrentVerifier.content_files(torrent, str(root))
+        offset = sum(size for path, size in files[:[p for p, _ in files].index(str(root / "Release.mkv"))])
+        corrupt(root / "Release.mkv", 100_000)
+
+        result = verifier.verify(torrent_path, str(root), mode="full")
+
+        assert not result.ok
+        assert result.mismatched == [(offset + 100_000) // PIECE_SIZE]
+
+    def test_sample_reads_boundaries_and_sample(self, release, verifier):
+        root, torrent_path = release
+        with patch("app.services.torrent_verify_service.settings") as mock_settings:
+            mock_settings.torrent_verify_sample_pieces = 2
+            mock_settings.torrent_hash_cache_enabled = False
+            result = verifier.verify(torrent_path, str(root), mode="sample")
+
+        assert result.ok
+        assert 0 < result.pieces_checked < result.pieces_total
+
+    def test_sample_detects_truncated_file(self, release, verifier):
+        root, torrent_path = release
+        with open(root / "Release.nfo", "r+b") as f:
+            f.truncate(1_000)
+
+        result = verifier.verify(torrent_path, str(root), mode="sample")
+
+        assert not result.ok
+        assert result.missing_files == [str(root / "Release.nfo")]
+        assert result.pieces_checked == 0
+
+    def test_single_file_torrent(self, tmp_path, verifier):
+        path = tmp_path / "Movie.mkv"
+        path.write_bytes(os.urandom(50_000))
+        torrent = torf.Torrent(path=str(path))
+        torrent.piece_size = PIECE_SIZE
+        torrent.generate(threads=1)
+        torrent.write(str(tmp_path / "Movie.torrent"))
+
+        result = verifier.verify(str(tmp_path / "Movie.torrent"), str(path), mode="full")
+
+        assert result.ok
+        assert result.pieces_checked == 4
+
+
+class TestVerificationTrust:
+    """Tests du résultat mémorisé et de l'ajout sans recheck"""
+
+    def test_successful_verification_is_trusted(self, release, verifier):
+        root, torrent_path = release
+        assert not verifier.is_trusted(torrent_path, str(root))
+
+        verifier.verify(torrent_path, str(root), mode="full")
+
+        assert verifier.is_trusted(torrent_path, str(root))
+        again = verifier.verify(torrent_path, str(root), mode="full")
+        assert again.ok and again.cached
+
+    def test_modified_content_is_no_longer_trusted(self, release, verifier):
+        root, torrent_path = release
+        verifier.verify(torrent_path, str(root), mode="full")
+        corrupt(root / "Release.mkv", 10)
+        os.utime(root / "Release.mkv", ns=(1, 1))
+
+        assert not verifier.is_trusted(torrent_path, str(root))
+
+    def test_sample_trust_follows_setting(self, release, verifier):
+        root, torrent_path = release
+        verifier.verify(torrent_path, str(root), mode="sample")
+        # Par défaut, seul un contrôle complet évite le recheck
+        assert not verifier.is_trusted(torrent_path, str(root))
+
+        with patch("app.services.torrent_verify_service.settings") as mock_settings:
+            mock_settings.torrent_hash_cache_enabled = False
+            mock_settings.torrent_verify_trust_sample = False
+            assert not verifier.is_trusted(torrent_path, str(root))
+            mock_settings.torrent_verify_trust_sample = True
+            assert verifier.is_trusted(torrent_path, str(root))
+
+    def test_piece_cache_makes_full_verification_free(self, release, tmp_path):
+        root, torrent_path = release
+        pieces_cache = PieceHashCache(tmp_path / "pieces.db")
+        torrent = torf.Torrent.read(torrent_path)
+        files = TorrentVerifier.content_files(torrent, str(root))
+        key = PieceHashCache.make_key(str(root), files, PIECE_SIZE)
+        pieces_cache.put(key, PIECE_SIZE, torrent.size, torrent.metainfo["info"]["pieces"])
+        hasher = MagicMock()
+        verifier = TorrentVerifier(hasher=hasher, cache=VerificationCache(tmp_path / "v.db"),
+                                   pieces_cache=pieces_cache)
+
+        result = verifier.verify(torrent_path, str(root), mode="full")
+
+        assert result.ok and result.cached
+        hasher.hash_selected.assert_not_called()
+        pieces_cache.close()
+
+    async def test_add_for_seeding_skips_check_when_trusted(self, release, verifier):
+        root, torrent_path = release
+        verifier.verify(torrent_path, str(root), mode="full")
+        service = QBittorrentService()
+        adapter = MagicMock()
+        client = adapter.client.return_value
+        client.add = AsyncMock()
+
+        with patch("app.services.qbittorrent_service.torrent_verifier", verifier), \
+                patch("app.services.qbittorrent_service.qbittorrent_async", adapter), \
+                patch("app.services.qbittorrent_service.seeding_tracker"), \
+                patch("app.services.qbittorrent_service.user_settings") as mock_user_settings:
+            mock_user_settings.get.return_value = {}
+            success, message = await service.add_torrent_for_seeding_async(torrent_path, str(root))
+
+        assert success
+        assert "sans recheck" in message
+        assert client.add.call_args.kwargs["skip_checking"] is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
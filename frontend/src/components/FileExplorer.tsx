@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo, useCallback } from 'react';
+import { useState, useEffect, useMemo, useCallback, useRef } from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { 
   Folder, 
@@ -69,21 +69,37 @@ export default function FileExplorer() {
     );
   }, [directory?.items, searchQuery, searchResults]);
 
-  // Recherche globale (récursive) avec Enter
-  const handleGlobalSearch = useCallback(async () => {
+  // Recherche globale (récursive) avec Enter, résultats affichés au fil de l'eau
+  const stopSearchRef = useRef<(() => void) | null>(null);
+
+  const stopSearch = useCallback(() => {
+    stopSearchRef.current?.();
+    stopSearchRef.current = null;
+  }, []);
+
+  const handleGlobalSearch = useCallback(() => {
     if (!searchQuery.trim() || !currentPath) return;
+    stopSearch();
     setIsSearching(true);
     setSearchError(null);
-    try {
-      const result = await filesApi.search(currentPath, searchQuery, filterType || undefined);
-      setSearchResults(result.results);
-    } catch {
-      setSearchResults(null);
-      setSearchError('Erreur lors de la recherche. Veuillez réessayer.');
-    } finally {
-      setIsSearching(false);
-    }
-  }, [searchQuery, currentPath, filterType]);
+    setSearchResults([]);
+    stopSearchRef.current = filesApi.streamSearch(currentPath, searchQuery, filterType || undefined, {
+      onResult: (item) => setSearchResults((prev) => [...(prev || []), item]),
+      onDone: () => {
+        stopSearchRef.current = null;
+        setIsSearching(false);
+      },
+      onError: () => {
+        stopSearchRef.current = null;
+        setSearchResults(null);
+        setSearchError('Erreur lors de la recherche. Veuillez réessayer.');
+        setIsSearching(false);
+      },
+    });
+  }, [searchQuery, currentPath, filterType, stopSearch]);
+
+  // Arrêter la recherche en cours si le composant est démonté
+  useEffect(() => stopSearch, [stopSearch]);
 
   useEffect(() => {
     if (root && currentPath === '') {
@@ -156,6 +172,8 @@ export default function FileExplorer() {
               onChange={(e) => {
                 setSearchQuery(e.target.value);
                 if (e.target.value === '') {
+                  stopSearch();
+                  setIsSearching(false);
                   setSearchResults(null);
                 }
                 setSearchError(null);
@@ -171,6 +189,8 @@ export default function FileExplorer() {
             {searchQuery && (
               <button
                 onClick={() => {
+                  stopSearch();
+                  setIsSearching(false);
                   setSearchQuery('');
                   setSearchResults(null);
                 }}
@@ -228,7 +248,7 @@ export default function FileExplorer() {
 
       <div className="flex-1 bg-gray-800 rounded-lg overflow-hidden">
         <div className="h-full overflow-auto">
-          {isLoading || isSearching ? (
+          {isLoading || (isSearching && !searchResults?.length) ? (
             <div className="flex items-center justify-center h-32">
               <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-primary-500"></div>
             </div>
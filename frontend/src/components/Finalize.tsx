@@ -7,10 +7,12 @@ import { torrentApi, mediainfoApi, tagsApi, presentationApi } from '../services/
 import { useClipboard } from '../hooks/useClipboard';
 import { getResolutionFromWidth } from '../utils/format';
 import type { Caracteristique } from '../types';
+import TorrentJobProgress from './TorrentJobProgress';
 
 export default function Finalize() {
   const { 
     torrentResult, 
+    torrentJob,
     nfoPath, 
     generatedBBCode,
     setGeneratedBBCode,
@@ -445,6 +447,8 @@ export default function Finalize() {
                 <p className="text-sm text-green-400">{seedingMessage}</p>
               )}
             </div>
+          ) : torrentJob ? (
+            <TorrentJobProgress />
           ) : (
             <p className="text-gray-500">Aucun torrent créé</p>
           )}
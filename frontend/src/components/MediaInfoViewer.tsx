@@ -23,12 +23,13 @@ export default function MediaInfoViewer() {
   const selectedItem = selectedFiles[0];
   const isDirectory = selectedItem?.is_dir || false;
 
-  // Pour les dossiers, trouver le premier fichier vidéo
-  const { data: firstVideoData, isLoading: isLoadingFirstVideo } = useQuery({
-    queryKey: ['first-video', selectedItem?.path],
-    queryFn: () => filesApi.getFirstVideo(selectedItem?.path || ''),
+  // Pour les dossiers, trouver le premier fichier vidéo (analyse du dossier en un seul appel)
+  const { data: folderSummary, isLoading: isLoadingFirstVideo } = useQuery({
+    queryKey: ['folder-summary', selectedItem?.path],
+    queryFn: () => filesApi.getFolderSummary(selectedItem?.path || ''),
     enabled: !!selectedItem?.path && isDirectory,
   });
+  const firstVideoData = folderSummary?.first_video;
 
   // Détecter les infos de série depuis le nom
   const { data: episodeInfo } = useQuery({
@@ -39,7 +40,7 @@ export default function MediaInfoViewer() {
 
   // Déterminer le fichier à analyser
   useEffect(() => {
-    if (isDirectory && firstVideoData && !firstVideoData.error) {
+    if (isDirectory && firstVideoData) {
       setVideoFileForAnalysis(firstVideoData.path);
       setMediaInfoFilePath(firstVideoData.path);
     } else if (!isDirectory && selectedItem?.path) {
@@ -132,7 +133,7 @@ export default function MediaInfoViewer() {
             <span className="font-medium text-blue-400">Dossier sélectionné</span>
           </div>
           <p className="text-sm text-gray-300 mb-1">{selectedItem?.name}</p>
-          {firstVideoData && !firstVideoData.error ? (
+          {firstVideoData ? (
             <p className="text-xs text-gray-400">
               MediaInfo basé sur : <span className="text-gray-300">{firstVideoData.name}</span>
             </p>
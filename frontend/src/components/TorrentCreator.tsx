@@ -1,16 +1,19 @@
 import { useState, useEffect } from 'react';
 import { useMutation } from '@tanstack/react-query';
 import { FileDown, Check, AlertCircle, ArrowRight, ArrowLeft, Loader2, Link2 } from 'lucide-react';
-import { torrentApi, filesApi } from '../services/api';
+import { torrentApi, filesApi, jobsApi } from '../services/api';
+import type { Job } from '../types';
+import TorrentJobProgress from './TorrentJobProgress';
 import { useAppStore } from '../stores/appStore';
 
 export default function TorrentCreator() {
-  const { selectedFiles, settings, torrentResult, setTorrentResult, setCurrentStep, releaseName } = useAppStore();
+  const { selectedFiles, settings, torrentResult, setTorrentResult, torrentJob, setTorrentJob, setCurrentStep, releaseName } = useAppStore();
   const [torrentName, setTorrentName] = useState('');
   const [pieceSize, setPieceSize] = useState<number | undefined>(undefined);
   const [trackerUrl, setTrackerUrl] = useState(settings?.tracker.announce_url || '');
   const [createHardlink, setCreateHardlink] = useState(true);
   const [hardlinkResult, setHardlinkResult] = useState<{success: boolean; message: string} | null>(null);
+  const [hardlinkJob, setHardlinkJob] = useState<Job | null>(null);
 
   // Sync trackerUrl when settings change
   useEffect(() => {
@@ -23,25 +26,41 @@ export default function TorrentCreator() {
     ? `${settings?.paths?.hardlink_path || '/data/hardlinks'}/${releaseName}${selectedFiles[0].is_dir ? '' : '.' + selectedFiles[0].name.split('.').pop()}`
     : '';
 
+  // Le hardlink (ou la copie en cas d'échec) tourne en tâche de fond côté serveur
   const hardlinkMutation = useMutation({
-    mutationFn: () => filesApi.createHardlink(selectedFiles[0].path, hardlinkPath),
+    mutationFn: async () => {
+      const started = await filesApi.startHardlinkJob(selectedFiles[0].path, hardlinkPath);
+      setHardlinkJob(started);
+      const job = await jobsApi.waitForJob<{ success: boolean; message: string }>(started.id, setHardlinkJob);
+      if (job.status === 'completed' && job.result) {
+        return job.result;
+      }
+      return { success: false, message: job.error || job.message || 'Création du hardlink annulée' };
+    },
     onSuccess: (data) => {
+      setHardlinkJob(null);
       setHardlinkResult(data);
     },
     onError: (error: any) => {
+      setHardlinkJob(null);
       setHardlinkResult({ success: false, message: error.message || 'Erreur lors de la création du hardlink' });
     },
   });
 
+  // Le hachage tourne en tâche de fond: on peut passer à la finalisation sans attendre
   const createMutation = useMutation({
-    mutationFn: torrentApi.createTorrent,
-    onSuccess: (data) => {
-      setTorrentResult(data);
-      // Créer le hardlink après la création du torrent si activé
+    mutationFn: torrentApi.startTorrentJob,
+    onSuccess: (job) => {
+      setTorrentResult(null);
+      setTorrentJob(job);
+      // Le hardlink est lui aussi une tâche de fond, lancée en parallèle si activé
       if (createHardlink && hardlinkPath) {
         hardlinkMutation.mutate();
       }
     },
+    onError: (error: any) => {
+      setTorrentResult({ success: false, error: error.message || 'Erreur lors de la création du torrent' });
+    },
   });
 
   const sourcePath = selectedFiles.length > 0 ? selectedFiles[0].path : '';
@@ -167,6 +186,30 @@ export default function TorrentCreator() {
             </div>
           )}
           
+          {hardlinkJob && (
+            <div className="bg-gray-700/50 rounded p-3 text-sm mb-2">
+              <div className="flex items-center justify-between mb-2">
+                <span className="flex items-center gap-2 text-gray-300">
+                  <Loader2 className="w-4 h-4 animate-spin" />
+                  {hardlinkJob.files_done}/{hardlinkJob.files_total} fichiers
+                  {hardlinkJob.eta !== null && ` — ${Math.ceil(hardlinkJob.eta)} s restantes`}
+                </span>
+                <button
+                  onClick={() => jobsApi.cancelJob(hardlinkJob.id)}
+                  className="text-red-400 hover:text-red-300"
+                >
+                  Annuler
+                </button>
+              </div>
+              <div className="w-full bg-gray-600 rounded h-2">
+                <div
+                  className="bg-primary-500 h-2 rounded"
+                  style={{ width: `${Math.round(hardlinkJob.progress * 100)}%` }}
+                />
+              </div>
+            </div>
+          )}
+          
           {hardlinkResult && (
             <div className={`rounded p-3 text-sm ${
               hardlinkResult.success ? 'bg-green-900/30 border border-green-700' : 'bg-red-900/30 border border-red-700'
@@ -186,6 +229,12 @@ export default function TorrentCreator() {
         </div>
       </div>
 
+      {torrentJob && (
+        <div className="mb-6">
+          <TorrentJobProgress />
+        </div>
+      )}
+
       {torrentResult && (
         <div className={`rounded-lg p-6 mb-6 ${
           torrentResult.success ? 'bg-green-900/30 border border-green-700' : 'bg-red-900/30 border border-red-700'
@@ -223,10 +272,10 @@ export default function TorrentCreator() {
         <div className="flex items-center gap-3">
           <button
             onClick={handleCreateTorrent}
-            disabled={!sourcePath || createMutation.isPending}
+            disabled={!sourcePath || createMutation.isPending || !!torrentJob}
             className="flex items-center gap-2 px-6 py-2 bg-primary-500 text-gray-900 rounded-lg font-medium hover:bg-primary-400 transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
           >
-            {createMutation.isPending ? (
+            {createMutation.isPending || torrentJob ? (
               <>
                 <Loader2 className="w-4 h-4 animate-spin" />
                 Création...
@@ -239,7 +288,7 @@ export default function TorrentCreator() {
             )}
           </button>
 
-          {torrentResult?.success && (
+          {(torrentResult?.success || torrentJob) && (
             <button
               onClick={() => setCurrentStep('finalize')}
               className="flex items-center gap-2 px-4 py-2 bg-green-600 hover:bg-green-500 rounded-lg font-medium transition-colors"
@@ -0,0 +1,68 @@
+import { useEffect } from 'react';
+import { Loader2, X } from 'lucide-react';
+import { jobsApi } from '../services/api';
+import { useAppStore } from '../stores/appStore';
+import { formatDuration, formatSize } from '../utils/format';
+import type { TorrentResponse } from '../types';
+
+// Suit la création du torrent en cours et publie le résultat dans le store une fois terminée
+export default function TorrentJobProgress() {
+  const { torrentJob, setTorrentJob, setTorrentResult } = useAppStore();
+  const jobId = torrentJob?.id;
+
+  useEffect(() => {
+    if (!jobId) return;
+    return jobsApi.streamJob<TorrentResponse>(jobId, {
+      onProgress: (job) => setTorrentJob(job),
+      onDone: (job) => {
+        setTorrentJob(null);
+        if (job.status === 'completed' && job.result) {
+          setTorrentResult(job.result);
+        } else {
+          setTorrentResult({
+            success: false,
+            error: job.status === 'cancelled' ? 'Création du torrent annulée' : job.error || 'Erreur inconnue',
+          });
+        }
+      },
+      onError: () => {
+        setTorrentJob(null);
+        setTorrentResult({ success: false, error: 'Suivi de la création du torrent interrompu' });
+      },
+    });
+  }, [jobId, setTorrentJob, setTorrentResult]);
+
+  if (!torrentJob) return null;
+
+  const piecesDone = torrentJob.details.pieces_done ?? 0;
+  const piecesTotal = torrentJob.details.pieces_total ?? 0;
+
+  return (
+    <div className="bg-gray-700/50 rounded-lg p-4 text-sm">
+      <div className="flex items-center justify-between mb-2">
+        <span className="flex items-center gap-2 text-gray-300">
+          <Loader2 className="w-4 h-4 animate-spin" />
+          Hachage: {piecesDone}/{piecesTotal} pièces
+        </span>
+        <button
+          onClick={() => jobsApi.cancelJob(torrentJob.id)}
+          className="flex items-center gap-1 text-red-400 hover:text-red-300"
+        >
+          <X className="w-4 h-4" />
+          Annuler
+        </button>
+      </div>
+      <div className="w-full bg-gray-600 rounded h-2 mb-2">
+        <div
+          className="bg-primary-500 h-2 rounded"
+          style={{ width: `${Math.round(torrentJob.progress * 100)}%` }}
+        />
+      </div>
+      <p className="text-xs text-gray-400">
+        {formatSize(torrentJob.bytes_done)} / {formatSize(torrentJob.bytes_total)}
+        {' — '}{formatSize(torrentJob.bytes_per_second)}/s
+        {torrentJob.eta !== null && ` — reste ${formatDuration(torrentJob.eta)}`}
+      </p>
+    </div>
+  );
+}
@@ -1,11 +1,22 @@
 import axios from 'axios';
 import type { 
   DirectoryListing, 
+  FileItem,
+  FolderSummary,
+  Job,
   Settings, 
+  TorrentBatchJob,
   TorrentCreateRequest, 
+  TorrentPrepareRequest,
+  TorrentPrepareResult,
   TorrentResponse,
+  TorrentVerification,
   MediaInfo,
   PresentationData,
+  QBittorrentHealth,
+  SeedingRequestItem,
+  SeedingResultItem,
+  SeedingState,
   TagsData
 } from '../types';
 
@@ -24,9 +35,17 @@ export const filesApi = {
     return response.data;
   },
 
-  listDirectory: async (path: string, filterType?: string): Promise<DirectoryListing> => {
+  listDirectory: async (
+    path: string,
+    filterType?: string,
+    page?: { limit: number; cursor?: string | null }
+  ): Promise<DirectoryListing> => {
     const params = new URLSearchParams({ path });
     if (filterType) params.append('filter_type', filterType);
+    if (page) {
+      params.append('limit', String(page.limit));
+      if (page.cursor) params.append('cursor', page.cursor);
+    }
     const response = await api.get<DirectoryListing>(`/files/list?${params}`);
     return response.data;
   },
@@ -46,6 +65,11 @@ export const filesApi = {
     return response.data;
   },
 
+  getFolderSummary: async (path: string): Promise<FolderSummary> => {
+    const response = await api.get<FolderSummary>(`/files/folder-summary?path=${encodeURIComponent(path)}`);
+    return response.data;
+  },
+
   getVideoCount: async (path: string) => {
     const response = await api.get(`/files/video-count?path=${encodeURIComponent(path)}`);
     return response.data;
@@ -58,6 +82,32 @@ export const filesApi = {
     return response.data;
   },
 
+  /**
+   * Recherche en streaming (SSE). Retourne une fonction pour arrêter la recherche.
+   */
+  streamSearch: (
+    path: string,
+    query: string,
+    filterType: string | undefined,
+    handlers: { onResult: (item: FileItem) => void; onDone: () => void; onError: () => void }
+  ): (() => void) => {
+    const params = new URLSearchParams({ path, query });
+    if (filterType) params.append('filter_type', filterType);
+    const source = new EventSource(`${API_BASE}/files/search/stream?${params}`);
+    source.addEventListener('result', (event) => {
+      handlers.onResult(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('done', () => {
+      source.close();
+      handlers.onDone();
+    });
+    source.onerror = () => {
+      source.close();
+      handlers.onError();
+    };
+    return () => source.close();
+  },
+
   createHardlink: async (sourcePath: string, destinationPath: string) => {
     const response = await api.post('/files/create-hardlink', {
       source_path: sourcePath,
@@ -65,6 +115,59 @@ export const filesApi = {
     });
     return response.data;
   },
+
+  startHardlinkJob: async (sourcePath: string, destinationPath: string): Promise<Job<{ success: boolean; message: string }>> => {
+    const response = await api.post('/files/create-hardlink/job', {
+      source_path: sourcePath,
+      destination_path: destinationPath
+    });
+    return response.data;
+  },
+};
+
+export const jobsApi = {
+  getJob: async <T = unknown>(jobId: string): Promise<Job<T>> => {
+    const response = await api.get<Job<T>>(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Progression poussée par le serveur (SSE); retourne une fonction pour fermer le flux
+  streamJob: <T = unknown>(jobId: string, handlers: {
+    onProgress: (job: Job<T>) => void;
+    onDone: (job: Job<T>) => void;
+    onError: () => void;
+  }) => {
+    const source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+    source.addEventListener('progress', (event) => {
+      handlers.onProgress(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('done', (event) => {
+      source.close();
+      handlers.onDone(JSON.parse((event as MessageEvent).data));
+    });
+    source.onerror = () => {
+      source.close();
+      handlers.onError();
+    };
+    return () => source.close();
+  },
+
+  cancelJob: async (jobId: string) => {
+    const response = await api.delete(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Interroge le job jusqu'à ce qu'il se termine
+  waitForJob: async <T = unknown>(jobId: string, onProgress?: (job: Job<T>) => void, intervalMs = 1000): Promise<Job<T>> => {
+    for (;;) {
+      const job = await jobsApi.getJob<T>(jobId);
+      onProgress?.(job);
+      if (job.status !== 'pending' && job.status !== 'running') {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
 };
 
 export const torrentApi = {
@@ -83,6 +186,26 @@ export const torrentApi = {
     return response.data;
   },
 
+  getHealth: async (): Promise<QBittorrentHealth> => {
+    const response = await api.get<QBittorrentHealth>('/torrent/health');
+    return response.data;
+  },
+
+  startTorrentJob: async (data: TorrentCreateRequest): Promise<Job<TorrentResponse>> => {
+    const response = await api.post<Job<TorrentResponse>>('/torrent/create/job', data);
+    return response.data;
+  },
+
+  startTorrentBatchJob: async (items: TorrentCreateRequest[]): Promise<TorrentBatchJob> => {
+    const response = await api.post<TorrentBatchJob>('/torrent/create/batch', { items });
+    return response.data;
+  },
+
+  startPrepareJob: async (data: TorrentPrepareRequest): Promise<Job<TorrentPrepareResult>> => {
+    const response = await api.post<Job<TorrentPrepareResult>>('/torrent/prepare/job', data);
+    return response.data;
+  },
+
   downloadTorrent: (filename: string) => {
     return `${API_BASE}/torrent/download/${encodeURIComponent(filename)}`;
   },
@@ -94,6 +217,51 @@ export const torrentApi = {
     });
     return response.data;
   },
+
+  addBatchForSeeding: async (
+    items: SeedingRequestItem[]
+  ): Promise<{ success: boolean; items: SeedingResultItem[] }> => {
+    const response = await api.post('/torrent/add-for-seeding/batch', { items });
+    return response.data;
+  },
+
+  getSeedingState: async (refresh = false): Promise<SeedingState> => {
+    const response = await api.get<SeedingState>('/torrent/seeding', { params: { refresh } });
+    return response.data;
+  },
+
+  // État des torrents suivis poussé par le serveur (SSE); retourne une fonction pour fermer le flux
+  streamSeedingState: (onState: (state: SeedingState) => void, onError?: () => void) => {
+    const source = new EventSource(`${API_BASE}/torrent/seeding/events`);
+    source.addEventListener('state', (event) => {
+      onState(JSON.parse((event as MessageEvent).data));
+    });
+    source.onerror = () => onError?.();
+    return () => source.close();
+  },
+
+  trackSeeding: async (hashes: string[]): Promise<SeedingState> => {
+    const response = await api.post<SeedingState>('/torrent/seeding/track', { hashes });
+    return response.data;
+  },
+
+  untrackSeeding: async (hash: string) => {
+    const response = await api.delete(`/torrent/seeding/${hash}`);
+    return response.data;
+  },
+
+  startVerifyJob: async (
+    torrentPath: string,
+    contentPath: string,
+    mode: 'sample' | 'full' = 'sample'
+  ): Promise<Job<TorrentVerification>> => {
+    const response = await api.post<Job<TorrentVerification>>('/torrent/verify/job', {
+      torrent_path: torrentPath,
+      content_path: contentPath,
+      mode,
+    });
+    return response.data;
+  },
 };
 
 export const mediainfoApi = {
@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import type { Step, FileItem, Settings, TorrentResponse, MediaInfo, PresentationData } from '../types';
+import type { Step, FileItem, Settings, TorrentResponse, MediaInfo, PresentationData, Job } from '../types';
 
 interface TMDBInfo {
   id: number;
@@ -35,6 +35,10 @@ interface AppState {
   torrentResult: TorrentResponse | null;
   setTorrentResult: (result: TorrentResponse | null) => void;
 
+  // Création du torrent en cours (tâche de fond), suivie jusqu'à l'écran de finalisation
+  torrentJob: Job<TorrentResponse> | null;
+  setTorrentJob: (job: Job<TorrentResponse> | null) => void;
+
   mediaInfo: MediaInfo | null;
   setMediaInfo: (info: MediaInfo | null) => void;
 
@@ -109,6 +113,9 @@ export const useAppStore = create<AppState>((set) => ({
   torrentResult: null,
   setTorrentResult: (result) => set({ torrentResult: result }),
 
+  torrentJob: null,
+  setTorrentJob: (job) => set({ torrentJob: job }),
+
   mediaInfo: null,
   setMediaInfo: (info) => set({ mediaInfo: info }),
 
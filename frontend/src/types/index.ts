@@ -10,6 +10,23 @@ export interface DirectoryListing {
   current_path: string;
   parent_path: string | null;
   items: FileItem[];
+  next_cursor?: string | null;
+  total?: number;
+}
+
+export interface FolderEpisode extends FileItem {
+  season: number | null;
+  episode: number | null;
+}
+
+export interface FolderSummary {
+  path: string;
+  first_video: FileItem | null;
+  video_count: number;
+  total_size: number;
+  file_count: number;
+  extensions: Record<string, { count: number; size: number }>;
+  episodes: FolderEpisode[];
 }
 
 export interface QBittorrentSettings {
@@ -60,6 +77,122 @@ export interface TorrentResponse {
   error?: string;
 }
 
+export interface Job<T = unknown, D = Record<string, number>> {
+  id: string;
+  kind: string;
+  description: string;
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
+  files_done: number;
+  files_total: number;
+  bytes_done: number;
+  bytes_total: number;
+  progress: number;
+  bytes_per_second: number;
+  eta: number | null;
+  elapsed: number;
+  details: D;
+  message: string;
+  error: string | null;
+  result: T | null;
+}
+
+export interface TorrentBatchItem {
+  index: number;
+  source_path: string;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  pieces_done?: number;
+  pieces_total?: number;
+  result?: Omit<TorrentResponse, 'success'>;
+  error?: string;
+}
+
+export interface TorrentBatchDetails {
+  items?: TorrentBatchItem[];
+  succeeded?: number;
+  disks?: number;
+}
+
+export interface TorrentPrepareRequest extends TorrentCreateRequest {
+  destination_path: string;
+}
+
+export interface TorrentPrepareResult {
+  success: boolean;
+  message: string;
+  torrent: Omit<TorrentResponse, 'success'>;
+  mediainfo: MediaInfo | null;
+  mediainfo_path: string | null;
+  pieces_from_copy: number;
+}
+
+export interface QBittorrentHealth {
+  host: string;
+  port: number;
+  ok: boolean;
+  version: string | null;
+  error: string | null;
+  latency: number;
+  checked_at: number;
+}
+
+export interface TorrentVerification {
+  info_hash: string;
+  content_path: string;
+  mode: 'sample' | 'full';
+  ok: boolean;
+  pieces_total: number;
+  pieces_checked: number;
+  mismatched: number[];
+  missing_files: string[];
+  cached: boolean;
+  duration: number;
+}
+
+export interface SeedingRequestItem {
+  torrent_path: string;
+  content_path: string;
+  save_path?: string | null;
+}
+
+export interface SeedingResultItem {
+  torrent_path: string;
+  success: boolean;
+  info_hash: string | null;
+  save_path: string | null;
+  skip_checking: boolean;
+  state: string | null;
+  message: string;
+}
+
+export type SeedingPhase = 'checking' | 'seeding' | 'downloading' | 'paused' | 'error' | 'absent' | 'unknown';
+
+export interface SeedingTorrent {
+  hash: string;
+  tracked_at: number;
+  phase: SeedingPhase;
+  state: string | null;
+  name?: string;
+  progress?: number;
+  size?: number;
+  amount_left?: number;
+  upspeed?: number;
+  dlspeed?: number;
+  num_seeds?: number;
+  num_leechs?: number;
+  ratio?: number;
+  save_path?: string;
+}
+
+export interface SeedingState {
+  version: number;
+  rid: number;
+  synced_at: number | null;
+  error: string | null;
+  torrents: SeedingTorrent[];
+}
+
+export type TorrentBatchJob = Job<TorrentBatchItem[], TorrentBatchDetails>;
+
 export interface VideoTrack {
   codec: string | null;
   width: number | null;